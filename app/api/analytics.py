@@ -1,11 +1,21 @@
 """Analytics and reporting API endpoints"""
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
 
+from app.core.cache import lead_generation
 from app.core.database import get_db
-from app.services.analytics_service import AnalyticsService
+from app.models.lead import LeadSource, LeadStatus
+from app.services.analytics_service import (
+    LEADERBOARD_WINDOWS,
+    AnalyticsService,
+    dashboard_cache,
+    dashboard_query_stats,
+)
+from app.services.lead_snapshot import lead_snapshot
+from app.services.visitor_service import VisitorService
 
 router = APIRouter()
 
@@ -13,27 +23,158 @@ router = APIRouter()
 @router.get("/dashboard")
 async def get_dashboard_stats(
     days: int = Query(30, description="Number of days to analyze"),
+    fresh: bool = Query(False, description="Bypass the result cache"),
     db: AsyncSession = Depends(get_db)
 ):
     """Get dashboard statistics"""
     service = AnalyticsService(db)
-    start_date = datetime.now() - timedelta(days=days)
-    stats = await service.get_dashboard_stats(start_date)
+    stats = await service.get_cached_dashboard_stats(days, fresh=fresh)
     return stats
 
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get dashboard cache hit rate and query timings"""
+    return {
+        "cache": dashboard_cache.stats(),
+        "query": dashboard_query_stats.stats(),
+        "lead_generation": lead_generation.value,
+    }
+
+
 @router.get("/conversion-rate")
 async def get_conversion_rate(
     start_date: datetime = Query(None),
     end_date: datetime = Query(None),
+    bucket: Optional[Literal["day", "week", "month"]] = Query(
+        None, description="Return a time series bucketed by day, week or month"
+    ),
+    group_by: Optional[Literal["source", "campaign"]] = Query(
+        None, description="Break the rates down by lead source or campaign"
+    ),
     db: AsyncSession = Depends(get_db)
 ):
-    """Calculate conversion rates"""
+    """Calculate conversion rates, optionally as a bucketed and grouped series"""
     service = AnalyticsService(db)
+    if bucket or group_by:
+        return await service.get_conversion_series(bucket, group_by, start_date, end_date)
     rate = await service.calculate_conversion_rate(start_date, end_date)
     return rate
 
 
+@router.get("/funnel")
+async def get_funnel(
+    days: int = Query(90, ge=1, description="Cohort of leads created in the last N days"),
+    group_by: Optional[Literal["source", "campaign"]] = Query(None),
+    fresh: bool = Query(False, description="Recompute instead of using today's result"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get stage-to-stage funnel conversion from lead status history"""
+    service = AnalyticsService(db)
+    return await service.get_funnel(days, group_by, fresh=fresh)
+
+
+@router.get("/velocity")
+async def get_velocity(
+    days: int = Query(90, ge=1, description="Cohort of leads created in the last N days"),
+    group_by: Optional[Literal["source", "campaign"]] = Query(None),
+    fresh: bool = Query(False, description="Recompute instead of using today's result"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get median and p90 time in each lead status"""
+    service = AnalyticsService(db)
+    return await service.get_velocity(days, group_by, fresh=fresh)
+
+
+@router.get("/score-distribution")
+async def get_score_distribution(
+    days: int = Query(30, ge=1, description="Number of days to analyze"),
+    group_by: Optional[Literal["source", "campaign"]] = Query(None),
+    source: Optional[LeadSource] = Query(None),
+    campaign: Optional[str] = Query(None),
+    bin_width: int = Query(10, ge=1, le=100),
+    threshold: Optional[List[int]] = Query(
+        None, description="Qualification thresholds to evaluate; defaults to steps of 10"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get lead score histogram, p50/p90/p99 and the leads each threshold qualifies"""
+    service = AnalyticsService(db)
+    return await service.get_score_distribution(
+        days, group_by, source, campaign, bin_width, threshold
+    )
+
+
+@router.get("/unique-visitors")
+async def get_unique_visitors(
+    days: int = Query(30, ge=1, description="Number of days to analyze"),
+    group_by: Optional[Literal["source", "campaign", "day"]] = Query(None),
+    source: Optional[LeadSource] = Query(
+        None, description="Lead source, e.g. landing_page for landing pages"
+    ),
+    campaign: Optional[str] = Query(None, description="Campaign or landing page name"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get estimated unique visitors and devices, with the estimates' error bounds"""
+    service = VisitorService(db)
+    return await service.get_unique_visitors(days, group_by, source, campaign)
+
+
+def slice_filters(
+    status: Optional[List[LeadStatus]] = Query(None),
+    source: Optional[List[LeadSource]] = Query(None),
+    campaign: Optional[str] = Query(None),
+    qualified: Optional[bool] = Query(None),
+    has_company: Optional[bool] = Query(None),
+    min_score: Optional[int] = Query(None),
+    max_score: Optional[int] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+) -> Dict[str, Any]:
+    """Lead filters shared by the snapshot slicing endpoints"""
+    return {
+        "statuses": status,
+        "sources": source,
+        "campaign": campaign,
+        "qualified": qualified,
+        "has_company": has_company,
+        "min_score": min_score,
+        "max_score": max_score,
+        "created_from": created_from.replace(tzinfo=None) if created_from else None,
+        "created_to": created_to.replace(tzinfo=None) if created_to else None,
+    }
+
+
+@router.get("/slice")
+async def slice_leads(
+    group_by: Optional[
+        Literal["status", "source", "campaign", "qualified", "day", "week", "month"]
+    ] = Query(None),
+    filters: Dict[str, Any] = Depends(slice_filters),
+    db: AsyncSession = Depends(get_db)
+):
+    """Filter and group leads ad hoc from the in-process snapshot"""
+    service = AnalyticsService(db)
+    return await service.slice_leads(filters, group_by)
+
+
+@router.get("/slice/score-histogram")
+async def slice_score_histogram(
+    bins: int = Query(10, ge=1, le=100),
+    filters: Dict[str, Any] = Depends(slice_filters),
+    db: AsyncSession = Depends(get_db)
+):
+    """Lead score histogram of filtered leads from the in-process snapshot"""
+    service = AnalyticsService(db)
+    return await service.slice_score_histogram(filters, bins)
+
+
+@router.get("/snapshot/stats")
+async def get_snapshot_stats():
+    """Get row count, memory use and lag of the in-process lead snapshot"""
+    return lead_snapshot.stats()
+
+
 @router.get("/lead-sources")
 async def get_lead_sources(
     days: int = Query(30),
@@ -48,9 +189,24 @@ async def get_lead_sources(
 @router.get("/top-performing-campaigns")
 async def get_top_campaigns(
     limit: int = Query(10),
+    days: Optional[int] = Query(
+        None, description="Window of 7, 30 or 90 days; all time when omitted"
+    ),
+    dimension: Literal["campaign", "utm_source", "utm_medium", "utm_campaign"] = Query(
+        "campaign", description="Rank campaigns or UTM values"
+    ),
+    sort: Literal[
+        "total_leads", "qualified_leads", "converted_leads", "conversion_rate", "avg_score"
+    ] = Query("total_leads"),
+    fresh: bool = Query(False, description="Bypass the leaderboard cache"),
     db: AsyncSession = Depends(get_db)
 ):
     """Get top performing campaigns"""
+    if days is not None and days not in LEADERBOARD_WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"days must be one of {', '.join(map(str, LEADERBOARD_WINDOWS))}",
+        )
     service = AnalyticsService(db)
-    campaigns = await service.get_top_campaigns(limit)
+    campaigns = await service.get_top_campaigns(limit, days, dimension, sort, fresh)
     return campaigns
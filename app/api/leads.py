@@ -1,12 +1,37 @@
 """Lead management API endpoints"""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from datetime import datetime
+from typing import List, Literal, Optional, Tuple
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.schemas.lead import LeadCreate, LeadResponse, LeadUpdate
-from app.services.lead_service import LeadService
+from app.core.etags import lead_etag, parse_if_match
+from app.core.streaming import iter_json_records
+from app.schemas.activity import ActivityCreate, ActivityResponse
+from app.schemas.lead import (
+    LEAD_RESPONSE_FIELDS,
+    BulkLeadResponse,
+    BulkLeadUpdate,
+    BulkLeadUpdateResponse,
+    LeadCreate,
+    LeadMatchResponse,
+    LeadPurgeRequest,
+    LeadResponse,
+    LeadSearchFilters,
+    LeadSearchResponse,
+    LeadStatusChangeResponse,
+    LeadUpdate,
+)
+from app.models.lead import LeadSource, LeadStatus
+from app.services.activity_service import ActivityService
+from app.services.lead_cache import lead_cache
+from app.services.lead_export import MEDIA_TYPES, lead_exporter
+from app.services.lead_purger import lead_purger
+from app.services.lead_service import LeadService, LeadVersionConflict
+from app.services.score_rescorer import stale_score_rescorer
 
 router = APIRouter()
 
@@ -21,23 +46,248 @@ async def create_lead(
     return await service.create_lead(lead)
 
 
+@router.post("/bulk", response_model=BulkLeadResponse)
+async def bulk_create_leads(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Bulk-create leads from a streamed NDJSON or JSON-array body"""
+    service = LeadService(db)
+    try:
+        return await service.bulk_create_leads(iter_json_records(request.stream()))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.patch("/bulk", response_model=BulkLeadUpdateResponse)
+async def bulk_update_leads(
+    request: BulkLeadUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Set status, tags, qualification or campaign on leads selected by id or filters"""
+    service = LeadService(db)
+    return await service.bulk_update_leads(request)
+
+
+@router.post("/purge", status_code=status.HTTP_202_ACCEPTED)
+async def purge_leads(request: LeadPurgeRequest):
+    """Delete matching leads in the background, in bounded batches (admin).
+
+    With dry_run the number of matching leads is returned and nothing is deleted.
+    """
+    if request.dry_run:
+        return {"matched": await lead_purger.count(request), "dry_run": True}
+    if not lead_purger.start(request):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="A purge is already running"
+        )
+    return lead_purger.status()
+
+
+@router.get("/purge/status")
+async def get_purge_status():
+    """Get progress of the latest purge"""
+    return lead_purger.status()
+
+
+@router.post("/rescore")
+async def rescore_leads(
+    chunk_size: int = Query(5000, ge=100, le=50000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Recalculate scores for all leads in vectorized chunks (admin)"""
+    service = LeadService(db)
+    return await service.rescore_leads(chunk_size=chunk_size)
+
+
+@router.post("/rescore/stale", status_code=status.HTTP_202_ACCEPTED)
+async def rescore_stale_leads():
+    """Start rescoring leads scored under older rules in the background (admin)"""
+    started = stale_score_rescorer.start()
+    return {"started": started, **await stale_score_rescorer.status()}
+
+
+@router.get("/rescore/status")
+async def get_rescore_status():
+    """Get progress of the stale-lead rescoring job"""
+    return await stale_score_rescorer.status()
+
+
+def lead_fields(
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. id,email,status,lead_score"
+    ),
+) -> Tuple[str, ...]:
+    """Lead fields requested with ``fields=``; every response field by default"""
+    if fields is None:
+        return LEAD_RESPONSE_FIELDS
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in LEAD_RESPONSE_FIELDS]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown lead fields: {', '.join(unknown) or fields!r}",
+        )
+    return requested
+
+
 @router.get("/", response_model=List[LeadResponse])
 async def get_leads(
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    order: Literal["desc", "asc"] = Query("desc", description="created_at order of the walk"),
+    snapshot: bool = Query(
+        False, description="Skip leads created after the walk began (best effort)"
+    ),
+    skip: int = Query(0, ge=0, description="Legacy offset; prefer cursor"),
+    fields: Tuple[str, ...] = Depends(lead_fields),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all leads with pagination"""
+    """Get leads with keyset cursor pagination.
+
+    The cursor of the next page is returned in the X-Next-Cursor header and is
+    absent on the last page. Only the requested ``fields`` are read and rows
+    are encoded straight to JSON.
+    """
     service = LeadService(db)
-    return await service.get_leads(skip=skip, limit=limit)
+    if skip:
+        if cursor is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either skip or cursor, not both",
+            )
+        return ORJSONResponse(await service.get_leads(skip=skip, limit=limit, fields=fields))
+
+    try:
+        leads, next_cursor = await service.get_leads_page(limit, cursor, order, snapshot, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return ORJSONResponse(leads, headers=headers)
+
+
+def search_filters(
+    status_: Optional[List[LeadStatus]] = Query(None, alias="status"),
+    source: Optional[List[LeadSource]] = Query(None),
+    campaign: Optional[str] = Query(None),
+    min_score: Optional[int] = Query(None),
+    max_score: Optional[int] = Query(None),
+    qualified: Optional[bool] = Query(None),
+    tag: Optional[List[str]] = Query(None, description="Match leads carrying every tag"),
+    company_id: Optional[int] = Query(None),
+    company_domain: Optional[str] = Query(None),
+    has_company: Optional[bool] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    updated_from: Optional[datetime] = Query(None),
+    updated_to: Optional[datetime] = Query(None),
+) -> LeadSearchFilters:
+    """Lead search filters from the query string"""
+    try:
+        return LeadSearchFilters(
+            statuses=status_,
+            sources=source,
+            campaign=campaign,
+            min_score=min_score,
+            max_score=max_score,
+            qualified=qualified,
+            tags=tag,
+            company_id=company_id,
+            company_domain=company_domain,
+            has_company=has_company,
+            created_from=created_from.replace(tzinfo=None) if created_from else None,
+            created_to=created_to.replace(tzinfo=None) if created_to else None,
+            updated_from=updated_from.replace(tzinfo=None) if updated_from else None,
+            updated_to=updated_to.replace(tzinfo=None) if updated_to else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/search", response_model=LeadSearchResponse)
+async def search_leads(
+    filters: LeadSearchFilters = Depends(search_filters),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Tuple[str, ...] = Depends(lead_fields),
+    db: AsyncSession = Depends(get_db)
+):
+    """Search leads by status, source, campaign, score, qualification, tags, company and dates.
+
+    Results are newest first, projected to ``fields`` like the lead list. In
+    debug mode the response includes the query's EXPLAIN cost and access paths.
+    """
+    service = LeadService(db)
+    try:
+        leads, next_cursor, query_plan = await service.search_leads(
+            filters, limit, cursor, explain=settings.DEBUG, fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return ORJSONResponse({"leads": leads, "next_cursor": next_cursor, "query_plan": query_plan})
+
+
+@router.get("/export")
+async def export_leads(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    filters: LeadSearchFilters = Depends(search_filters),
+    fields: Tuple[str, ...] = Depends(lead_fields),
+):
+    """Stream every lead matching the search filters as NDJSON or CSV, in id order"""
+    return StreamingResponse(
+        lead_exporter.stream(filters, fields, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="leads.{format}"'},
+    )
+
+
+@router.get("/search/fuzzy", response_model=LeadMatchResponse)
+async def fuzzy_search_leads(
+    q: str = Query(..., min_length=3, max_length=200, description="Name, email, title or company"),
+    filters: LeadSearchFilters = Depends(search_filters),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Typo-tolerant search over lead names, emails, job titles and companies, best first"""
+    service = LeadService(db)
+    try:
+        matches, next_cursor = await service.fuzzy_search_leads(q, filters, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return {
+        "leads": [
+            {**LeadResponse.model_validate(lead).model_dump(), "rank": rank}
+            for lead, rank in matches
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.post("/search/refresh")
+async def refresh_search_index(
+    db: AsyncSession = Depends(get_db)
+):
+    """Rebuild the fuzzy search documents of every lead (admin)"""
+    service = LeadService(db)
+    return await service.refresh_search_documents()
+
+
+@router.get("/cache/stats")
+async def get_lead_cache_stats():
+    """Get lead cache hit ratio, evictions and memory"""
+    return lead_cache.stats()
 
 
 @router.get("/{lead_id}", response_model=LeadResponse)
 async def get_lead(
     lead_id: int,
+    response: Response,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get a specific lead by ID"""
+    """Get a specific lead by ID; the ETag header names its version"""
     service = LeadService(db)
     lead = await service.get_lead(lead_id)
     if not lead:
@@ -45,6 +295,7 @@ async def get_lead(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lead not found"
         )
+    response.headers["ETag"] = lead_etag(lead.updated_at)
     return lead
 
 
@@ -52,16 +303,23 @@ async def get_lead(
 async def update_lead(
     lead_id: int,
     lead_update: LeadUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ):
-    """Update a lead"""
+    """Update a lead; with If-Match, only if it is still at that ETag's version"""
     service = LeadService(db)
-    lead = await service.update_lead(lead_id, lead_update)
+    expected_versions = parse_if_match(if_match) if if_match is not None else None
+    try:
+        lead = await service.update_lead(lead_id, lead_update, expected_versions)
+    except LeadVersionConflict as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if not lead:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lead not found"
         )
+    response.headers["ETag"] = lead_etag(lead["updated_at"])
     return lead
 
 
@@ -91,6 +349,59 @@ async def score_lead(
     return {"lead_id": lead_id, "score": score}
 
 
+@router.post(
+    "/{lead_id}/activities",
+    response_model=ActivityResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def record_activity(
+    lead_id: int,
+    activity: ActivityCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Record a lead activity and update the lead's engagement score"""
+    service = ActivityService(db)
+    recorded = await service.record_activity(lead_id, **activity.model_dump())
+    if not recorded:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead not found"
+        )
+    return recorded
+
+
+@router.get("/{lead_id}/engagement")
+async def get_engagement(
+    lead_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a lead's engagement score, decayed to now"""
+    service = ActivityService(db)
+    engagement = await service.get_engagement(lead_id)
+    if not engagement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead not found"
+        )
+    return engagement
+
+
+@router.get("/{lead_id}/status-history", response_model=List[LeadStatusChangeResponse])
+async def get_status_history(
+    lead_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a lead's status transitions, oldest first"""
+    service = LeadService(db)
+    history = await service.get_status_history(lead_id)
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead not found"
+        )
+    return history
+
+
 @router.post("/{lead_id}/sync/{crm}")
 async def sync_to_crm(
     lead_id: int,
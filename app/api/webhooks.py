@@ -1,13 +1,78 @@
 """Webhook endpoints for lead capture"""
 
-from fastapi import APIRouter, Depends, Request
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import get_db
+from app.services.lead_buffer import DuplicateLeadError, lead_write_buffer
 from app.services.webhook_service import WebhookService
 
 router = APIRouter()
 
+# Responses of processed deliveries, keyed by route and idempotency key
+idempotency_cache = TTLCache(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE, ttl=settings.IDEMPOTENCY_TTL_SECONDS
+)
+# Deliveries still being processed, so concurrent retries share one result
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def _webhook_service(db: AsyncSession) -> WebhookService:
+    """Build a webhook service, write-behind when enabled"""
+    return WebhookService(
+        db, write_buffer=lead_write_buffer if settings.WEBHOOK_WRITE_BEHIND else None
+    )
+
+
+async def _idempotency_key(request: Request) -> str:
+    """Key a delivery by its Idempotency-Key header, or by a hash of its body"""
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        key = hashlib.sha256(await request.body()).hexdigest()
+    return f"{request.url.path}:{key}"
+
+
+async def _process_once(
+    request: Request, process: Callable[[Dict[str, Any]], Awaitable[Any]]
+) -> Dict[str, Any]:
+    """Process a delivery, replaying the original response for retries"""
+    key = await _idempotency_key(request)
+    cached = idempotency_cache.get(key)
+    if cached is not None:
+        return cached
+    if key in _in_flight:
+        return await asyncio.shield(_in_flight[key])
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        lead = await process(await request.json())
+    except DuplicateLeadError as e:
+        error = HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        future.set_exception(error)
+        raise error
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        response = {"status": "success", "lead_id": lead.id}
+        idempotency_cache.set(key, response)
+        future.set_result(response)
+        return response
+    finally:
+        del _in_flight[key]
+        if not future.done():
+            future.cancel()
+        elif not future.cancelled():
+            # Mark the outcome as retrieved even when no concurrent retry awaited it
+            future.exception()
+
 
 @router.post("/form-submission")
 async def handle_form_submission(
@@ -15,10 +80,8 @@ async def handle_form_submission(
     db: AsyncSession = Depends(get_db)
 ):
     """Handle form submission webhook"""
-    data = await request.json()
-    service = WebhookService(db)
-    lead = await service.process_form_submission(data)
-    return {"status": "success", "lead_id": lead.id}
+    service = _webhook_service(db)
+    return await _process_once(request, service.process_form_submission)
 
 
 @router.post("/landing-page")
@@ -27,10 +90,8 @@ async def handle_landing_page(
     db: AsyncSession = Depends(get_db)
 ):
     """Handle landing page conversion"""
-    data = await request.json()
-    service = WebhookService(db)
-    lead = await service.process_landing_page_conversion(data)
-    return {"status": "success", "lead_id": lead.id}
+    service = _webhook_service(db)
+    return await _process_once(request, service.process_landing_page_conversion)
 
 
 @router.post("/chat-widget")
@@ -39,7 +100,11 @@ async def handle_chat_widget(
     db: AsyncSession = Depends(get_db)
 ):
     """Handle chat widget lead capture"""
-    data = await request.json()
-    service = WebhookService(db)
-    lead = await service.process_chat_conversation(data)
-    return {"status": "success", "lead_id": lead.id}
+    service = _webhook_service(db)
+    return await _process_once(request, service.process_chat_conversation)
+
+
+@router.get("/idempotency/stats")
+async def get_idempotency_stats():
+    """Get idempotency cache hit/miss counters"""
+    return {**idempotency_cache.stats(), "in_flight": len(_in_flight)}
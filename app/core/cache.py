@@ -0,0 +1,125 @@
+"""In-process caching primitives"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Entries expire ``ttl`` seconds after they are set; once ``maxsize`` entries
+    are held, the least recently used one is evicted. Hit, miss, eviction and
+    expiration counters are kept for sizing, and with ``sizeof`` the bytes held
+    by the cached values.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.value_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry, counting the hit or miss"""
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used one when full"""
+        self._forget(self._entries.get(key))
+        self._entries[key] = (self.clock() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        if self.sizeof is not None:
+            self.value_bytes += self.sizeof(value)
+        while len(self._entries) > self.maxsize:
+            self._forget(self._entries.popitem(last=False)[1])
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove an entry, returning whether it was present"""
+        entry = self._entries.pop(key, None)
+        self._forget(entry)
+        return entry is not None
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        self._entries.clear()
+        self.value_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and effectiveness counters"""
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+        if self.sizeof is not None:
+            stats["value_bytes"] = self.value_bytes
+        return stats
+
+    def _forget(self, entry: Optional[Tuple[float, Any]]) -> None:
+        """Stop counting the bytes of a removed entry"""
+        if entry is not None and self.sizeof is not None:
+            self.value_bytes -= self.sizeof(entry[1])
+
+    def _lookup(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        """Return the entry for ``key`` unless it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self.clock():
+            del self._entries[key]
+            self._forget(entry)
+            self.expirations += 1
+            return None
+        return entry
+
+
+class Generation:
+    """Counter bumped on every write to some data, used to version cache keys.
+
+    Entries keyed with the current ``value`` are implicitly invalidated by the
+    next ``bump``; they are never read again and age out of their cache.
+    """
+
+    def __init__(self):
+        self.value = 0
+
+    def bump(self) -> int:
+        """Advance the generation, returning the new value"""
+        self.value += 1
+        return self.value
+
+
+# Bumped whenever a transaction that wrote leads commits
+lead_generation = Generation()
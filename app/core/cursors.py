@@ -0,0 +1,35 @@
+"""Opaque, signed pagination cursors"""
+
+import base64
+import hashlib
+import hmac
+import json
+from typing import Any, Dict
+
+from app.core.config import settings
+
+_SIGNATURE_BYTES = 12
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a JSON-serializable position as a URL-safe, signed token"""
+    payload = json.dumps(position, separators=(",", ":"), sort_keys=True).encode()
+    signature = hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).digest()
+    token = base64.urlsafe_b64encode(signature[:_SIGNATURE_BYTES] + payload)
+    return token.decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode a token made by ``encode_cursor``, raising ValueError if it is invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    signature, payload = raw[:_SIGNATURE_BYTES], raw[_SIGNATURE_BYTES:]
+    expected = hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected[:_SIGNATURE_BYTES]):
+        raise ValueError("Invalid cursor")
+    position = json.loads(payload)
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
@@ -0,0 +1,29 @@
+"""Lead ETags for optimistic concurrency on updates"""
+
+from datetime import datetime
+from typing import List, Optional
+
+
+def lead_etag(updated_at: datetime) -> str:
+    """Strong ETag naming a lead's version, its ``updated_at`` timestamp"""
+    return f'"{updated_at.isoformat()}"'
+
+
+def parse_if_match(header: str) -> Optional[List[datetime]]:
+    """Versions an If-Match header accepts, or None for ``*`` (any version).
+
+    Weak or malformed tags never match, so a header holding only those yields
+    an empty list and the update is refused.
+    """
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return None
+        if len(tag) < 2 or not (tag.startswith('"') and tag.endswith('"')):
+            continue
+        try:
+            versions.append(datetime.fromisoformat(tag[1:-1]))
+        except ValueError:
+            continue
+    return versions
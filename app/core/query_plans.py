@@ -0,0 +1,52 @@
+"""EXPLAIN diagnostics for generated queries"""
+
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a statement, keeping its bound parameters"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: ClauseElement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def summarize_plan(plan: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Planner cost, row estimate and access paths of an ``EXPLAIN (FORMAT JSON)`` result.
+
+    ``seq_scans`` lists the tables read in full; a filter combination that
+    misses its index shows up there.
+    """
+    root = plan[0]["Plan"]
+    nodes: List[str] = []
+    indexes: List[str] = []
+    seq_scans: List[str] = []
+
+    def walk(node: Dict[str, Any]) -> None:
+        nodes.append(node["Node Type"])
+        if "Index Name" in node:
+            indexes.append(node["Index Name"])
+        if node["Node Type"] == "Seq Scan":
+            seq_scans.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(root)
+    return {
+        "startup_cost": root["Startup Cost"],
+        "total_cost": root["Total Cost"],
+        "estimated_rows": root["Plan Rows"],
+        "nodes": nodes,
+        "indexes": indexes,
+        "seq_scans": seq_scans,
+        "uses_index": bool(indexes) and not seq_scans,
+    }
@@ -0,0 +1,126 @@
+"""Mergeable summaries for analytics"""
+
+import hashlib
+import math
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class ScoreHistogram:
+    """Exact, mergeable quantile sketch of integer scores from 0 to ``max_score``.
+
+    Lead scores take at most ``max_score + 1`` values, so one counter per value
+    is a sketch with no error: histograms of different days or groups merge by
+    adding counters, and quantiles, bins and threshold fractions come from the
+    merged counts.
+    """
+
+    def __init__(self, max_score: int = 100):
+        self.counts = np.zeros(max_score + 1, dtype=np.int64)
+
+    @property
+    def total(self) -> int:
+        """Number of scores counted"""
+        return int(self.counts.sum())
+
+    def add(self, score: int, count: int = 1) -> None:
+        """Count ``count`` occurrences of ``score``, clamped to the score range"""
+        self.counts[min(max(int(score), 0), len(self.counts) - 1)] += count
+
+    def merge(self, other: "ScoreHistogram") -> "ScoreHistogram":
+        """Add another histogram's counts into this one"""
+        self.counts += other.counts
+        return self
+
+    def quantile(self, q: float) -> Optional[int]:
+        """Smallest score with at least a ``q`` fraction of scores at or below it"""
+        total = self.total
+        if not total:
+            return None
+        rank = max(math.ceil(q * total), 1)
+        return int(np.searchsorted(np.cumsum(self.counts), rank))
+
+    def mean(self) -> Optional[float]:
+        """Average score"""
+        total = self.total
+        if not total:
+            return None
+        return float(np.dot(self.counts, np.arange(len(self.counts)))) / total
+
+    def count_at_least(self, threshold: int) -> int:
+        """Number of scores at or above ``threshold``"""
+        return int(self.counts[max(threshold, 0):].sum())
+
+    def bins(self, width: int = 10) -> List[Dict[str, Any]]:
+        """Counts per bin of ``width`` consecutive scores"""
+        return [
+            {
+                "min_score": start,
+                "max_score": min(start + width, len(self.counts)) - 1,
+                "leads": int(self.counts[start:start + width].sum()),
+            }
+            for start in range(0, len(self.counts), width)
+        ]
+
+
+class HyperLogLog:
+    """HyperLogLog sketch estimating the number of distinct values added.
+
+    ``2 ** precision`` one-byte registers keep the longest run of leading zero
+    bits seen among hashes routed to them. Sketches of the same precision merge
+    by taking register-wise maxima, so per-day sketches combine into any
+    window. The relative standard error is about ``1.04 / sqrt(2 ** precision)``.
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, value: str) -> None:
+        """Add a value to the sketch"""
+        digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        rest_bits = 64 - self.precision
+        index = hashed >> rest_bits
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct values added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        """Serialize as a precision byte and the zlib-compressed registers"""
+        return bytes([self.precision]) + zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """Deserialize a sketch written by ``to_bytes``"""
+        sketch = cls(data[0])
+        sketch.registers = np.frombuffer(zlib.decompress(data[1:]), dtype=np.uint8).copy()
+        return sketch
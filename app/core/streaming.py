@@ -0,0 +1,97 @@
+"""Incremental parsing of streamed request bodies"""
+
+import codecs
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Tuple
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+# Upper bound on a single buffered record before the stream is declared malformed
+MAX_RECORD_CHARS = 1024 * 1024
+
+
+async def iter_json_records(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    """Yield ``(record, error)`` pairs from an NDJSON or JSON-array byte stream.
+
+    The format is sniffed from the first non-whitespace character: ``[`` means a
+    JSON array, anything else is treated as newline-delimited JSON. Only the
+    current chunk and at most one partial record are held in memory.
+
+    NDJSON lines that fail to parse are yielded as ``(None, error)`` so callers
+    can report them per row. A malformed JSON array cannot be resynchronised,
+    so it raises ``ValueError`` instead.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    mode: Optional[str] = None
+    finished = False
+
+    async for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        if mode is None:
+            stripped = buffer.lstrip(_WHITESPACE)
+            if not stripped:
+                continue
+            mode = "array" if stripped[0] == "[" else "ndjson"
+            buffer = stripped[1:] if mode == "array" else stripped
+
+        if mode == "ndjson":
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if line.strip():
+                    yield _parse_line(line)
+        elif not finished:
+            buffer, finished, records = _drain_array(buffer, final=False)
+            for record in records:
+                yield record, None
+
+    buffer += text_decoder.decode(b"", final=True)
+    if mode == "ndjson" and buffer.strip():
+        yield _parse_line(buffer)
+    elif mode == "array" and not finished:
+        buffer, finished, records = _drain_array(buffer, final=True)
+        for record in records:
+            yield record, None
+        if not finished:
+            raise ValueError("Unterminated JSON array")
+
+
+def _parse_line(line: str) -> Tuple[Any, Optional[str]]:
+    """Parse a single NDJSON line"""
+    try:
+        return json.loads(line), None
+    except json.JSONDecodeError as e:
+        return None, f"Invalid JSON: {e.msg}"
+
+
+def _drain_array(buffer: str, final: bool) -> Tuple[str, bool, list]:
+    """Decode every complete array element currently in ``buffer``.
+
+    Returns the unconsumed remainder, whether the closing bracket was seen and
+    the decoded elements.
+    """
+    records = []
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+            pos += 1
+        if pos == len(buffer):
+            return "", False, records
+        if buffer[pos] == "]":
+            return "", True, records
+        try:
+            record, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # A truncated element is only an error once no more data will arrive,
+            # or once it has grown past anything a single record could need
+            if final or len(buffer) - pos > MAX_RECORD_CHARS:
+                raise ValueError(f"Invalid JSON array: {e.msg}") from e
+            return buffer[pos:], False, records
+        # A bare number at the end of a chunk may still be growing
+        if end == len(buffer) and not final and not isinstance(record, (dict, list)):
+            return buffer[pos:], False, records
+        records.append(record)
+        pos = end
@@ -1,6 +1,6 @@
 """Salesforce CRM integration"""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from simple_salesforce import Salesforce
 
 from app.core.config import settings
@@ -20,7 +20,7 @@ class SalesforceIntegration:
             security_token=settings.SALESFORCE_SECURITY_TOKEN,
         )
 
-    async def sync_lead(self, lead: Lead) -> Dict[str, Any]:
+    async def sync_lead(self, lead: Lead, company_name: Optional[str] = None) -> Dict[str, Any]:
         """Sync lead to Salesforce"""
         try:
             # Prepare lead data
@@ -30,7 +30,7 @@ class SalesforceIntegration:
                 "LastName": lead.last_name or "Unknown",  # LastName is required
                 "Phone": lead.phone,
                 "Title": lead.job_title,
-                "Company": lead.company.name if lead.company else "Unknown",
+                "Company": company_name or "Unknown",
                 "Status": self._map_lead_status(lead.status),
                 "LeadSource": self._map_lead_source(lead.source),
                 "Rating": self._calculate_rating(lead.lead_score),
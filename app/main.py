@@ -7,6 +7,10 @@ from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.core.database import engine, Base
 from app.api import leads, enrichment, webhooks, analytics
+from app.services.lead_buffer import lead_write_buffer
+from app.services.lead_cache import lead_cache
+from app.services.lead_purger import lead_purger
+from app.services.score_rescorer import stale_score_rescorer
 
 
 @asynccontextmanager
@@ -15,8 +19,15 @@ async def lifespan(app: FastAPI):
     # Startup
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    lead_cache.start()
+    if settings.RESCORE_ON_STARTUP:
+        stale_score_rescorer.start()
     yield
     # Shutdown
+    await lead_cache.stop()
+    await stale_score_rescorer.stop()
+    await lead_purger.stop()
+    await lead_write_buffer.close()
     await engine.dispose()
 
 
@@ -34,6 +45,7 @@ app.add_middleware(
     allow_credentials=not settings.CORS_ALLOW_ALL,  # Can't use credentials with allow_origins=*
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include routers
@@ -3,5 +3,25 @@
 from app.models.lead import Lead
 from app.models.company import Company
 from app.models.activity import Activity
+from app.models.scoring_job import ScoringJob
+from app.models.lead_daily_stats import LeadDailyStats
+from app.models.campaign_daily_stats import CampaignDailyStats
+from app.models.lead_status_change import LeadStatusChange
+from app.models.lead_score_daily_stats import LeadScoreDailyStats
+from app.models.visitor_daily_sketch import VisitorDailySketch
+from app.models.lead_search_document import LeadSearchDocument
+from app.models.lead_deletion import LeadDeletion
 
-__all__ = ["Lead", "Company", "Activity"]
+__all__ = [
+    "Lead",
+    "Company",
+    "Activity",
+    "ScoringJob",
+    "LeadDailyStats",
+    "CampaignDailyStats",
+    "LeadStatusChange",
+    "LeadScoreDailyStats",
+    "VisitorDailySketch",
+    "LeadSearchDocument",
+    "LeadDeletion",
+]
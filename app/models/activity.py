@@ -29,7 +29,9 @@ class Activity(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # Foreign Key
-    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False, index=True)
+    lead_id = Column(
+        Integer, ForeignKey("leads.id", ondelete="CASCADE"), nullable=False, index=True
+    )
 
     # Activity Details
     activity_type = Column(Enum(ActivityType), nullable=False)
@@ -37,7 +39,7 @@ class Activity(Base):
     description = Column(Text)
 
     # Metadata
-    metadata = Column(Text)  # JSON string for additional data
+    extra_data = Column("metadata", Text)  # JSON string for additional data
     user_agent = Column(String(500))
     ip_address = Column(String(50))
 
@@ -49,3 +51,4 @@ class Activity(Base):
 
     def __repr__(self):
         return f"<Activity {self.activity_type} for Lead {self.lead_id}>"
+
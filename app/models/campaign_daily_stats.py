@@ -0,0 +1,41 @@
+"""Daily campaign and UTM rollup database model"""
+
+from sqlalchemy import Column, Integer, BigInteger, String, Date
+
+from app.core.database import Base
+
+# Lead columns the campaign rollup breaks leads down by
+CAMPAIGN_DIMENSIONS = ("campaign", "utm_source", "utm_medium", "utm_campaign")
+
+
+class CampaignDailyStats(Base):
+    __tablename__ = "campaign_daily_stats"
+
+    # Rollup key: one row per day and value of each dimension column
+    dimension = Column(String(20), primary_key=True)  # One of CAMPAIGN_DIMENSIONS
+    day = Column(Date, primary_key=True)
+    value = Column(String(200), primary_key=True)
+
+    # Aggregates
+    leads = Column(Integer, default=0, nullable=False)
+    qualified_leads = Column(Integer, default=0, nullable=False)
+    converted_leads = Column(Integer, default=0, nullable=False)
+    score_sum = Column(BigInteger, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<CampaignDailyStats {self.day} {self.dimension}={self.value}>"
+
+
+def campaign_rollup_rows_sql(relation: str, sign: int = 1) -> str:
+    """SELECT of the rollup key and signed aggregates per lead and dimension value"""
+    dimensions = ", ".join(f"('{name}', l.{name})" for name in CAMPAIGN_DIMENSIONS)
+    return f"""
+        SELECT
+            d.dimension, (l.created_at)::date AS day, d.value, {sign} AS leads,
+            {sign} * (coalesce(l.is_qualified, false))::int AS qualified_leads,
+            {sign} * (l.status = 'CONVERTED')::int AS converted_leads,
+            {sign} * coalesce(l.lead_score, 0)::bigint AS score_sum
+        FROM {relation} l
+        CROSS JOIN LATERAL (VALUES {dimensions}) AS d (dimension, value)
+        WHERE d.value IS NOT NULL AND d.value <> ''
+    """
@@ -1,10 +1,14 @@
 """Lead database model"""
 
 from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, Text, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Index, event, func, literal_column, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, relationship
 from datetime import datetime
+from itertools import chain
 import enum
 
+from app.core.cache import lead_generation
 from app.core.database import Base
 
 
@@ -31,6 +35,19 @@ class LeadSource(str, enum.Enum):
 
 class Lead(Base):
     __tablename__ = "leads"
+    __table_args__ = (
+        # Keyset pagination order, scanned backwards for newest first
+        Index("ix_leads_created_at_id", "created_at", "id"),
+        # Lead search: equality filters followed by the newest-first order
+        Index("ix_leads_status_created_at", "status", "created_at", "id"),
+        Index("ix_leads_source_created_at", "source", "created_at", "id"),
+        Index("ix_leads_campaign_created_at", "campaign", "created_at", "id"),
+        Index("ix_leads_company_created_at", "company_id", "created_at", "id"),
+        Index("ix_leads_lead_score", "lead_score", "id"),
+        Index(
+            "ix_leads_qualified_score", "lead_score", "id", postgresql_where=text("is_qualified")
+        ),
+    )
 
     # Primary Key
     id = Column(Integer, primary_key=True, index=True)
@@ -55,6 +72,10 @@ class Lead(Base):
     lead_score = Column(Integer, default=0)
     is_qualified = Column(Boolean, default=False)
     qualification_notes = Column(Text)
+    score_version = Column(Integer)  # Version of the scoring rules behind lead_score
+    score_rules_hash = Column(String(16))  # Fingerprint of those rules
+    engagement_score = Column(Float, default=0)  # Activity engagement, decayed lazily
+    engagement_updated_at = Column(DateTime)  # When engagement_score was last brought current
 
     # Enrichment Data
     linkedin_url = Column(String(500))
@@ -76,7 +97,7 @@ class Lead(Base):
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     last_contacted_at = Column(DateTime)
 
     # Additional metadata
@@ -84,7 +105,51 @@ class Lead(Base):
     tags = Column(String(500))  # Comma-separated tags
 
     # Relationships
-    activities = relationship("Activity", back_populates="lead", cascade="all, delete-orphan")
+    # Deleting a lead cascades in the database; activities are never loaded for it
+    activities = relationship(
+        "Activity", back_populates="lead", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<Lead {self.email} - {self.status}>"
+
+
+def tag_list(tags):
+    """Lower-cased tag array of a comma-separated tags column, as indexed for search"""
+    return func.regexp_split_to_array(
+        func.lower(func.trim(tags)), literal_column(r"'\s*,\s*'"), type_=ARRAY(Text)
+    )
+
+
+Index("ix_leads_tag_list", tag_list(Lead.tags), postgresql_using="gin")
+
+
+# Bump lead_generation when a transaction that wrote leads commits, so caches
+# versioned by it stop serving results computed before the write.
+@event.listens_for(Session, "after_flush")
+def _track_flushed_leads(session, flush_context):
+    if any(
+        isinstance(instance, Lead)
+        for instance in chain(session.new, session.dirty, session.deleted)
+    ):
+        session.info["leads_written"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_lead_statements(orm_execute_state):
+    statement = orm_execute_state.statement
+    if (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ) and getattr(statement.table, "name", None) == Lead.__tablename__:
+        orm_execute_state.session.info["leads_written"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_lead_generation(session):
+    if session.info.pop("leads_written", False):
+        lead_generation.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_lead_writes(session):
+    session.info.pop("leads_written", None)
@@ -0,0 +1,176 @@
+"""Daily lead rollup database model"""
+
+from dataclasses import dataclass
+from typing import Callable, Tuple
+
+from sqlalchemy import Column, Integer, BigInteger, String, Date, Enum, DDL, event
+
+from app.core.database import Base
+from app.models.campaign_daily_stats import campaign_rollup_rows_sql
+from app.models.lead import Lead, LeadSource, LeadStatus
+from app.models.lead_score_daily_stats import score_rollup_rows_sql
+
+
+class LeadDailyStats(Base):
+    __tablename__ = "lead_daily_stats"
+
+    # Rollup key; leads without a campaign roll up under ""
+    day = Column(Date, primary_key=True)
+    source = Column(Enum(LeadSource), primary_key=True)
+    campaign = Column(String(200), primary_key=True, default="")
+    status = Column(Enum(LeadStatus), primary_key=True)
+
+    # Aggregates
+    leads = Column(Integer, default=0, nullable=False)
+    qualified_leads = Column(Integer, default=0, nullable=False)
+    score_sum = Column(BigInteger, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<LeadDailyStats {self.day} {self.source} {self.campaign} {self.status}>"
+
+
+def rollup_rows_sql(relation: str, sign: int = 1) -> str:
+    """SELECT of the rollup key and signed aggregates of each lead in ``relation``"""
+    return f"""
+        SELECT
+            (l.created_at)::date AS day, l.source, coalesce(l.campaign, '') AS campaign,
+            l.status, {sign} AS leads,
+            {sign} * (coalesce(l.is_qualified, false))::int AS qualified_leads,
+            {sign} * coalesce(l.lead_score, 0)::bigint AS score_sum
+        FROM {relation} l
+    """
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """A rollup table of summed lead aggregates, maintained from leads"""
+
+    table: str
+    keys: Tuple[str, ...]
+    values: Tuple[str, ...]
+    rows_sql: Callable[..., str]  # (relation, sign) -> SELECT of keys and values per lead
+
+    def aggregate_sql(self, *row_selects: str, net_changes_only: bool = False) -> str:
+        """INSERT ... SELECT summing rollup rows per key, in key order.
+
+        Upserts lock existing rollup rows in the order they are inserted, so
+        sorting by key makes concurrent multi-row writers lock shared keys in
+        the same order instead of deadlocking.
+        """
+        keys = ", ".join(self.keys)
+        sums = ", ".join(f"sum({name})" for name in self.values)
+        having = (
+            " HAVING " + " OR ".join(f"sum({name}) <> 0" for name in self.values)
+            if net_changes_only
+            else ""
+        )
+        return f"""
+            INSERT INTO {self.table} AS s ({keys}, {", ".join(self.values)})
+            SELECT {keys}, {sums}
+            FROM ({" UNION ALL ".join(row_selects)}) rows
+            GROUP BY {keys}{having}
+            ORDER BY {keys}
+        """
+
+    def apply_delta_sql(self, *row_selects: str) -> str:
+        """Upsert the net change of some signed rollup rows"""
+        updates = ", ".join(f"{name} = s.{name} + EXCLUDED.{name}" for name in self.values)
+        return (
+            self.aggregate_sql(*row_selects, net_changes_only=True)
+            + f" ON CONFLICT ({', '.join(self.keys)}) DO UPDATE SET {updates}"
+        )
+
+    def rebuild_sql(self, since: bool = False) -> Tuple[str, str]:
+        """DELETE and INSERT recomputing the rollup, or its days from a :since bind"""
+        if not since:
+            return f"DELETE FROM {self.table}", self.aggregate_sql(self.rows_sql("leads"))
+        leads = "(SELECT * FROM leads WHERE created_at >= :since)"
+        return (
+            f"DELETE FROM {self.table} WHERE day >= :since",
+            self.aggregate_sql(self.rows_sql(leads)),
+        )
+
+
+ROLLUPS = (
+    Rollup(
+        "lead_daily_stats",
+        keys=("day", "source", "campaign", "status"),
+        values=("leads", "qualified_leads", "score_sum"),
+        rows_sql=rollup_rows_sql,
+    ),
+    Rollup(
+        "campaign_daily_stats",
+        keys=("dimension", "day", "value"),
+        values=("leads", "qualified_leads", "converted_leads", "score_sum"),
+        rows_sql=campaign_rollup_rows_sql,
+    ),
+    Rollup(
+        "lead_score_daily_stats",
+        keys=("day", "source", "campaign", "score"),
+        values=("leads",),
+        rows_sql=score_rollup_rows_sql,
+    ),
+)
+
+
+def _apply_deltas_sql(inserted: bool, deleted: bool) -> str:
+    """Statements applying a trigger's transition tables to every rollup"""
+    statements = []
+    for rollup in ROLLUPS:
+        rows = []
+        if inserted:
+            rows.append(rollup.rows_sql("new_rows"))
+        if deleted:
+            rows.append(rollup.rows_sql("old_rows", -1))
+        statements.append(rollup.apply_delta_sql(*rows) + ";")
+    return "\n".join(statements)
+
+
+# Statement-level triggers apply the net change of every INSERT, UPDATE and
+# DELETE on leads to the rollups inside the writing transaction, whichever code
+# path (ORM, bulk statements, COPY import) issued it. Transition tables let one
+# upsert per touched rollup key cover a whole multi-row statement.
+#
+# Each upsert holds its rollup row locks until the writing transaction commits,
+# so concurrent writes to leads sharing a day, source and campaign serialize on
+# those rows. Writers keep that window short by committing straight after the
+# write, and high-rate capture goes through the webhook write buffer, whose
+# batched INSERT collapses a burst of leads into one upsert per key.
+ROLLUP_TRIGGER_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION lead_daily_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_apply_deltas_sql(inserted=True, deleted=False)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_apply_deltas_sql(inserted=False, deleted=True)}
+        ELSE
+            {_apply_deltas_sql(inserted=True, deleted=True)}
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS leads_rollup_insert ON leads",
+    "DROP TRIGGER IF EXISTS leads_rollup_update ON leads",
+    "DROP TRIGGER IF EXISTS leads_rollup_delete ON leads",
+    """
+    CREATE TRIGGER leads_rollup_insert AFTER INSERT ON leads
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lead_daily_stats_apply()
+    """,
+    """
+    CREATE TRIGGER leads_rollup_update AFTER UPDATE ON leads
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lead_daily_stats_apply()
+    """,
+    """
+    CREATE TRIGGER leads_rollup_delete AFTER DELETE ON leads
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lead_daily_stats_apply()
+    """,
+]
+
+# Install the triggers whenever the leads table is created
+for statement in ROLLUP_TRIGGER_DDL:
+    event.listen(Lead.__table__, "after_create", DDL(statement))
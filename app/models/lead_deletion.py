@@ -0,0 +1,53 @@
+"""Deleted lead log database model"""
+
+from datetime import timedelta
+
+from sqlalchemy import Column, Integer, DateTime, DDL, event
+
+from app.core.database import Base
+from app.models.lead import Lead
+
+# How long deletions stay in the log; readers further behind must reload
+DELETION_LOG_RETENTION = timedelta(hours=24)
+
+
+class LeadDeletion(Base):
+    __tablename__ = "lead_deletions"
+
+    # Lead ids are never reused, so a deleted id appears once
+    lead_id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<LeadDeletion {self.lead_id} at {self.deleted_at}>"
+
+
+# Deleted leads are logged by a statement-level trigger on leads, whichever code
+# path (API, batched purge, manual SQL) deleted them, so readers keeping copies
+# of leads can drop exactly those. Each delete also prunes entries past the
+# retention, which the deleted_at index keeps cheap.
+LEAD_DELETION_TRIGGER_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION lead_deletion_log() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM lead_deletions
+        WHERE deleted_at < timezone('utc', statement_timestamp())
+            - interval '{int(DELETION_LOG_RETENTION.total_seconds())} seconds';
+        INSERT INTO lead_deletions (lead_id, deleted_at)
+        SELECT o.id, timezone('utc', statement_timestamp()) FROM old_rows o
+        ON CONFLICT (lead_id) DO NOTHING;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS leads_deletion_log ON leads",
+    """
+    CREATE TRIGGER leads_deletion_log AFTER DELETE ON leads
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lead_deletion_log()
+    """,
+]
+
+# Install the trigger whenever the leads table is created
+for statement in LEAD_DELETION_TRIGGER_DDL:
+    event.listen(Lead.__table__, "after_create", DDL(statement))
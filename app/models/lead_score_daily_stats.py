@@ -0,0 +1,33 @@
+"""Daily lead score histogram database model"""
+
+from sqlalchemy import Column, Integer, SmallInteger, String, Date, Enum
+
+from app.core.database import Base
+from app.models.lead import LeadSource
+
+
+class LeadScoreDailyStats(Base):
+    __tablename__ = "lead_score_daily_stats"
+
+    # Rollup key: one row per day, source, campaign and score value, so each
+    # (day, source, campaign) holds a histogram of the scores of its leads
+    day = Column(Date, primary_key=True)
+    source = Column(Enum(LeadSource), primary_key=True)
+    campaign = Column(String(200), primary_key=True, default="")
+    score = Column(SmallInteger, primary_key=True)  # Clamped to 0-100
+
+    # Aggregates
+    leads = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<LeadScoreDailyStats {self.day} {self.source} {self.campaign} {self.score}>"
+
+
+def score_rollup_rows_sql(relation: str, sign: int = 1) -> str:
+    """SELECT of the rollup key and signed lead count of each lead in ``relation``"""
+    return f"""
+        SELECT
+            (l.created_at)::date AS day, l.source, coalesce(l.campaign, '') AS campaign,
+            least(greatest(coalesce(l.lead_score, 0), 0), 100) AS score, {sign} AS leads
+        FROM {relation} l
+    """
@@ -0,0 +1,116 @@
+"""Lead fuzzy search document database model"""
+
+from sqlalchemy import Column, Integer, Text, ForeignKey, DDL, event
+
+from app.core.database import Base
+
+
+class LeadSearchDocument(Base):
+    __tablename__ = "lead_search_documents"
+
+    # One document per lead: its name, email and job title and its company's
+    # name and domain, trigram-indexed for typo-tolerant search
+    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="CASCADE"), primary_key=True)
+    document = Column(Text, nullable=False)
+
+    def __repr__(self):
+        return f"<LeadSearchDocument {self.lead_id}>"
+
+
+# The trigram index needs the pg_trgm extension (part of PostgreSQL contrib). It
+# is installed where available; without it the documents are still maintained
+# and fuzzy search reports itself unavailable. The index is GiST rather than GIN
+# because GiST can also return documents in word similarity distance order, so
+# a ranked search stops after its LIMIT instead of ranking every match.
+SEARCH_INDEX_NAME = "ix_lead_search_documents_trgm_gist"
+SEARCH_INDEX_DDL = f"""
+    DO $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME}
+                ON lead_search_documents USING gist (document gist_trgm_ops);
+        END IF;
+    END
+    $$
+"""
+
+# Documents are kept current by triggers, inside the statement that writes a
+# lead or renames a company, so no write path can leave the index stale. New
+# leads are indexed per statement from the transition table; lead and company
+# updates by row triggers that only fire when a searched column changes.
+SEARCH_DOCUMENT_TRIGGER_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION lead_search_document(
+        first_name text, last_name text, email text, job_title text,
+        company_name text, company_domain text
+    ) RETURNS text AS $$
+        SELECT concat_ws(' ', first_name, last_name, email, job_title, company_name, company_domain)
+    $$ LANGUAGE sql IMMUTABLE
+    """,
+    """
+    CREATE OR REPLACE FUNCTION lead_search_index_insert() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO lead_search_documents (lead_id, document)
+        SELECT n.id, lead_search_document(
+            n.first_name, n.last_name, n.email, n.job_title, c.name, c.domain
+        )
+        FROM new_rows n LEFT JOIN companies c ON c.id = n.company_id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION lead_search_index_update() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO lead_search_documents (lead_id, document)
+        SELECT NEW.id, lead_search_document(
+            NEW.first_name, NEW.last_name, NEW.email, NEW.job_title, c.name, c.domain
+        )
+        FROM (SELECT 1) one LEFT JOIN companies c ON c.id = NEW.company_id
+        ON CONFLICT (lead_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION company_search_index_update() RETURNS trigger AS $$
+    BEGIN
+        UPDATE lead_search_documents d
+        SET document = lead_search_document(
+            l.first_name, l.last_name, l.email, l.job_title, NEW.name, NEW.domain
+        )
+        FROM leads l
+        WHERE l.company_id = NEW.id AND d.lead_id = l.id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS leads_search_index_insert ON leads",
+    "DROP TRIGGER IF EXISTS leads_search_index_update ON leads",
+    "DROP TRIGGER IF EXISTS companies_search_index_update ON companies",
+    """
+    CREATE TRIGGER leads_search_index_insert AFTER INSERT ON leads
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lead_search_index_insert()
+    """,
+    """
+    CREATE TRIGGER leads_search_index_update
+    AFTER UPDATE OF first_name, last_name, email, job_title, company_id ON leads
+    FOR EACH ROW WHEN (
+        (OLD.first_name, OLD.last_name, OLD.email, OLD.job_title, OLD.company_id)
+        IS DISTINCT FROM (NEW.first_name, NEW.last_name, NEW.email, NEW.job_title, NEW.company_id)
+    )
+    EXECUTE FUNCTION lead_search_index_update()
+    """,
+    """
+    CREATE TRIGGER companies_search_index_update AFTER UPDATE OF name, domain ON companies
+    FOR EACH ROW WHEN ((OLD.name, OLD.domain) IS DISTINCT FROM (NEW.name, NEW.domain))
+    EXECUTE FUNCTION company_search_index_update()
+    """,
+]
+
+# Install the index and triggers whenever the documents table is created; it is
+# created after leads and companies, which it depends on
+for statement in [SEARCH_INDEX_DDL, *SEARCH_DOCUMENT_TRIGGER_DDL]:
+    event.listen(LeadSearchDocument.__table__, "after_create", DDL(statement))
@@ -0,0 +1,68 @@
+"""Lead status transition log database model"""
+
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey, Index, Enum, DDL, event
+
+from app.core.database import Base
+from app.models.lead import Lead, LeadStatus
+
+
+class LeadStatusChange(Base):
+    __tablename__ = "lead_status_changes"
+    __table_args__ = (Index("ix_lead_status_changes_lead_changed", "lead_id", "changed_at"),)
+
+    # Primary Key
+    id = Column(BigInteger, primary_key=True)
+
+    # Transition; from_status is NULL for the status a lead was created with
+    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="CASCADE"), nullable=False)
+    from_status = Column(Enum(LeadStatus))
+    to_status = Column(Enum(LeadStatus), nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<LeadStatusChange {self.lead_id} {self.from_status} -> {self.to_status}>"
+
+
+# The log is appended by triggers on leads, inside the statement that creates a
+# lead or changes its status, so no write path can skip it. Inserts are logged
+# per statement from the transition table; status changes by a row trigger that
+# only fires when the status actually moves, so score and enrichment updates
+# pay nothing for it.
+STATUS_LOG_TRIGGER_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION lead_status_log_insert() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO lead_status_changes (lead_id, from_status, to_status, changed_at)
+        SELECT n.id, NULL, n.status,
+               coalesce(n.created_at, timezone('utc', statement_timestamp()))
+        FROM new_rows n;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION lead_status_log_update() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO lead_status_changes (lead_id, from_status, to_status, changed_at)
+        VALUES (NEW.id, OLD.status, NEW.status, timezone('utc', statement_timestamp()));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS leads_status_log_insert ON leads",
+    "DROP TRIGGER IF EXISTS leads_status_log_update ON leads",
+    """
+    CREATE TRIGGER leads_status_log_insert AFTER INSERT ON leads
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION lead_status_log_insert()
+    """,
+    """
+    CREATE TRIGGER leads_status_log_update AFTER UPDATE OF status ON leads
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION lead_status_log_update()
+    """,
+]
+
+# Install the triggers whenever the leads table is created
+for statement in STATUS_LOG_TRIGGER_DDL:
+    event.listen(Lead.__table__, "after_create", DDL(statement))
@@ -0,0 +1,42 @@
+"""Scoring job database model"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Enum
+from datetime import datetime
+import enum
+
+from app.core.database import Base
+
+
+class ScoringJobStatus(str, enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SUPERSEDED = "superseded"
+
+
+class ScoringJob(Base):
+    __tablename__ = "scoring_jobs"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Rule set the job rescores leads to
+    rules_version = Column(Integer)
+    rules_hash = Column(String(16), nullable=False, index=True)
+
+    # Progress
+    status = Column(Enum(ScoringJobStatus), default=ScoringJobStatus.RUNNING, nullable=False)
+    last_lead_id = Column(Integer, default=0, nullable=False)  # Keyset cursor
+    total_leads = Column(Integer, default=0, nullable=False)  # Stale leads when created
+    processed = Column(Integer, default=0, nullable=False)
+    changed = Column(Integer, default=0, nullable=False)  # Leads whose score moved
+    active_seconds = Column(Float, default=0, nullable=False)  # Time spent in chunks
+    error = Column(Text)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<ScoringJob {self.rules_hash} - {self.status}>"
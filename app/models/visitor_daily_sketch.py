@@ -0,0 +1,23 @@
+"""Daily unique-visitor sketch database model"""
+
+from sqlalchemy import Column, Integer, String, Date, Enum, LargeBinary
+
+from app.core.database import Base
+from app.models.lead import LeadSource
+
+
+class VisitorDailySketch(Base):
+    __tablename__ = "visitor_daily_sketches"
+
+    # Sketch key; activities of leads without a campaign roll up under ""
+    day = Column(Date, primary_key=True)
+    source = Column(Enum(LeadSource), primary_key=True)  # landing_page for landing pages
+    campaign = Column(String(200), primary_key=True, default="")  # Campaign or page name
+
+    # Serialized HyperLogLog sketches of IP addresses and of (IP, user agent) pairs
+    visitors = Column(LargeBinary, nullable=False)
+    devices = Column(LargeBinary, nullable=False)
+    activities = Column(Integer, default=0, nullable=False)  # Activities with an IP address
+
+    def __repr__(self):
+        return f"<VisitorDailySketch {self.day} {self.source} {self.campaign}>"
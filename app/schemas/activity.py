@@ -0,0 +1,30 @@
+"""Activity Pydantic schemas"""
+
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+from app.models.activity import ActivityType
+
+
+class ActivityCreate(BaseModel):
+    """Schema for recording a lead activity"""
+    activity_type: ActivityType
+    title: Optional[str] = None
+    description: Optional[str] = None
+    ip_address: Optional[str] = None  # Counted towards unique visitors
+    user_agent: Optional[str] = None
+    created_at: Optional[datetime] = None  # Defaults to now
+
+
+class ActivityResponse(BaseModel):
+    """Schema for activity response"""
+    id: int
+    lead_id: int
+    activity_type: ActivityType
+    title: Optional[str] = None
+    description: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,7 @@
 """Lead Pydantic schemas"""
 
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 from app.models.lead import LeadStatus, LeadSource
@@ -59,3 +59,140 @@ class LeadResponse(LeadBase):
 
     class Config:
         from_attributes = True
+
+
+# Fields a lead list can be projected to with ``fields=``
+LEAD_RESPONSE_FIELDS = tuple(LeadResponse.model_fields)
+
+
+class LeadStatusChangeResponse(BaseModel):
+    """Schema for a lead status transition"""
+    from_status: Optional[LeadStatus] = None
+    to_status: LeadStatus
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class LeadSearchFilters(BaseModel):
+    """Schema for lead search filters; unset filters match every lead"""
+    statuses: Optional[List[LeadStatus]] = None
+    sources: Optional[List[LeadSource]] = None
+    campaign: Optional[str] = None
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+    qualified: Optional[bool] = None
+    tags: Optional[List[str]] = None  # Leads carrying every listed tag
+    company_id: Optional[int] = None
+    company_domain: Optional[str] = None
+    has_company: Optional[bool] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    updated_from: Optional[datetime] = None
+    updated_to: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> "LeadSearchFilters":
+        for low, high in (
+            ("min_score", "max_score"),
+            ("created_from", "created_to"),
+            ("updated_from", "updated_to"),
+        ):
+            low_value, high_value = getattr(self, low), getattr(self, high)
+            if low_value is not None and high_value is not None and low_value > high_value:
+                raise ValueError(f"{low} must not be greater than {high}")
+        return self
+
+
+class LeadSearchResponse(BaseModel):
+    """Schema for a page of lead search results"""
+    leads: List[LeadResponse]
+    next_cursor: Optional[str] = None
+    query_plan: Optional[Dict[str, Any]] = None  # EXPLAIN diagnostics, in debug mode only
+
+
+class LeadMatch(LeadResponse):
+    """Schema for a fuzzy search result"""
+    rank: float  # Trigram word similarity of the query to the lead, 0 to 1
+
+
+class LeadMatchResponse(BaseModel):
+    """Schema for a page of fuzzy search results, best match first"""
+    leads: List[LeadMatch]
+    next_cursor: Optional[str] = None
+
+
+class BulkLeadChanges(BaseModel):
+    """Schema for the fields a bulk update sets; unset fields are left alone"""
+    status: Optional[LeadStatus] = None
+    tags: Optional[str] = None
+    is_qualified: Optional[bool] = None
+    campaign: Optional[str] = None
+
+
+class BulkLeadUpdate(BaseModel):
+    """Schema for a bulk update of the leads selected by id, by filters or both"""
+    lead_ids: Optional[List[int]] = Field(None, max_length=100_000)
+    filters: Optional[LeadSearchFilters] = None
+    changes: BulkLeadChanges
+    dry_run: bool = False  # Count what would change without writing
+
+    @model_validator(mode="after")
+    def check_update(self) -> "BulkLeadUpdate":
+        if self.lead_ids is None and (
+            self.filters is None or not self.filters.model_dump(exclude_none=True)
+        ):
+            raise ValueError("Select leads with lead_ids or at least one filter")
+        changes = self.changes.model_dump(exclude_unset=True)
+        if not changes:
+            raise ValueError("No changes given")
+        for field in ("status", "is_qualified"):
+            if field in changes and changes[field] is None:
+                raise ValueError(f"{field} cannot be cleared")
+        return self
+
+
+class BulkLeadUpdateResponse(BaseModel):
+    """Schema for bulk update results"""
+    matched: int  # Leads selected
+    updated: int  # Selected leads that differed from the changes, written unless a dry run
+    status_changes: int  # Updated leads whose status moved, each logged as an activity
+    dry_run: bool
+
+
+class LeadPurgeRequest(BaseModel):
+    """Schema for a purge of the leads matching every given criterion"""
+    lead_ids: Optional[List[int]] = Field(None, max_length=100_000)
+    emails: Optional[List[str]] = Field(None, max_length=100_000)  # Erasure requests
+    filters: Optional[LeadSearchFilters] = None
+    older_than_days: Optional[int] = Field(None, ge=1)  # Retention: created before this age
+    dry_run: bool = False  # Count the matching leads without deleting
+
+    @model_validator(mode="after")
+    def check_criteria(self) -> "LeadPurgeRequest":
+        if (
+            self.lead_ids is None
+            and self.emails is None
+            and self.older_than_days is None
+            and (self.filters is None or not self.filters.model_dump(exclude_none=True))
+        ):
+            raise ValueError("Give lead_ids, emails, filters or older_than_days to purge")
+        return self
+
+
+class BulkLeadError(BaseModel):
+    """Schema for a rejected row in a bulk ingestion"""
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class BulkLeadResponse(BaseModel):
+    """Schema for bulk ingestion results"""
+    received: int = 0
+    accepted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[BulkLeadError] = []
+    errors_truncated: bool = False
@@ -0,0 +1,173 @@
+"""Activity tracking and engagement scoring service"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func, select, update
+from sqlalchemy.sql.elements import ColumnElement
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import time
+
+from app.core.config import settings
+from app.models.activity import Activity, ActivityType
+from app.models.lead import Lead
+from app.services.lead_cache import lead_cache
+from app.services.scoring_service import SCORING_COLUMNS, shared_scoring_service
+from app.services.visitor_service import VisitorService
+
+# Decayed engagement below this is cleared, so idle leads drop out of the nightly pass
+ENGAGEMENT_EPSILON = 0.01
+
+
+class ActivityService:
+    """Service for lead activities and the engagement they add to scores"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.scoring_service = shared_scoring_service
+
+    async def record_activity(
+        self, lead_id: int, activity_type: ActivityType, **activity_values: Any
+    ) -> Optional[Activity]:
+        """Log an activity and fold it into the lead's engagement score.
+
+        The running engagement score, lead score and qualification are updated
+        from the lead's stored values in a single UPDATE, never by scanning its
+        activity history. Activities with an IP address also count towards
+        unique visitors. A timezone-aware ``created_at`` is converted to naive
+        UTC, as every timestamp column stores it.
+        """
+        at = activity_values.pop("created_at", None) or datetime.utcnow()
+        if at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        weight = self.scoring_service.plan.activity_weight(activity_type)
+
+        if weight:
+            result = await self.db.execute(
+                self._engagement_update(weight, at)
+                .where(Lead.id == lead_id)
+                .returning(Lead.source, Lead.campaign)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            result = await self.db.execute(
+                select(Lead.source, Lead.campaign).where(Lead.id == lead_id)
+            )
+        lead = result.one_or_none()
+        if lead is None:
+            return None
+
+        activity = Activity(
+            lead_id=lead_id, activity_type=activity_type, created_at=at, **activity_values
+        )
+        self.db.add(activity)
+        await VisitorService(self.db).record_visits(
+            [
+                {
+                    **activity_values,
+                    "created_at": at,
+                    "source": lead.source,
+                    "campaign": lead.campaign,
+                }
+            ]
+        )
+        await self.db.commit()
+        if weight:
+            await lead_cache.invalidate([lead_id])
+        await self.db.refresh(activity)
+        return activity
+
+    async def get_engagement(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        """Get a lead's engagement score, decayed to now"""
+        result = await self.db.execute(
+            select(Lead.engagement_score, Lead.engagement_updated_at).where(Lead.id == lead_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        plan = self.scoring_service.plan
+        now = datetime.utcnow()
+        engagement = plan.decayed_engagement(row.engagement_score, row.engagement_updated_at, now)
+        return {
+            "lead_id": lead_id,
+            "engagement_score": round(engagement, 3),
+            "engagement_points": plan.engagement_points(engagement),
+            "as_of": now,
+        }
+
+    async def renormalize_engagement(self, chunk_size: int = 5000) -> Dict[str, Any]:
+        """Bring every engaged lead's stored score current (nightly).
+
+        Stored engagement is decayed to now and restamped, tiny remainders are
+        cleared, and lead scores and qualification are refreshed for the decay.
+        Leads are updated in id-ordered chunks, committing after each.
+        """
+        started = time.perf_counter()
+        plan = self.scoring_service.plan
+        now = datetime.utcnow()
+        decayed = plan.sql_decayed_engagement(
+            Lead.engagement_score, Lead.engagement_updated_at, now
+        )
+        engagement = case((decayed >= ENGAGEMENT_EPSILON, decayed), else_=0.0)
+        score = self._score_expression(engagement)
+
+        last_id = 0
+        processed = cleared = 0
+        while True:
+            chunk = (
+                select(Lead.id)
+                .where(Lead.id > last_id, Lead.engagement_score > 0)
+                .order_by(Lead.id)
+                .limit(chunk_size)
+                .scalar_subquery()
+            )
+            result = await self.db.execute(
+                update(Lead)
+                .where(Lead.id.in_(chunk))
+                .values(
+                    engagement_score=engagement,
+                    engagement_updated_at=case((decayed >= ENGAGEMENT_EPSILON, now), else_=None),
+                    lead_score=score,
+                    is_qualified=score >= settings.LEAD_SCORE_THRESHOLD,
+                    **self.scoring_service.version_values(),
+                )
+                .returning(Lead.id, Lead.engagement_score)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            await self.db.commit()
+            if not rows:
+                break
+            await lead_cache.invalidate(lead_id for lead_id, _ in rows)
+
+            last_id = max(lead_id for lead_id, _ in rows)
+            processed += len(rows)
+            cleared += sum(1 for _, value in rows if not value)
+
+        return {
+            "processed": processed,
+            "cleared": cleared,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def _engagement_update(self, weight: float, at: datetime):
+        """UPDATE adding ``weight`` engagement at ``at`` and rescoring the lead"""
+        plan = self.scoring_service.plan
+        as_of = func.greatest(func.coalesce(Lead.engagement_updated_at, at), at)
+        engagement = plan.sql_decayed_engagement(
+            Lead.engagement_score, Lead.engagement_updated_at, as_of
+        ) + plan.sql_decayed_engagement(weight, at, as_of)
+        score = self._score_expression(engagement)
+
+        return update(Lead).values(
+            engagement_score=engagement,
+            engagement_updated_at=as_of,
+            lead_score=score,
+            is_qualified=score >= settings.LEAD_SCORE_THRESHOLD,
+            **self.scoring_service.version_values(),
+        )
+
+    def _score_expression(self, engagement: ColumnElement) -> ColumnElement:
+        """A lead's score from its profile columns and an engagement expression"""
+        columns = {name: getattr(Lead, name) for name in SCORING_COLUMNS}
+        return self.scoring_service.score_expression({**columns, "engagement_score": engagement})
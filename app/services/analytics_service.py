@@ -1,11 +1,68 @@
 """Analytics and reporting service"""
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from sqlalchemy import select, func, text, case, exists, insert, null
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+import time
 
+from app.core.cache import TTLCache, lead_generation
+from app.core.config import settings
+from app.core.sketches import ScoreHistogram
 from app.models.lead import Lead, LeadStatus, LeadSource
+from app.models.campaign_daily_stats import CampaignDailyStats
+from app.models.lead_daily_stats import LeadDailyStats, ROLLUPS, ROLLUP_TRIGGER_DDL
+from app.models.lead_score_daily_stats import LeadScoreDailyStats
+from app.models.lead_status_change import LeadStatusChange, STATUS_LOG_TRIGGER_DDL
+from app.services.lead_snapshot import lead_snapshot
+
+
+class QueryStats:
+    """Running count and timing of a query"""
+
+    def __init__(self):
+        self.queries = 0
+        self.total_ms = 0.0
+        self.last_ms: Optional[float] = None
+
+    def record(self, duration_ms: float) -> None:
+        """Record one execution"""
+        self.queries += 1
+        self.total_ms += duration_ms
+        self.last_ms = duration_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Query count and timings in milliseconds"""
+        return {
+            "queries": self.queries,
+            "avg_query_ms": round(self.total_ms / self.queries, 2) if self.queries else None,
+            "last_query_ms": round(self.last_ms, 2) if self.last_ms is not None else None,
+        }
+
+
+# Dashboard results keyed by (days, lead_generation)
+dashboard_cache = TTLCache(
+    maxsize=settings.ANALYTICS_CACHE_SIZE, ttl=settings.ANALYTICS_CACHE_TTL_SECONDS
+)
+dashboard_query_stats = QueryStats()
+
+# Ranked campaign leaderboards keyed by (dimension, days, sort)
+leaderboard_cache = TTLCache(
+    maxsize=settings.ANALYTICS_CACHE_SIZE, ttl=settings.LEADERBOARD_CACHE_TTL_SECONDS
+)
+
+# Leaderboard windows in days, besides all time
+LEADERBOARD_WINDOWS = (7, 30, 90)
+
+# Columns conversion rates can be grouped by
+CONVERSION_GROUPS = {"source": Lead.source, "campaign": Lead.campaign}
+
+# Pipeline stages in funnel order; UNQUALIFIED and LOST are exits, not stages
+FUNNEL_STAGES = (LeadStatus.NEW, LeadStatus.CONTACTED, LeadStatus.QUALIFIED, LeadStatus.CONVERTED)
+
+# Funnel and velocity reports keyed by (report, days, group_by, day); each is
+# computed at most once a day unless refreshed
+pipeline_cache = TTLCache(maxsize=settings.ANALYTICS_CACHE_SIZE, ttl=24 * 60 * 60)
 
 
 class AnalyticsService:
@@ -15,34 +72,20 @@ class AnalyticsService:
         self.db = db
 
     async def get_dashboard_stats(self, start_date: datetime) -> Dict[str, Any]:
-        """Get dashboard statistics"""
-        # Total leads
-        total_leads_result = await self.db.execute(
-            select(func.count(Lead.id)).where(Lead.created_at >= start_date)
-        )
-        total_leads = total_leads_result.scalar()
-
-        # Qualified leads
-        qualified_leads_result = await self.db.execute(
-            select(func.count(Lead.id)).where(
-                and_(Lead.created_at >= start_date, Lead.is_qualified == True)
-            )
-        )
-        qualified_leads = qualified_leads_result.scalar()
-
-        # Converted leads
-        converted_leads_result = await self.db.execute(
-            select(func.count(Lead.id)).where(
-                and_(Lead.created_at >= start_date, Lead.status == LeadStatus.CONVERTED)
-            )
-        )
-        converted_leads = converted_leads_result.scalar()
-
-        # Average lead score
-        avg_score_result = await self.db.execute(
-            select(func.avg(Lead.lead_score)).where(Lead.created_at >= start_date)
+        """Get dashboard statistics from the daily rollup, counting whole days"""
+        stats = LeadDailyStats
+        result = await self.db.execute(
+            select(
+                func.coalesce(func.sum(stats.leads), 0).label("total_leads"),
+                func.coalesce(func.sum(stats.qualified_leads), 0).label("qualified_leads"),
+                func.coalesce(
+                    func.sum(stats.leads).filter(stats.status == LeadStatus.CONVERTED), 0
+                ).label("converted_leads"),
+                func.coalesce(func.sum(stats.score_sum), 0).label("score_sum"),
+            ).where(stats.day >= start_date.date())
         )
-        avg_score = avg_score_result.scalar() or 0
+        total_leads, qualified_leads, converted_leads, score_sum = result.one()
+        avg_score = float(score_sum) / total_leads if total_leads > 0 else 0
 
         return {
             "total_leads": total_leads,
@@ -57,30 +100,359 @@ class AnalyticsService:
             else 0,
         }
 
+    async def get_cached_dashboard_stats(self, days: int, fresh: bool = False) -> Dict[str, Any]:
+        """Get dashboard statistics for the last ``days`` days, cached per window.
+
+        Entries are versioned by ``lead_generation``, so lead writes made by this
+        process invalidate them at once; the TTL bounds staleness from other
+        writers. ``fresh`` skips the cache lookup and refreshes the entry.
+        """
+        key = (days, lead_generation.value)
+        if not fresh:
+            cached = dashboard_cache.get(key)
+            if cached is not None:
+                return cached
+
+        started = time.perf_counter()
+        stats = await self.get_dashboard_stats(datetime.now() - timedelta(days=days))
+        dashboard_query_stats.record((time.perf_counter() - started) * 1000)
+
+        dashboard_cache.set(key, stats)
+        return stats
+
     async def calculate_conversion_rate(
         self, start_date: datetime = None, end_date: datetime = None
     ) -> Dict[str, Any]:
         """Calculate conversion rates"""
-        query = select(Lead)
-        if start_date:
-            query = query.where(Lead.created_at >= start_date)
-        if end_date:
-            query = query.where(Lead.created_at <= end_date)
-
-        result = await self.db.execute(query)
-        leads = result.scalars().all()
+        query = select(
+            func.count(Lead.id),
+            func.count(Lead.id).filter(Lead.status == LeadStatus.CONVERTED),
+        )
+        query = self._within(query, start_date, end_date)
 
-        total = len(leads)
-        converted = sum(1 for lead in leads if lead.status == LeadStatus.CONVERTED)
+        total, converted = (await self.db.execute(query)).one()
 
         return {
             "total_leads": total,
             "converted_leads": converted,
             "conversion_rate": round((converted / total * 100), 2) if total > 0 else 0,
-            "period": {
-                "start": start_date.isoformat() if start_date else None,
-                "end": end_date.isoformat() if end_date else None,
-            },
+            "period": self._period(start_date, end_date),
+        }
+
+    async def get_conversion_series(
+        self,
+        bucket: Optional[str] = None,
+        group_by: Optional[str] = None,
+        start_date: datetime = None,
+        end_date: datetime = None,
+    ) -> Dict[str, Any]:
+        """Calculate conversion rates per time bucket and/or group in one query.
+
+        ``bucket`` is a ``date_trunc`` unit (day, week or month) applied to
+        ``created_at``; ``group_by`` is ``source`` or ``campaign``. Buckets with
+        no leads are omitted.
+        """
+        columns = []
+        if bucket:
+            columns.append(func.date_trunc(bucket, Lead.created_at).label("bucket"))
+        if group_by:
+            columns.append(CONVERSION_GROUPS[group_by].label("group"))
+
+        query = select(
+            *columns,
+            func.count(Lead.id).label("total_leads"),
+            func.count(Lead.id).filter(Lead.status == LeadStatus.CONVERTED).label("converted"),
+        )
+        query = self._within(query, start_date, end_date)
+        if columns:
+            query = query.group_by(*columns).order_by(*columns)
+
+        series = []
+        for row in await self.db.execute(query):
+            point = {}
+            if bucket:
+                point["bucket"] = row.bucket.isoformat()
+            if group_by:
+                point[group_by] = row.group
+            point.update(
+                {
+                    "total_leads": row.total_leads,
+                    "converted_leads": row.converted,
+                    "conversion_rate": round((row.converted / row.total_leads * 100), 2),
+                }
+            )
+            series.append(point)
+
+        return {
+            "bucket": bucket,
+            "group_by": group_by,
+            "period": self._period(start_date, end_date),
+            "series": series,
+        }
+
+    async def get_funnel(
+        self, days: int = 90, group_by: Optional[str] = None, fresh: bool = False
+    ) -> Dict[str, Any]:
+        """Stage-to-stage conversion of leads created in the last ``days`` days.
+
+        A lead counts towards every stage up to the furthest one in its status
+        history, so leads that skip a stage still pass through it.
+        """
+        return await self._cached_daily(
+            ("funnel", days, group_by), lambda: self._compute_funnel(days, group_by), fresh
+        )
+
+    async def get_velocity(
+        self, days: int = 90, group_by: Optional[str] = None, fresh: bool = False
+    ) -> Dict[str, Any]:
+        """Median and p90 time in each status of leads created in the last ``days`` days.
+
+        Time in a status runs from the transition into it to the next one;
+        leads still in a status are counted separately.
+        """
+        return await self._cached_daily(
+            ("velocity", days, group_by), lambda: self._compute_velocity(days, group_by), fresh
+        )
+
+    async def _compute_funnel(self, days: int, group_by: Optional[str]) -> Dict[str, Any]:
+        """Count the leads reaching each funnel stage, per group"""
+        changes = LeadStatusChange
+        group = [CONVERSION_GROUPS[group_by].label("group")] if group_by else []
+        stage_rank = case(
+            *((changes.to_status == stage, rank) for rank, stage in enumerate(FUNNEL_STAGES))
+        )
+        reached = (
+            select(*group, func.max(stage_rank).label("furthest"))
+            .join(Lead, Lead.id == changes.lead_id)
+            .where(Lead.created_at >= self._cohort_start(days))
+            .group_by(changes.lead_id, *group)
+            .subquery()
+        )
+        group = [reached.c.group] if group_by else []
+        query = select(
+            *group,
+            *(
+                func.count().filter(reached.c.furthest >= rank).label(stage.value)
+                for rank, stage in enumerate(FUNNEL_STAGES)
+            ),
+        )
+        if group:
+            query = query.group_by(*group).order_by(*group)
+
+        funnel = []
+        for row in await self.db.execute(query):
+            entry = {group_by: row.group} if group_by else {}
+            stages, previous = [], None
+            for stage in FUNNEL_STAGES:
+                leads = row._mapping[stage.value]
+                stages.append(
+                    {
+                        "stage": stage.value,
+                        "leads": leads,
+                        "conversion_rate": round(leads / previous * 100, 2)
+                        if previous
+                        else None,
+                    }
+                )
+                previous = leads
+            entry["stages"] = stages
+            if group_by is None or stages[0]["leads"]:
+                funnel.append(entry)
+
+        return {"days": days, "group_by": group_by, "funnel": funnel}
+
+    async def _compute_velocity(self, days: int, group_by: Optional[str]) -> Dict[str, Any]:
+        """Time-in-status percentiles from the transition log, per group"""
+        changes = LeadStatusChange
+        group = [CONVERSION_GROUPS[group_by].label("group")] if group_by else []
+        next_change = func.lead(changes.changed_at).over(
+            partition_by=changes.lead_id, order_by=(changes.changed_at, changes.id)
+        )
+        stays = (
+            select(
+                *group,
+                changes.to_status.label("status"),
+                (next_change - changes.changed_at).label("duration"),
+            )
+            .join(Lead, Lead.id == changes.lead_id)
+            .where(Lead.created_at >= self._cohort_start(days))
+            .subquery()
+        )
+        hours = func.extract("epoch", stays.c.duration) / 3600
+        columns = ([stays.c.group] if group_by else []) + [stays.c.status]
+        query = (
+            select(
+                *columns,
+                func.count(stays.c.duration).label("completed"),
+                func.count().filter(stays.c.duration.is_(None)).label("in_stage"),
+                func.percentile_cont(0.5).within_group(hours).label("median_hours"),
+                func.percentile_cont(0.9).within_group(hours).label("p90_hours"),
+            )
+            .group_by(*columns)
+            .order_by(*columns)
+        )
+
+        velocity = []
+        for row in await self.db.execute(query):
+            entry = {group_by: row.group} if group_by else {}
+            entry.update(
+                {
+                    "stage": row.status.value,
+                    "completed": row.completed,
+                    "in_stage": row.in_stage,
+                    "median_hours": round(row.median_hours, 2)
+                    if row.median_hours is not None
+                    else None,
+                    "p90_hours": round(row.p90_hours, 2) if row.p90_hours is not None else None,
+                }
+            )
+            velocity.append(entry)
+
+        return {"days": days, "group_by": group_by, "velocity": velocity}
+
+    async def get_score_distribution(
+        self,
+        days: int = 30,
+        group_by: Optional[str] = None,
+        source: Optional[LeadSource] = None,
+        campaign: Optional[str] = None,
+        bin_width: int = 10,
+        thresholds: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """Lead score histogram, percentiles and qualification by threshold.
+
+        Per-day score histograms from lead_score_daily_stats are merged over the
+        last ``days`` days and per group, so any window is answered without
+        scanning leads. For each threshold, the leads it would qualify are
+        reported.
+        """
+        if thresholds is None:
+            thresholds = sorted({*range(0, 101, 10), settings.LEAD_SCORE_THRESHOLD})
+        stats = LeadScoreDailyStats
+        group = [getattr(stats, group_by).label("group")] if group_by else []
+        query = (
+            select(*group, stats.score, func.sum(stats.leads))
+            .where(stats.day >= (datetime.utcnow() - timedelta(days=days)).date())
+            .group_by(*group, stats.score)
+            .having(func.sum(stats.leads) > 0)
+        )
+        if source is not None:
+            query = query.where(stats.source == source)
+        if campaign is not None:
+            query = query.where(stats.campaign == campaign)
+
+        histograms: Dict[Any, ScoreHistogram] = {}
+        for row in await self.db.execute(query):
+            key = row.group if group_by else None
+            histograms.setdefault(key, ScoreHistogram()).add(row.score, row[-1])
+        if not group_by and not histograms:
+            histograms[None] = ScoreHistogram()
+
+        distributions = []
+        for key, histogram in histograms.items():
+            total = histogram.total
+            entry = {group_by: key} if group_by else {}
+            mean = histogram.mean()
+            entry.update(
+                {
+                    "leads": total,
+                    "mean": round(mean, 2) if mean is not None else None,
+                    "p50": histogram.quantile(0.5),
+                    "p90": histogram.quantile(0.9),
+                    "p99": histogram.quantile(0.99),
+                    "histogram": histogram.bins(bin_width),
+                    "qualification": [
+                        {
+                            "threshold": threshold,
+                            "leads": histogram.count_at_least(threshold),
+                            "fraction": round(histogram.count_at_least(threshold) / total, 4)
+                            if total
+                            else 0,
+                        }
+                        for threshold in thresholds
+                    ],
+                }
+            )
+            distributions.append(entry)
+        if group_by:
+            distributions.sort(key=lambda entry: -entry["leads"])
+
+        return {
+            "days": days,
+            "group_by": group_by,
+            "current_threshold": settings.LEAD_SCORE_THRESHOLD,
+            "distributions": distributions,
+        }
+
+    async def slice_leads(
+        self, filters: Dict[str, Any], group_by: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Filter and group leads from the in-process snapshot, without querying leads"""
+        await lead_snapshot.ensure_fresh(self.db)
+        started = time.perf_counter()
+        rows = lead_snapshot.aggregate(lead_snapshot.mask(**filters), group_by)
+        return {
+            "group_by": group_by,
+            "rows": rows,
+            **self._snapshot_timing(started),
+        }
+
+    async def slice_score_histogram(
+        self, filters: Dict[str, Any], bins: int = 10
+    ) -> Dict[str, Any]:
+        """Lead score histogram of the filtered leads from the in-process snapshot"""
+        await lead_snapshot.ensure_fresh(self.db)
+        started = time.perf_counter()
+        histogram = lead_snapshot.score_histogram(lead_snapshot.mask(**filters), bins)
+        return {"bins": histogram, **self._snapshot_timing(started)}
+
+    @staticmethod
+    def _snapshot_timing(started: float) -> Dict[str, Any]:
+        """Computation time and snapshot lag to report with a slice"""
+        lag = lead_snapshot.lag_seconds
+        return {
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "snapshot_rows": len(lead_snapshot),
+            "snapshot_lag_seconds": round(lag, 3) if lag is not None else None,
+        }
+
+    @staticmethod
+    async def _cached_daily(
+        key: tuple, compute: Callable[[], Awaitable[Dict[str, Any]]], fresh: bool
+    ) -> Dict[str, Any]:
+        """Serve a pipeline report from the cache for the current UTC day"""
+        today = datetime.utcnow().date()
+        key = (*key, today)
+        if not fresh:
+            cached = pipeline_cache.get(key)
+            if cached is not None:
+                return cached
+
+        report = {**await compute(), "as_of": today.isoformat()}
+        pipeline_cache.set(key, report)
+        return report
+
+    @staticmethod
+    def _cohort_start(days: int) -> datetime:
+        """Start of the whole-day window ending today"""
+        today = datetime.utcnow().date()
+        return datetime.combine(today - timedelta(days=days), datetime.min.time())
+
+    @staticmethod
+    def _within(query, start_date: Optional[datetime], end_date: Optional[datetime]):
+        """Restrict a lead query to a created_at range"""
+        if start_date:
+            query = query.where(Lead.created_at >= start_date)
+        if end_date:
+            query = query.where(Lead.created_at <= end_date)
+        return query
+
+    @staticmethod
+    def _period(start_date: Optional[datetime], end_date: Optional[datetime]) -> Dict[str, Any]:
+        """Describe a reporting period"""
+        return {
+            "start": start_date.isoformat() if start_date else None,
+            "end": end_date.isoformat() if end_date else None,
         }
 
     async def get_lead_sources_breakdown(self, days: int = 30) -> List[Dict[str, Any]]:
@@ -88,9 +460,10 @@ class AnalyticsService:
         start_date = datetime.now() - timedelta(days=days)
 
         result = await self.db.execute(
-            select(Lead.source, func.count(Lead.id).label("count"))
-            .where(Lead.created_at >= start_date)
-            .group_by(Lead.source)
+            select(LeadDailyStats.source, func.sum(LeadDailyStats.leads).label("count"))
+            .where(LeadDailyStats.day >= start_date.date())
+            .group_by(LeadDailyStats.source)
+            .having(func.sum(LeadDailyStats.leads) > 0)
         )
 
         sources = []
@@ -99,32 +472,118 @@ class AnalyticsService:
 
         return sources
 
-    async def get_top_campaigns(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get top performing campaigns"""
-        result = await self.db.execute(
+    async def get_top_campaigns(
+        self,
+        limit: int = 10,
+        days: Optional[int] = None,
+        dimension: str = "campaign",
+        sort: str = "total_leads",
+        fresh: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Get top performing campaigns, or UTM values, from the ranked leaderboard"""
+        leaderboard = await self.get_leaderboard(dimension, days, sort, fresh)
+        return leaderboard[:limit]
+
+    async def get_leaderboard(
+        self,
+        dimension: str = "campaign",
+        days: Optional[int] = None,
+        sort: str = "total_leads",
+        fresh: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Rank every value of a campaign dimension over the last ``days`` days.
+
+        Boards are aggregated from campaign_daily_stats, sorted once and cached
+        for ``LEADERBOARD_CACHE_TTL_SECONDS``, so serving the top K is a slice
+        of the ordering. They are not versioned by ``lead_generation``, which
+        moves on every lead write and would make nearly every request miss;
+        boards lag writes by up to the TTL instead. ``fresh`` skips the cache
+        lookup and refreshes the entry. ``days`` of None ranks over all time.
+        """
+        key = (dimension, days, sort)
+        if not fresh:
+            leaderboard = leaderboard_cache.get(key)
+            if leaderboard is not None:
+                return leaderboard
+
+        stats = CampaignDailyStats
+        total_leads = func.sum(stats.leads)
+        query = (
             select(
-                Lead.campaign,
-                func.count(Lead.id).label("total_leads"),
-                func.sum(func.cast(Lead.is_qualified, func.Integer)).label(
-                    "qualified_leads"
-                ),
-                func.avg(Lead.lead_score).label("avg_score"),
+                stats.value,
+                total_leads,
+                func.sum(stats.qualified_leads),
+                func.sum(stats.converted_leads),
+                func.sum(stats.score_sum),
             )
-            .where(Lead.campaign.isnot(None))
-            .group_by(Lead.campaign)
-            .order_by(func.count(Lead.id).desc())
-            .limit(limit)
+            .where(stats.dimension == dimension)
+            .group_by(stats.value)
+            .having(total_leads > 0)
         )
+        if days is not None:
+            query = query.where(stats.day >= (datetime.utcnow() - timedelta(days=days)).date())
 
-        campaigns = []
-        for row in result:
-            campaigns.append(
-                {
-                    "campaign": row[0],
-                    "total_leads": row[1],
-                    "qualified_leads": row[2] or 0,
-                    "avg_score": round(float(row[3]), 2) if row[3] else 0,
-                }
-            )
+        leaderboard = [
+            {
+                dimension: value,
+                "total_leads": total,
+                "qualified_leads": qualified,
+                "converted_leads": converted,
+                "conversion_rate": round((converted / total * 100), 2),
+                "avg_score": round(float(score_sum) / total, 2),
+            }
+            for value, total, qualified, converted, score_sum in await self.db.execute(query)
+        ]
+        leaderboard.sort(key=lambda entry: (-entry[sort], entry[dimension]))
+
+        leaderboard_cache.set(key, leaderboard)
+        return leaderboard
+
+    async def rebuild_daily_stats(self, since: Optional[date] = None) -> Dict[str, Any]:
+        """Recompute the daily rollups from leads, for every day or from ``since``.
+
+        Lead writes are blocked while the affected days are rebuilt, so the
+        rollups cannot miss a concurrent change. The rollup triggers are
+        reinstalled too, which repairs databases created before they existed.
+        """
+        started = time.perf_counter()
+        for statement in ROLLUP_TRIGGER_DDL:
+            await self.db.execute(text(statement))
+        await self.db.execute(text("LOCK TABLE leads IN SHARE MODE"))
+
+        params = {"since": datetime(since.year, since.month, since.day)} if since else {}
+        rows = {}
+        for rollup in ROLLUPS:
+            delete_sql, insert_sql = rollup.rebuild_sql(since=since is not None)
+            await self.db.execute(text(delete_sql), params)
+            result = await self.db.execute(text(insert_sql), params)
+            rows[rollup.table] = result.rowcount
+        await self.db.commit()
+
+        return {
+            "rows": rows,
+            "since": since.isoformat() if since else None,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def backfill_status_changes(self) -> int:
+        """Seed the status log of leads that predate it with their current status.
+
+        The status log triggers are reinstalled too, and lead writes are blocked
+        meanwhile, so no lead is left without history.
+        """
+        for statement in STATUS_LOG_TRIGGER_DDL:
+            await self.db.execute(text(statement))
+        await self.db.execute(text("LOCK TABLE leads IN SHARE MODE"))
 
-        return campaigns
+        changes = LeadStatusChange
+        result = await self.db.execute(
+            insert(changes).from_select(
+                ["lead_id", "from_status", "to_status", "changed_at"],
+                select(Lead.id, null(), Lead.status, Lead.created_at).where(
+                    ~exists().where(changes.lead_id == Lead.id)
+                ),
+            )
+        )
+        await self.db.commit()
+        return result.rowcount
@@ -0,0 +1,153 @@
+"""Write-behind buffer for high-volume lead capture"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.activity import Activity
+from app.models.lead import Lead
+from app.services.visitor_service import VisitorService
+
+
+class DuplicateLeadError(Exception):
+    """Raised when a buffered lead's email already exists"""
+
+
+@dataclass
+class _PendingLead:
+    lead_values: Dict[str, Any]
+    activity_values: Dict[str, Any]
+    future: asyncio.Future
+
+
+class LeadWriteBuffer:
+    """Buffers captured leads and their activities and writes them in micro-batches.
+
+    A batch is flushed when it reaches ``max_batch_size`` rows or when the oldest
+    pending row has waited ``flush_interval_ms``. Each flush is one multi-row lead
+    INSERT, one multi-row activity INSERT and one commit; callers awaiting
+    ``submit`` then receive their new lead id.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size or settings.WEBHOOK_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.WEBHOOK_FLUSH_INTERVAL_MS) / 1000
+        self._pending: List[_PendingLead] = []
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of leads waiting to be flushed"""
+        return len(self._pending)
+
+    async def submit(self, lead_values: Dict[str, Any], activity_values: Dict[str, Any]) -> int:
+        """Queue a lead and its activity, returning the lead id once flushed"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_PendingLead(lead_values, activity_values, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._start_flush)
+
+        return await future
+
+    async def flush(self) -> None:
+        """Write every pending lead, one batch at a time"""
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[: self.max_batch_size]
+                self._pending = self._pending[self.max_batch_size :]
+                try:
+                    await self._write_batch(batch)
+                except Exception as e:
+                    for pending in batch:
+                        if not pending.future.done():
+                            pending.future.set_exception(e)
+
+    async def close(self) -> None:
+        """Flush outstanding leads and wait for in-flight flushes"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+    def _start_flush(self) -> None:
+        """Schedule a flush in the background"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _write_batch(self, batch: List[_PendingLead]) -> None:
+        """Insert one batch of leads and activities in a single transaction"""
+        first_by_email: Dict[str, _PendingLead] = {}
+        for pending in batch:
+            email = pending.lead_values["email"]
+            if email in first_by_email:
+                pending.future.set_exception(
+                    DuplicateLeadError(f"Lead with email {email} already exists")
+                )
+            else:
+                first_by_email[email] = pending
+
+        async with self.session_factory() as session:
+            result = await session.execute(
+                pg_insert(Lead)
+                .values([pending.lead_values for pending in first_by_email.values()])
+                .on_conflict_do_nothing(index_elements=[Lead.email])
+                .returning(Lead.id, Lead.email)
+            )
+            lead_ids = {email: lead_id for lead_id, email in result.all()}
+
+            activities = [
+                {**pending.activity_values, "lead_id": lead_ids[email]}
+                for email, pending in first_by_email.items()
+                if email in lead_ids
+            ]
+            if activities:
+                # Executemany: form, landing-page and chat activities set different
+                # columns, which a single multi-row VALUES cannot mix
+                await session.execute(insert(Activity), activities)
+                await VisitorService(session).record_visits(
+                    {
+                        **pending.activity_values,
+                        "source": pending.lead_values["source"],
+                        "campaign": pending.lead_values.get("campaign"),
+                    }
+                    for email, pending in first_by_email.items()
+                    if email in lead_ids
+                )
+            await session.commit()
+
+        for email, pending in first_by_email.items():
+            if pending.future.done():
+                continue
+            if email in lead_ids:
+                pending.future.set_result(lead_ids[email])
+            else:
+                pending.future.set_exception(
+                    DuplicateLeadError(f"Lead with email {email} already exists")
+                )
+
+
+# Shared buffer used by the webhook routes when WEBHOOK_WRITE_BEHIND is enabled
+lead_write_buffer = LeadWriteBuffer()
@@ -0,0 +1,194 @@
+"""Read-through cache of single leads, in process and optionally in Redis"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.lead import LeadResponse
+
+# Ids deleted and published per shared-tier command
+_INVALIDATION_BATCH = 1000
+
+
+class LeadCache:
+    """Read-through cache of leads as served by ``GET /leads/{id}``.
+
+    Leads are held as their JSON encoding in a bounded in-process LRU with a
+    TTL and, given a ``shared`` tier, there too so workers share their fills.
+    The shared tier is a ``redis.asyncio`` client or a stand-in with the same
+    async ``get``, ``set``, ``delete``, ``publish``, ``scan_iter`` and
+    ``pubsub``.
+
+    Writers call ``invalidate`` once they commit. It drops the leads from the
+    shared tier, then locally, and publishes their ids so every worker
+    listening with ``start`` drops its local copies. A load that overlaps an
+    invalidation is returned but not cached, so a read that began before a
+    write cannot put the old lead back. Across workers that holds once the
+    published ids arrive; the TTL bounds anything filled in between.
+    """
+
+    def __init__(
+        self,
+        shared: Any = None,
+        maxsize: Optional[int] = None,
+        ttl: Optional[int] = None,
+        prefix: str = "leadgen:lead:",
+    ):
+        self.local = TTLCache(
+            maxsize=maxsize or settings.LEAD_CACHE_SIZE,
+            ttl=ttl or settings.LEAD_CACHE_TTL_SECONDS,
+            sizeof=len,
+        )
+        self.shared = shared
+        self.prefix = prefix
+        self.channel = f"{prefix}invalidations"
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self.loads = 0
+        self.invalidations = 0
+        self._epoch = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(
+        self, lead_id: int, load: Callable[[], Awaitable[Optional[LeadResponse]]]
+    ) -> Optional[LeadResponse]:
+        """Return the cached lead, or ``load`` it from the database and cache it"""
+        epoch = self._epoch
+        data = self.local.get(lead_id)
+        if data is None and self.shared is not None:
+            data = await self._shared_call(self.shared.get, self._key(lead_id))
+            if data is not None:
+                self.shared_hits += 1
+                if epoch == self._epoch:
+                    self.local.set(lead_id, data)
+        if data is not None:
+            return LeadResponse.model_validate_json(data)
+
+        lead = await load()
+        self.loads += 1
+        if lead is not None and epoch == self._epoch:
+            data = lead.model_dump_json().encode()
+            self.local.set(lead_id, data)
+            if self.shared is not None:
+                await self._shared_call(
+                    self.shared.set, self._key(lead_id), data, ex=int(self.local.ttl)
+                )
+        return lead
+
+    async def invalidate(self, lead_ids: Iterable[int]) -> None:
+        """Drop written leads from every tier and every worker's local cache"""
+        lead_ids = list(lead_ids)
+        if not lead_ids:
+            return
+        self.invalidations += len(lead_ids)
+        for start in range(0, len(lead_ids), _INVALIDATION_BATCH):
+            batch = lead_ids[start:start + _INVALIDATION_BATCH]
+            if self.shared is not None:
+                await self._shared_call(self.shared.delete, *(self._key(i) for i in batch))
+            # Dropped after the shared tier, so no local fill can copy its old entry
+            self._drop_local(batch)
+            if self.shared is not None:
+                await self._shared_call(
+                    self.shared.publish, self.channel, ",".join(map(str, batch))
+                )
+
+    async def clear(self) -> None:
+        """Drop every lead, after writes to more leads than are worth listing"""
+        if self.shared is None:
+            self._drop_local(None)
+            return
+        try:
+            keys = [key async for key in self.shared.scan_iter(match=f"{self.prefix}[0-9]*")]
+            for start in range(0, len(keys), _INVALIDATION_BATCH):
+                await self.shared.delete(*keys[start:start + _INVALIDATION_BATCH])
+            self._drop_local(None)
+            await self.shared.publish(self.channel, "*")
+        except Exception:
+            self.shared_errors += 1
+            self._drop_local(None)
+
+    def start(self) -> None:
+        """Listen for other workers' invalidations when there is a shared tier"""
+        if self.shared is not None and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop listening for invalidations"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio, evictions and memory of the local tier, plus shared-tier counters"""
+        local = self.local.stats()
+        lookups = local["hits"] + local["misses"]
+        served = local["hits"] + self.shared_hits
+        return {
+            "local": local,
+            "shared": None if self.shared is None else {
+                "hits": self.shared_hits,
+                "errors": self.shared_errors,
+            },
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(served / lookups, 4) if lookups else 0,
+            "memory_bytes": local["value_bytes"],
+        }
+
+    def _key(self, lead_id: int) -> str:
+        return f"{self.prefix}{lead_id}"
+
+    def _drop_local(self, lead_ids: Optional[Iterable[int]]) -> None:
+        """Drop leads, or all of them, from this worker and refuse overlapping fills"""
+        self._epoch += 1
+        if lead_ids is None:
+            self.local.clear()
+            return
+        for lead_id in lead_ids:
+            self.local.delete(lead_id)
+
+    async def _shared_call(self, method: Callable[..., Awaitable[Any]], *args, **kwargs):
+        """Call the shared tier, falling back to the database when it is unreachable"""
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            self.shared_errors += 1
+            return None
+
+    async def _listen(self) -> None:
+        """Apply invalidations published by any worker, reconnecting on errors"""
+        while True:
+            try:
+                pubsub = self.shared.pubsub()
+                await pubsub.subscribe(self.channel)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = message["data"]
+                        data = data.decode() if isinstance(data, bytes) else data
+                        self._drop_local(None if data == "*" else map(int, data.split(",")))
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Entries filled while disconnected may have missed invalidations
+                self.shared_errors += 1
+                self._drop_local(None)
+                await asyncio.sleep(1)
+
+
+def _shared_tier() -> Any:
+    """Redis client for the shared tier, when it is enabled"""
+    if not settings.LEAD_CACHE_SHARED:
+        return None
+    from redis import asyncio as redis
+
+    return redis.from_url(settings.REDIS_URL)
+
+
+# Shared cache in front of single-lead reads
+lead_cache = LeadCache(shared=_shared_tier())
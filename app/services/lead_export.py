@@ -0,0 +1,98 @@
+"""Streaming export of leads as NDJSON or CSV"""
+
+import csv
+import enum
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+import orjson
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.lead import Lead
+from app.schemas.lead import LEAD_RESPONSE_FIELDS, LeadSearchFilters
+from app.services.lead_service import LeadService
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class LeadExporter:
+    """Streams filtered leads from a server-side cursor, one chunk at a time.
+
+    The export runs as a single SELECT in id order on its own session, so it
+    outlives the request's session and reads one consistent snapshot. Rows are
+    fetched ``chunk_size`` at a time and each chunk is encoded and yielded
+    before the next is fetched, so memory stays bounded by one chunk however
+    many leads match.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, chunk_size: Optional[int] = None):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        self.exports = 0
+        self.rows_exported = 0
+
+    async def stream(
+        self,
+        filters: Optional[LeadSearchFilters] = None,
+        fields: Sequence[str] = LEAD_RESPONSE_FIELDS,
+        format: str = "ndjson",
+    ) -> AsyncIterator[bytes]:
+        """Yield the encoded export: NDJSON lines, or CSV with a header row"""
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        unknown = [field for field in fields if field not in LEAD_RESPONSE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown lead fields: {', '.join(unknown)}")
+
+        query = select(*(getattr(Lead, field) for field in fields)).order_by(Lead.id)
+        if filters is not None:
+            query = query.where(*LeadService.search_conditions(filters))
+
+        encode = self._encode_ndjson if format == "ndjson" else self._encode_csv
+        if format == "csv":
+            yield self._csv_header(fields)
+
+        self.exports += 1
+        async with self.session_factory() as session:
+            connection = await session.connection()
+            result = await connection.stream(query.execution_options(yield_per=self.chunk_size))
+            async for rows in result.partitions():
+                yield encode(fields, rows)
+                self.rows_exported += len(rows)
+
+    @staticmethod
+    def _encode_ndjson(fields: Sequence[str], rows: List[Any]) -> bytes:
+        """One JSON object per line"""
+        return b"".join(orjson.dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+    @staticmethod
+    def _csv_header(fields: Sequence[str]) -> bytes:
+        """CSV header row"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(fields)
+        return buffer.getvalue().encode()
+
+    @staticmethod
+    def _encode_csv(fields: Sequence[str], rows: List[Any]) -> bytes:
+        """CSV rows, with values formatted as in the JSON responses"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+        return buffer.getvalue().encode()
+
+
+def _csv_value(value: Any) -> Any:
+    """Enum value or ISO timestamp in place of what ``str`` would write"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# Shared exporter used by the export endpoint
+lead_exporter = LeadExporter()
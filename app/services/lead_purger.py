@@ -0,0 +1,151 @@
+"""Batched purging of leads for retention policies and erasure requests"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, any_, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.lead import Lead
+from app.schemas.lead import LeadPurgeRequest
+from app.services.lead_cache import lead_cache
+from app.services.lead_service import LeadService
+
+
+class LeadPurger:
+    """Deletes the leads matching a purge request in bounded batches.
+
+    Each batch locks the next ``batch_size`` matching leads after the last one
+    deleted, in id order, deletes them with one statement and commits; the
+    database cascades the delete to their activities, status history and
+    search documents. Batches are spaced by ``pause_ms``, so no transaction
+    holds locks for long and concurrent writes keep flowing. An age cutoff is
+    fixed when the run starts, so leads ageing past it meanwhile are left for
+    the next run.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: Optional[int] = None,
+        pause_ms: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        if pause_ms is None:
+            pause_ms = settings.PURGE_PAUSE_MS
+        self.pause = pause_ms / 1000
+        self.progress: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether a background purge is in progress in this process"""
+        return self._task is not None and not self._task.done()
+
+    def start(self, request: LeadPurgeRequest) -> bool:
+        """Run a purge in the background, returning False if one already runs"""
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self.purge(request))
+        return True
+
+    async def stop(self) -> None:
+        """Cancel the background purge; batches already committed stay deleted"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """Progress of the latest purge in this process"""
+        return {"running": self.running, "purge": self.progress}
+
+    async def count(self, request: LeadPurgeRequest) -> int:
+        """Number of leads the request would delete"""
+        async with self.session_factory() as session:
+            return await session.scalar(
+                select(func.count()).select_from(Lead).where(*self._conditions(request))
+            )
+
+    async def purge(self, request: LeadPurgeRequest) -> Dict[str, Any]:
+        """Delete every lead matching the request, batch by batch"""
+        conditions = self._conditions(request)
+        progress = self.progress = {
+            "status": "running",
+            "matched": await self.count(request),
+            "deleted": 0,
+            "batches": 0,
+            "error": None,
+            "started_at": datetime.utcnow(),
+            "finished_at": None,
+            "duration_ms": None,
+        }
+        started = time.perf_counter()
+        last_id = 0
+        try:
+            while True:
+                deleted = await self._delete_batch(conditions, last_id)
+                if not deleted:
+                    break
+                last_id = deleted[-1]
+                progress["deleted"] += len(deleted)
+                progress["batches"] += 1
+                await asyncio.sleep(self.pause)
+            progress["status"] = "completed"
+        except asyncio.CancelledError:
+            progress["status"] = "cancelled"
+            raise
+        except Exception as e:
+            progress["status"] = "failed"
+            progress["error"] = repr(e)
+            raise
+        finally:
+            progress["finished_at"] = datetime.utcnow()
+            progress["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return progress
+
+    async def _delete_batch(self, conditions: List[Any], after_id: int) -> List[int]:
+        """Lock and delete the next batch of matching leads, returning their ids"""
+        async with self.session_factory() as session:
+            lead_ids = (
+                await session.execute(
+                    select(Lead.id)
+                    .where(Lead.id > after_id, *conditions)
+                    .order_by(Lead.id)
+                    .limit(self.batch_size)
+                    .with_for_update()
+                )
+            ).scalars().all()
+            if lead_ids:
+                await session.execute(
+                    delete(Lead)
+                    .where(Lead.id == any_(literal(lead_ids, ARRAY(Integer))))
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                await lead_cache.invalidate(lead_ids)
+            return lead_ids
+
+    @staticmethod
+    def _conditions(request: LeadPurgeRequest) -> List[Any]:
+        """WHERE clauses matching the leads a request purges"""
+        conditions = []
+        if request.lead_ids is not None:
+            conditions.append(Lead.id == any_(literal(request.lead_ids, ARRAY(Integer))))
+        if request.emails is not None:
+            conditions.append(Lead.email == any_(literal(request.emails, ARRAY(Lead.email.type))))
+        if request.filters is not None:
+            conditions.extend(LeadService.search_conditions(request.filters))
+        if request.older_than_days is not None:
+            cutoff = datetime.utcnow() - timedelta(days=request.older_than_days)
+            conditions.append(Lead.created_at < cutoff)
+        return conditions
+
+
+# Shared purger behind the purge endpoints
+lead_purger = LeadPurger()
@@ -1,94 +1,795 @@
 """Lead service for business logic"""
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import Boolean, DateTime, Float, Integer, Text, any_, bindparam, false, func
+from sqlalchemy import delete, insert, literal, or_, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from pydantic import ValidationError
+from typing import Any, AsyncIterable, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+import time
 
-from app.models.lead import Lead, LeadStatus
-from app.schemas.lead import LeadCreate, LeadUpdate
-from app.services.scoring_service import ScoringService
+from app.core.config import settings
+from app.core.cursors import decode_cursor, encode_cursor
+from app.core.query_plans import Explain, summarize_plan
+from app.models.activity import Activity, ActivityType
+from app.models.company import Company
+from app.models.lead import Lead, LeadStatus, tag_list
+from app.models.lead_search_document import (
+    SEARCH_DOCUMENT_TRIGGER_DDL,
+    SEARCH_INDEX_DDL,
+    LeadSearchDocument,
+)
+from app.models.lead_status_change import LeadStatusChange
+from app.schemas.lead import (
+    LEAD_RESPONSE_FIELDS,
+    BulkLeadError,
+    BulkLeadResponse,
+    BulkLeadUpdate,
+    LeadCreate,
+    LeadResponse,
+    LeadSearchFilters,
+    LeadUpdate,
+)
+from app.services.lead_cache import lead_cache
+from app.services.scoring_service import (
+    ENGAGEMENT_COLUMNS,
+    SCORING_COLUMNS,
+    shared_scoring_service,
+)
 from app.integrations.hubspot_integration import HubSpotIntegration
 from app.integrations.salesforce_integration import SalesforceIntegration
 
 
+class LeadVersionConflict(Exception):
+    """Raised when a conditional update finds the lead changed since the expected version"""
+
+
 class LeadService:
     """Service for lead management operations"""
 
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.scoring_service = ScoringService()
+        self.scoring_service = shared_scoring_service
 
-    async def create_lead(self, lead_data: LeadCreate) -> Lead:
+    async def create_lead(
+        self, lead_data: LeadCreate, first_activity: Optional[ActivityType] = None
+    ) -> Lead:
         """Create a new lead"""
-        lead = Lead(**lead_data.model_dump())
-
-        # Calculate initial lead score
-        lead.lead_score = await self.scoring_service.calculate_score(lead_data.model_dump())
+        lead = Lead(**await self.build_lead_values(lead_data, first_activity))
 
         self.db.add(lead)
         await self.db.commit()
         await self.db.refresh(lead)
         return lead
 
-    async def get_leads(self, skip: int = 0, limit: int = 100) -> List[Lead]:
-        """Get all leads with pagination"""
+    async def build_lead_values(
+        self, lead_data: LeadCreate, first_activity: Optional[ActivityType] = None
+    ) -> Dict[str, Any]:
+        """Build the column values for a new lead, including its initial score.
+
+        ``first_activity`` is the activity that captured the lead; it seeds the
+        lead's engagement score.
+        """
+        values = lead_data.model_dump()
+        if first_activity is not None:
+            values["engagement_score"] = self.scoring_service.plan.activity_weight(first_activity)
+            values["engagement_updated_at"] = datetime.utcnow()
+        values["lead_score"] = await self.scoring_service.calculate_score(values)
+        values.update(self.scoring_service.version_values())
+        return values
+
+    async def bulk_create_leads(
+        self,
+        records: AsyncIterable[Tuple[Any, Optional[str]]],
+        batch_size: Optional[int] = None,
+    ) -> BulkLeadResponse:
+        """Insert streamed lead records in multi-row batches, skipping existing emails"""
+        batch_size = batch_size or settings.BULK_INSERT_BATCH_SIZE
+        summary = BulkLeadResponse()
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+
+        async for record, error in records:
+            summary.received += 1
+            row = summary.received
+
+            if error is None:
+                try:
+                    lead_data = LeadCreate.model_validate(record)
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+                        for err in e.errors()
+                    )
+            if error is not None:
+                summary.invalid += 1
+                email = record.get("email") if isinstance(record, dict) else None
+                self._report_bulk_error(summary, row, email, error)
+                continue
+
+            batch.append((row, await self.build_lead_values(lead_data)))
+
+            if len(batch) >= batch_size:
+                await self._insert_lead_batch(batch, summary)
+                batch = []
+
+        if batch:
+            await self._insert_lead_batch(batch, summary)
+        return summary
+
+    async def _insert_lead_batch(
+        self, batch: List[Tuple[int, Dict[str, Any]]], summary: BulkLeadResponse
+    ) -> None:
+        """Write one batch with a single INSERT ... ON CONFLICT (email) DO NOTHING"""
+        unique_rows: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        for row, values in batch:
+            if values["email"] in unique_rows:
+                summary.duplicates += 1
+                self._report_bulk_error(summary, row, values["email"], "Duplicate email in request")
+            else:
+                unique_rows[values["email"]] = (row, values)
+
         result = await self.db.execute(
-            select(Lead).offset(skip).limit(limit).order_by(Lead.created_at.desc())
+            pg_insert(Lead)
+            .values([values for _, values in unique_rows.values()])
+            .on_conflict_do_nothing(index_elements=[Lead.email])
+            .returning(Lead.email)
         )
-        return result.scalars().all()
+        inserted = set(result.scalars().all())
+        await self.db.commit()
 
-    async def get_lead(self, lead_id: int) -> Optional[Lead]:
-        """Get a lead by ID"""
-        result = await self.db.execute(select(Lead).where(Lead.id == lead_id))
-        return result.scalar_one_or_none()
+        summary.accepted += len(inserted)
+        for email, (row, _) in unique_rows.items():
+            if email not in inserted:
+                summary.duplicates += 1
+                self._report_bulk_error(summary, row, email, "Lead with this email already exists")
 
-    async def update_lead(self, lead_id: int, lead_update: LeadUpdate) -> Optional[Lead]:
-        """Update a lead"""
-        lead = await self.get_lead(lead_id)
-        if not lead:
+    @staticmethod
+    def _report_bulk_error(
+        summary: BulkLeadResponse, row: int, email: Any, error: str
+    ) -> None:
+        """Record a rejected row, keeping the error list bounded"""
+        if len(summary.errors) >= settings.BULK_MAX_REPORTED_ERRORS:
+            summary.errors_truncated = True
+            return
+        summary.errors.append(
+            BulkLeadError(row=row, email=email if isinstance(email, str) else None, error=error)
+        )
+
+    async def get_leads(
+        self, skip: int = 0, limit: int = 100, fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Get all leads with offset pagination (legacy; prefer ``get_leads_page``)"""
+        result = await self.db.execute(
+            self._lead_select(fields)
+            .offset(skip)
+            .limit(limit)
+            .order_by(Lead.created_at.desc(), Lead.id.desc())
+        )
+        if fields is None:
+            return result.scalars().all()
+        return [dict(zip(fields, row)) for row in result]
+
+    async def get_leads_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order: str = "desc",
+        snapshot: bool = False,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Get a page of leads in (created_at, id) order after an opaque cursor.
+
+        Each page is an index range scan from the cursor position, so deep pages
+        cost the same as the first. Returns the leads and the cursor of the next
+        page, or None on the last page. With ``snapshot`` the walk only returns
+        leads created up to ``CURSOR_SNAPSHOT_GRACE_SECONDS`` before it began,
+        so leads inserted while it runs cannot shift it. This is best effort:
+        ``created_at`` is stamped when a lead is written, not when it commits,
+        so leads from a transaction running longer than the grace (a large
+        CSV import, a long bulk stream) can become visible behind the cursor
+        and be missed, or ahead of it and be returned. The cursor carries the
+        order and snapshot of the walk it belongs to. With ``fields`` only
+        those columns are selected and each lead is a dict of them.
+        """
+        position: Dict[str, Any] = {"endpoint": "leads", "order": order, "snapshot_at": None}
+        if cursor is not None:
+            position = self._walk_position(cursor, "leads")
+        elif snapshot:
+            snapshot_at = datetime.utcnow() - timedelta(
+                seconds=settings.CURSOR_SNAPSHOT_GRACE_SECONDS
+            )
+            position["snapshot_at"] = snapshot_at.isoformat()
+        query = self._keyset_query(self._lead_select(fields), position)
+        return await self._fetch_page(query, limit, position, fields)
+
+    async def search_leads(
+        self,
+        filters: LeadSearchFilters,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        explain: bool = False,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Any], Optional[str], Optional[Dict[str, Any]]]:
+        """Get a page of filtered leads, newest first, after an opaque cursor.
+
+        Filter combinations are served by the search indexes on ``leads``.
+        Returns the leads, the next page's cursor and, with ``explain``, the
+        planner's cost and access paths for the query. ``fields`` projects the
+        leads as in ``get_leads_page``. Cursors are bound to the filters.
+        """
+        filters_hash = self._filters_hash(filters)
+        position: Dict[str, Any] = {
+            "endpoint": "search",
+            "filters": filters_hash,
+            "order": "desc",
+            "snapshot_at": None,
+        }
+        if cursor is not None:
+            position = self._walk_position(cursor, "search", filters_hash)
+        query = self._keyset_query(
+            self._lead_select(fields).where(*self.search_conditions(filters)), position
+        )
+
+        query_plan = None
+        if explain:
+            plan = await self.db.scalar(Explain(query.limit(limit + 1)))
+            query_plan = summarize_plan(json.loads(plan) if isinstance(plan, str) else plan)
+
+        leads, next_cursor = await self._fetch_page(query, limit, position, fields)
+        return leads, next_cursor, query_plan
+
+    async def fuzzy_search_leads(
+        self,
+        query: str,
+        filters: Optional[LeadSearchFilters] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Tuple[Lead, float]], Optional[str]]:
+        """Typo-tolerant search over lead names, emails, job titles and companies.
+
+        Leads whose search document contains the query, or a word within
+        ``SEARCH_SIMILARITY_THRESHOLD`` trigram similarity of it, match. They
+        are ordered by word similarity distance, nearest first, which the GiST
+        trigram index returns directly, so the scan stops once the page is
+        full. Returns (lead, rank) pairs, rank being the word similarity, and
+        the cursor of the next page, which is bound to the query and filters.
+        """
+        query = " ".join(query.split())
+        filters_hash = self._filters_hash(filters) if filters is not None else None
+        position: Optional[Dict[str, Any]] = None
+        if cursor is not None:
+            position = decode_cursor(cursor)
+            if (
+                position.get("endpoint") != "fuzzy"
+                or position.get("q") != query
+                or position.get("filters") != filters_hash
+            ):
+                raise ValueError("Cursor belongs to a different search query")
+            if not isinstance(position.get("distance"), (int, float)) or not isinstance(
+                position.get("id"), int
+            ):
+                raise ValueError("Invalid cursor")
+        if not await self.db.scalar(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        ):
+            raise RuntimeError("Fuzzy search needs the pg_trgm PostgreSQL extension")
+        await self.db.execute(
+            select(
+                func.set_config(
+                    "pg_trgm.word_similarity_threshold",
+                    str(settings.SEARCH_SIMILARITY_THRESHOLD),
+                    True,
+                )
+            )
+        )
+
+        document = LeadSearchDocument.document
+        # document <->> query is 1 - word_similarity(query, document)
+        distance = document.op("<->>", return_type=Float)(query)
+        escaped = query.replace("/", "//").replace("%", "/%").replace("_", "/_")
+        statement = (
+            select(Lead, distance)
+            .join(LeadSearchDocument, LeadSearchDocument.lead_id == Lead.id)
+            .where(
+                or_(
+                    document.ilike(f"%{escaped}%", escape="/"),
+                    document.op("%>", is_comparison=True)(query),
+                )
+            )
+        )
+        if filters is not None:
+            statement = statement.where(*self.search_conditions(filters))
+        if position is not None:
+            after = tuple_(literal(position["distance"], Float), literal(position["id"], Integer))
+            statement = statement.where(tuple_(distance, LeadSearchDocument.lead_id) > after)
+        statement = statement.order_by(distance, LeadSearchDocument.lead_id).limit(limit + 1)
+
+        rows = (await self.db.execute(statement)).all()
+        matches = [(lead, 1 - lead_distance) for lead, lead_distance in rows[:limit]]
+        if len(rows) <= limit:
+            return matches, None
+        last, last_distance = rows[limit - 1]
+        return matches, encode_cursor(
+            {
+                "endpoint": "fuzzy",
+                "q": query,
+                "filters": filters_hash,
+                "distance": last_distance,
+                "id": last.id,
+            }
+        )
+
+    async def refresh_search_documents(self, chunk_size: int = 50_000) -> Dict[str, Any]:
+        """Rebuild every lead's search document, one id range per transaction.
+
+        The search index and its maintenance triggers are (re)installed first.
+        Only documents that differ are rewritten, so refreshing a current index
+        writes nothing; leads are share-locked while their chunk is written so
+        a concurrent edit cannot be overwritten with stale values.
+        """
+        started = time.perf_counter()
+        await self.db.execute(text(SEARCH_INDEX_DDL))
+        for statement in SEARCH_DOCUMENT_TRIGGER_DDL:
+            await self.db.execute(text(statement))
+        await self.db.commit()
+
+        max_id = await self.db.scalar(select(func.max(Lead.id))) or 0
+        written = 0
+        for start in range(0, max_id + 1, chunk_size):
+            documents = (
+                select(
+                    Lead.id,
+                    func.lead_search_document(
+                        Lead.first_name,
+                        Lead.last_name,
+                        Lead.email,
+                        Lead.job_title,
+                        Company.name,
+                        Company.domain,
+                    ),
+                )
+                .outerjoin(Company, Company.id == Lead.company_id)
+                .where(Lead.id >= start, Lead.id < start + chunk_size)
+                .with_for_update(read=True, of=Lead)
+            )
+            statement = pg_insert(LeadSearchDocument).from_select(
+                ["lead_id", "document"], documents
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[LeadSearchDocument.lead_id],
+                set_={"document": statement.excluded.document},
+                where=LeadSearchDocument.document.is_distinct_from(statement.excluded.document),
+            )
+            written += (await self.db.execute(statement)).rowcount
+            await self.db.commit()
+
+        return {
+            "written": written,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    @staticmethod
+    def search_conditions(filters: LeadSearchFilters) -> List[Any]:
+        """WHERE clauses of the set filters, written to match the search indexes"""
+        conditions: List[Any] = []
+        if filters.statuses:
+            conditions.append(Lead.status.in_(filters.statuses))
+        if filters.sources:
+            conditions.append(Lead.source.in_(filters.sources))
+        if filters.campaign is not None:
+            conditions.append(Lead.campaign == filters.campaign)
+        if filters.min_score is not None:
+            conditions.append(Lead.lead_score >= filters.min_score)
+        if filters.max_score is not None:
+            conditions.append(Lead.lead_score <= filters.max_score)
+        if filters.qualified is not None:
+            # Bare column, so the planner matches the partial qualified-score index
+            conditions.append(Lead.is_qualified if filters.qualified else ~Lead.is_qualified)
+        if filters.tags:
+            tags = sorted({tag.strip().lower() for tag in filters.tags if tag.strip()})
+            conditions.append(tag_list(Lead.tags).contains(tags))
+        if filters.company_id is not None:
+            conditions.append(Lead.company_id == filters.company_id)
+        if filters.company_domain is not None:
+            conditions.append(
+                Lead.company_id
+                == select(Company.id)
+                .where(Company.domain == filters.company_domain)
+                .scalar_subquery()
+            )
+        if filters.has_company is not None:
+            conditions.append(
+                Lead.company_id.isnot(None) if filters.has_company else Lead.company_id.is_(None)
+            )
+        if filters.created_from is not None:
+            conditions.append(Lead.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            conditions.append(Lead.created_at <= filters.created_to)
+        if filters.updated_from is not None:
+            conditions.append(Lead.updated_at >= filters.updated_from)
+        if filters.updated_to is not None:
+            conditions.append(Lead.updated_at <= filters.updated_to)
+        return conditions
+
+    @staticmethod
+    def _lead_select(fields: Optional[Sequence[str]] = None):
+        """SELECT of whole leads, or of only ``fields`` followed by any missing keyset columns"""
+        if fields is None:
+            return select(Lead)
+        unknown = [field for field in fields if field not in LEAD_RESPONSE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown lead fields: {', '.join(unknown)}")
+        keyset = [column for column in (Lead.created_at, Lead.id) if column.key not in fields]
+        return select(*(getattr(Lead, field) for field in fields), *keyset)
+
+    @staticmethod
+    def _filters_hash(filters: LeadSearchFilters) -> str:
+        """Short digest of a filter set, binding cursors to the search they page"""
+        return hashlib.sha256(filters.model_dump_json().encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _walk_position(
+        cursor: str, endpoint: str, filters_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Decode a keyset cursor, raising ValueError unless it continues this walk"""
+        position = decode_cursor(cursor)
+        if position.get("endpoint") != endpoint or position.get("filters") != filters_hash:
+            raise ValueError("Cursor belongs to a different listing or search")
+        if position.get("order") not in ("asc", "desc") or "snapshot_at" not in position:
+            raise ValueError("Invalid cursor")
+        if ("created_at" in position) != ("id" in position):
+            raise ValueError("Invalid cursor")
+        try:
+            if position["snapshot_at"] is not None:
+                datetime.fromisoformat(position["snapshot_at"])
+            if "created_at" in position:
+                datetime.fromisoformat(position["created_at"])
+                if not isinstance(position["id"], int):
+                    raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        return position
+
+    @staticmethod
+    def _keyset_query(query, position: Dict[str, Any]):
+        """Restrict and order a lead query to continue the walk at ``position``"""
+        order = position["order"]
+        key = tuple_(Lead.created_at, Lead.id)
+        if "created_at" in position:
+            after = tuple_(
+                literal(datetime.fromisoformat(position["created_at"]), DateTime),
+                literal(position["id"], Integer),
+            )
+            query = query.where(key < after if order == "desc" else key > after)
+        if position["snapshot_at"] is not None:
+            query = query.where(Lead.created_at <= datetime.fromisoformat(position["snapshot_at"]))
+        if order == "desc":
+            return query.order_by(Lead.created_at.desc(), Lead.id.desc())
+        return query.order_by(Lead.created_at, Lead.id)
+
+    async def _fetch_page(
+        self,
+        query,
+        limit: int,
+        position: Dict[str, Any],
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Run a keyset query for one page, returning its leads and the next cursor.
+
+        Leads are ORM objects, or dicts of ``fields`` when the query is projected.
+        """
+        rows = (await self.db.execute(query.limit(limit + 1))).all()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        if fields is None:
+            leads = [row[0] for row in rows]
+        else:
+            leads = [dict(zip(fields, row)) for row in rows]
+        if not more:
+            return leads, None
+
+        last = rows[-1][0] if fields is None else rows[-1]
+        next_cursor = encode_cursor(
+            {**position, "created_at": last.created_at.isoformat(), "id": last.id}
+        )
+        return leads, next_cursor
+
+    async def get_lead(self, lead_id: int) -> Optional[LeadResponse]:
+        """Get a lead by ID, read through the lead cache"""
+        return await lead_cache.get(lead_id, lambda: self._load_lead(lead_id))
+
+    async def _load_lead(self, lead_id: int) -> Optional[LeadResponse]:
+        """Read a lead's response fields from the database"""
+        row = (
+            await self.db.execute(
+                select(*(getattr(Lead, field) for field in LEAD_RESPONSE_FIELDS))
+                .where(Lead.id == lead_id)
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+        return LeadResponse.model_validate(dict(zip(LEAD_RESPONSE_FIELDS, row)))
+
+    async def get_status_history(self, lead_id: int) -> Optional[List[LeadStatusChange]]:
+        """Get a lead's status transitions, oldest first"""
+        result = await self.db.execute(
+            select(LeadStatusChange)
+            .where(LeadStatusChange.lead_id == lead_id)
+            .order_by(LeadStatusChange.changed_at, LeadStatusChange.id)
+        )
+        history = result.scalars().all()
+        if not history and await self.get_lead(lead_id) is None:
             return None
+        return history
+
+    async def update_lead(
+        self,
+        lead_id: int,
+        lead_update: LeadUpdate,
+        expected_versions: Optional[Sequence[datetime]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Update a lead with one UPDATE ... RETURNING its response fields.
+
+        With ``expected_versions`` the lead is only written while its
+        ``updated_at`` is one of them, and LeadVersionConflict is raised if it
+        has moved on. A status change is logged by the status-log trigger.
+        """
+        conditions = [Lead.id == lead_id]
+        if expected_versions is not None:
+            conditions.append(Lead.updated_at.in_(expected_versions))
+        columns = [getattr(Lead, field) for field in LEAD_RESPONSE_FIELDS]
 
         update_data = lead_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(lead, field, value)
+        if update_data:
+            statement = update(Lead).where(*conditions).values(**update_data).returning(*columns)
+        else:
+            statement = select(*columns).where(*conditions)
+        row = (await self.db.execute(statement)).one_or_none()
+        if row is None:
+            if expected_versions is not None and await self.get_lead(lead_id) is not None:
+                raise LeadVersionConflict(f"Lead {lead_id} was modified by another request")
+            return None
+        if update_data:
+            await self.db.commit()
+            await lead_cache.invalidate([lead_id])
+        return dict(zip(LEAD_RESPONSE_FIELDS, row))
+
+    async def bulk_update_leads(self, request: BulkLeadUpdate) -> Dict[str, Any]:
+        """Apply one set of changes to every selected lead with a single UPDATE.
+
+        The selected leads are locked in id order and only those that differ
+        from the changes are written, returning their old and new status. Each
+        status move is then logged as a STATUS_CHANGE activity by one insert
+        from arrays. With ``dry_run`` the counts are computed without writing.
+        """
+        changes = request.changes.model_dump(exclude_unset=True)
+        conditions = []
+        if request.lead_ids is not None:
+            conditions.append(Lead.id == any_(literal(request.lead_ids, ARRAY(Integer))))
+        if request.filters is not None:
+            conditions.extend(self.search_conditions(request.filters))
+        differs = or_(
+            *(getattr(Lead, field).is_distinct_from(value) for field, value in changes.items())
+        )
+        status_moves = (
+            Lead.status.is_distinct_from(changes["status"]) if "status" in changes else false()
+        )
+
+        if request.dry_run:
+            counts = (
+                await self.db.execute(
+                    select(
+                        func.count(),
+                        func.count().filter(differs),
+                        func.count().filter(status_moves),
+                    ).where(*conditions)
+                )
+            ).one()
+            return {
+                "matched": counts[0],
+                "updated": counts[1],
+                "status_changes": counts[2],
+                "dry_run": True,
+            }
 
+        selected = (
+            select(Lead.id, Lead.status)
+            .where(*conditions)
+            .order_by(Lead.id)
+            .with_for_update()
+            .cte("selected")
+        )
+        result = await self.db.execute(
+            update(Lead)
+            .where(Lead.id == selected.c.id, differs)
+            .values(**changes)
+            .returning(
+                Lead.id,
+                selected.c.status,
+                Lead.status,
+                select(func.count()).select_from(selected).scalar_subquery(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        if rows:
+            matched = rows[0][3]
+        else:
+            matched = await self.db.scalar(select(func.count()).where(*conditions))
+
+        moved = [
+            (lead_id, f"Status changed from {old.value} to {new.value}")
+            for lead_id, old, new, _ in rows
+            if old != new
+        ]
+        if moved:
+            lead_ids, descriptions = zip(*moved)
+            logged = (
+                func.unnest(
+                    bindparam("lead_ids", list(lead_ids), type_=ARRAY(Integer)),
+                    bindparam("descriptions", list(descriptions), type_=ARRAY(Text)),
+                )
+                .table_valued("lead_id", "description")
+                .render_derived(name="moved")
+            )
+            await self.db.execute(
+                insert(Activity).from_select(
+                    ["lead_id", "activity_type", "title", "description", "created_at"],
+                    select(
+                        logged.c.lead_id,
+                        literal(ActivityType.STATUS_CHANGE, Activity.activity_type.type),
+                        literal("Status changed (bulk update)"),
+                        logged.c.description,
+                        func.timezone("utc", func.statement_timestamp()),
+                    ),
+                )
+            )
         await self.db.commit()
-        await self.db.refresh(lead)
-        return lead
+        await lead_cache.invalidate(lead_id for lead_id, _, _, _ in rows)
+        return {
+            "matched": matched,
+            "updated": len(rows),
+            "status_changes": len(moved),
+            "dry_run": False,
+        }
 
     async def delete_lead(self, lead_id: int) -> bool:
-        """Delete a lead"""
-        lead = await self.get_lead(lead_id)
-        if not lead:
+        """Delete a lead; the database cascades to its activities and history"""
+        result = await self.db.execute(
+            delete(Lead).where(Lead.id == lead_id).returning(Lead.id)
+        )
+        if result.scalar_one_or_none() is None:
             return False
-
-        await self.db.delete(lead)
         await self.db.commit()
+        await lead_cache.invalidate([lead_id])
         return True
 
     async def calculate_lead_score(self, lead_id: int) -> int:
-        """Calculate and update lead score"""
-        lead = await self.get_lead(lead_id)
-        if not lead:
+        """Calculate and update lead score in one UPDATE ... RETURNING the score.
+
+        The score is computed in SQL from the lead's own columns, with engagement
+        decayed to now, exactly as ``calculate_score`` would in Python.
+        """
+        score = self.scoring_service.score_expression(
+            {name: getattr(Lead, name) for name in SCORING_COLUMNS + ENGAGEMENT_COLUMNS}
+        )
+        result = await self.db.execute(
+            update(Lead)
+            .where(Lead.id == lead_id)
+            .values(
+                lead_score=score,
+                is_qualified=score >= settings.LEAD_SCORE_THRESHOLD,
+                **self.scoring_service.version_values(),
+            )
+            .returning(Lead.lead_score)
+        )
+        lead_score = result.scalar_one_or_none()
+        if lead_score is None:
             return 0
+        await self.db.commit()
+        await lead_cache.invalidate([lead_id])
+        return lead_score
+
+    async def rescore_leads(self, chunk_size: int = 5000) -> Dict[str, Any]:
+        """Recalculate every lead's score with the vectorized batch scorer.
+
+        Leads are read in keyset chunks by id, each locked, scored column-wise,
+        written back with a single set-based UPDATE and committed before the
+        next is read, so no row stays locked for longer than its chunk. Rows
+        scored under older rules are restamped even when their score is
+        unchanged, and rewritten leads are dropped from the lead cache.
+        """
+        started = time.perf_counter()
+        threshold = settings.LEAD_SCORE_THRESHOLD
+        processed = updated = 0
+        last_id = 0
+
+        while True:
+            result = await self.db.execute(
+                select(
+                    Lead.id,
+                    Lead.job_title,
+                    func.split_part(Lead.email, "@", 2).label("email_domain"),
+                    Lead.source,
+                    Lead.company_id,
+                    Lead.phone,
+                    Lead.linkedin_url,
+                    Lead.engagement_score,
+                    Lead.engagement_updated_at,
+                    Lead.lead_score,
+                    Lead.is_qualified,
+                    Lead.score_rules_hash,
+                )
+                .where(Lead.id > last_id)
+                .order_by(Lead.id)
+                .limit(chunk_size)
+                .with_for_update()
+            )
+            chunk = pd.DataFrame(result.all(), columns=list(result.keys()))
+            if not len(chunk):
+                break
+
+            scores = self.scoring_service.score_batch(chunk)
+            qualified = scores >= threshold
+            changed = (
+                (scores != chunk["lead_score"].fillna(-1).to_numpy())
+                | (qualified != chunk["is_qualified"].fillna(False).to_numpy(dtype=bool))
+                | (chunk["score_rules_hash"] != self.scoring_service.plan.fingerprint).to_numpy()
+            )
+            processed += len(chunk)
+            last_id = int(chunk["id"].iloc[-1])
+            if changed.any():
+                changed_ids = chunk["id"].to_numpy()[changed]
+                updated += await self.write_scores(
+                    changed_ids, scores[changed], qualified[changed]
+                )
+                await self.db.commit()
+                await lead_cache.invalidate(changed_ids.tolist())
+            else:
+                await self.db.commit()
 
-        # Convert lead to dict for scoring
-        lead_data = {
-            "email": lead.email,
-            "job_title": lead.job_title,
-            "source": lead.source,
-            "company_id": lead.company_id,
+        return {
+            "processed": processed,
+            "updated": updated,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
         }
 
-        score = await self.scoring_service.calculate_score(lead_data)
-        lead.lead_score = score
-        lead.is_qualified = score >= 70  # Threshold for qualification
+    async def write_scores(
+        self, lead_ids: np.ndarray, scores: np.ndarray, qualified: np.ndarray
+    ) -> int:
+        """Bulk-update scores with one UPDATE ... FROM unnest(ids, scores, flags).
 
-        await self.db.commit()
-        return score
+        The current rule version is stamped on every written row. The caller
+        commits and then invalidates the cached leads.
+        """
+        rescored = (
+            func.unnest(
+                bindparam("lead_ids", lead_ids.tolist(), type_=ARRAY(Integer)),
+                bindparam("scores", scores.tolist(), type_=ARRAY(Integer)),
+                bindparam("qualified", qualified.tolist(), type_=ARRAY(Boolean)),
+            )
+            .table_valued("id", "lead_score", "is_qualified")
+            .render_derived(name="rescored")
+        )
+        result = await self.db.execute(
+            update(Lead)
+            .where(Lead.id == rescored.c.id)
+            .values(
+                lead_score=rescored.c.lead_score,
+                is_qualified=rescored.c.is_qualified,
+                **self.scoring_service.version_values(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
 
     async def sync_to_crm(self, lead_id: int, crm: str):
-        """Sync lead to external CRM"""
+        """Sync lead to external CRM, reading the lead through the cache"""
         lead = await self.get_lead(lead_id)
         if not lead:
             return {"error": "Lead not found"}
@@ -96,13 +797,20 @@ class LeadService:
         if crm.lower() == "hubspot":
             integration = HubSpotIntegration()
             result = await integration.sync_lead(lead)
-            lead.hubspot_id = result.get("id")
+            external_id = {"hubspot_id": result.get("id")}
         elif crm.lower() == "salesforce":
+            company_name = None
+            if lead.company_id is not None:
+                company_name = await self.db.scalar(
+                    select(Company.name).where(Company.id == lead.company_id)
+                )
             integration = SalesforceIntegration()
-            result = await integration.sync_lead(lead)
-            lead.salesforce_id = result.get("id")
+            result = await integration.sync_lead(lead, company_name)
+            external_id = {"salesforce_id": result.get("id")}
         else:
             return {"error": f"Unsupported CRM: {crm}"}
 
+        await self.db.execute(update(Lead).where(Lead.id == lead_id).values(**external_id))
         await self.db.commit()
+        await lead_cache.invalidate([lead_id])
         return {"status": "success", "crm": crm, "external_id": result.get("id")}
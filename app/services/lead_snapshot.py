@@ -0,0 +1,353 @@
+"""In-process columnar snapshot of leads for ad-hoc analytics"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.lead import Lead, LeadSource, LeadStatus
+from app.models.lead_deletion import DELETION_LOG_RETENTION, LeadDeletion
+
+# Re-read leads updated this long before the watermark, so rows whose
+# transaction committed after a refresh had already moved past them are not missed
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+# Database clock, on the same UTC basis as lead_deletions.deleted_at
+_DATABASE_NOW = func.timezone("utc", func.statement_timestamp())
+
+STATUSES = list(LeadStatus)
+SOURCES = list(LeadSource)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+SOURCE_CODES = {source: code for code, source in enumerate(SOURCES)}
+
+_COLUMNS = (
+    Lead.id,
+    cast(func.extract("epoch", Lead.created_at), BigInteger).label("created_at"),
+    Lead.updated_at,
+    Lead.status,
+    Lead.source,
+    Lead.campaign,
+    Lead.lead_score,
+    Lead.is_qualified,
+    Lead.company_id,
+)
+
+
+class LeadSnapshot:
+    """Columnar copy of the analytics columns of every lead, held in NumPy arrays.
+
+    Rows are kept sorted by lead id. Status and source are stored as enum
+    ordinals and campaigns as codes into a dictionary of distinct values (code
+    0 is no campaign), so filters and group-bys are integer comparisons.
+    ``refresh`` applies leads whose ``updated_at`` moved past the watermark and
+    drops the leads ``lead_deletions`` logged since the previous refresh; a
+    snapshot further behind than the log's retention reloads every lead.
+    """
+
+    def __init__(self, max_lag_seconds: Optional[float] = None):
+        if max_lag_seconds is None:
+            max_lag_seconds = settings.SNAPSHOT_MAX_LAG_SECONDS
+        self.max_lag_seconds = max_lag_seconds
+        self.campaigns: List[Optional[str]] = [None]
+        self._campaign_codes: Dict[Optional[str], int] = {None: 0}
+        self._lock = asyncio.Lock()
+        self.watermark: Optional[datetime] = None
+        self.deletions_watermark: Optional[datetime] = None
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+        self.rows_applied = 0
+        self.last_refresh_ms: Optional[float] = None
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def clear(self) -> None:
+        """Drop every row; the next refresh reloads all leads"""
+        self.ids = np.empty(0, dtype=np.int64)
+        self.created_at = np.empty(0, dtype="datetime64[s]")
+        self.status = np.empty(0, dtype=np.int8)
+        self.source = np.empty(0, dtype=np.int8)
+        self.campaign = np.empty(0, dtype=np.int32)
+        self.lead_score = np.empty(0, dtype=np.int32)
+        self.is_qualified = np.empty(0, dtype=bool)
+        self.company_id = np.empty(0, dtype=np.int32)  # 0 when the lead has no company
+        self.watermark = None
+        self.deletions_watermark = None
+        self.refreshed_at = None
+
+    @property
+    def lag_seconds(self) -> Optional[float]:
+        """Seconds since the snapshot last caught up with the database"""
+        if self.refreshed_at is None:
+            return None
+        return time.monotonic() - self.refreshed_at
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """Refresh the snapshot if it lags by more than ``max_lag_seconds``"""
+        lag = self.lag_seconds
+        if lag is not None and lag <= self.max_lag_seconds:
+            return
+        async with self._lock:
+            lag = self.lag_seconds
+            if lag is None or lag > self.max_lag_seconds:
+                await self.refresh(db)
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Apply leads changed since the watermark, returning the rows applied"""
+        started = time.perf_counter()
+        caught_up_at = time.monotonic()
+        now = await db.scalar(select(_DATABASE_NOW))
+        if (
+            self.deletions_watermark is not None
+            and self.deletions_watermark < now - DELETION_LOG_RETENTION
+        ):
+            # Deletions this old are pruned from the log, so start over
+            self.clear()
+        query = select(*_COLUMNS).order_by(Lead.id)
+        if self.watermark is not None:
+            query = query.where(Lead.updated_at >= self.watermark - WATERMARK_OVERLAP)
+
+        applied = 0
+        connection = await db.connection()
+        result = await connection.stream(
+            query.execution_options(yield_per=settings.SNAPSHOT_CHUNK_SIZE)
+        )
+        async for rows in result.partitions():
+            self._upsert(dict(zip((column.key for column in _COLUMNS), zip(*rows))))
+            applied += len(rows)
+
+        if self.deletions_watermark is not None:
+            await self._drop_deleted(db)
+        self.deletions_watermark = now
+
+        self.refreshes += 1
+        self.rows_applied += applied
+        self.refreshed_at = caught_up_at
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000
+        return applied
+
+    def mask(
+        self,
+        statuses: Optional[Sequence[LeadStatus]] = None,
+        sources: Optional[Sequence[LeadSource]] = None,
+        campaign: Optional[str] = None,
+        qualified: Optional[bool] = None,
+        has_company: Optional[bool] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """Boolean row mask for the given filters; unset filters match every row"""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if statuses:
+            mask &= np.isin(self.status, [STATUS_CODES[status] for status in statuses])
+        if sources:
+            mask &= np.isin(self.source, [SOURCE_CODES[source] for source in sources])
+        if campaign is not None:
+            code = self._campaign_codes.get(campaign)
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= self.campaign == code
+        if qualified is not None:
+            mask &= self.is_qualified == qualified
+        if has_company is not None:
+            mask &= (self.company_id != 0) == has_company
+        if min_score is not None:
+            mask &= self.lead_score >= min_score
+        if max_score is not None:
+            mask &= self.lead_score <= max_score
+        if created_from is not None:
+            mask &= self.created_at >= np.datetime64(created_from, "s")
+        if created_to is not None:
+            mask &= self.created_at <= np.datetime64(created_to, "s")
+        return mask
+
+    def aggregate(self, mask: np.ndarray, group_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lead, qualified and converted counts and average score per group"""
+        keys, labels = self._group_keys(group_by)
+        if keys is None:
+            keys = np.zeros(len(self.ids), dtype=np.int8)
+        keys = keys[mask]
+        if keys.dtype.kind in "biu":
+            # Dictionary codes index their groups directly, no sort needed
+            inverse = keys.astype(np.intp)
+            groups = np.arange(inverse.max() + 1 if len(inverse) else 0)
+        else:
+            groups, inverse = np.unique(keys, return_inverse=True)
+
+        leads = np.bincount(inverse, minlength=len(groups))
+        qualified = np.bincount(inverse, weights=self.is_qualified[mask], minlength=len(groups))
+        converted = np.bincount(
+            inverse,
+            weights=self.status[mask] == STATUS_CODES[LeadStatus.CONVERTED],
+            minlength=len(groups),
+        )
+        score_sum = np.bincount(inverse, weights=self.lead_score[mask], minlength=len(groups))
+
+        rows = []
+        for i, group in enumerate(groups):
+            if not leads[i]:
+                continue
+            row = {group_by: labels(group)} if group_by else {}
+            row.update(
+                {
+                    "leads": int(leads[i]),
+                    "qualified_leads": int(qualified[i]),
+                    "converted_leads": int(converted[i]),
+                    "avg_score": round(float(score_sum[i] / leads[i]), 2),
+                }
+            )
+            rows.append(row)
+        if not rows and not group_by:
+            rows.append({"leads": 0, "qualified_leads": 0, "converted_leads": 0, "avg_score": 0})
+        return rows
+
+    def score_histogram(self, mask: np.ndarray, bins: int = 10) -> List[Dict[str, Any]]:
+        """Lead counts per equal-width lead score bin over 0-100"""
+        counts, edges = np.histogram(self.lead_score[mask], bins=bins, range=(0, 100))
+        return [
+            {"min_score": round(float(low), 2), "max_score": round(float(high), 2), "leads": int(n)}
+            for low, high, n in zip(edges[:-1], edges[1:], counts)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, memory use and lag of the snapshot"""
+        arrays = (
+            self.ids,
+            self.created_at,
+            self.status,
+            self.source,
+            self.campaign,
+            self.lead_score,
+            self.is_qualified,
+            self.company_id,
+        )
+        dictionary_bytes = sys.getsizeof(self.campaigns) + sys.getsizeof(self._campaign_codes)
+        dictionary_bytes += sum(sys.getsizeof(value) for value in self.campaigns if value)
+        lag = self.lag_seconds
+        return {
+            "rows": len(self.ids),
+            "campaigns": len(self.campaigns) - 1,
+            "memory_bytes": sum(array.nbytes for array in arrays) + dictionary_bytes,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "lag_seconds": round(lag, 3) if lag is not None else None,
+            "max_lag_seconds": self.max_lag_seconds,
+            "refreshes": self.refreshes,
+            "rows_applied": self.rows_applied,
+            "last_refresh_ms": round(self.last_refresh_ms, 2)
+            if self.last_refresh_ms is not None
+            else None,
+        }
+
+    def _upsert(self, chunk: Dict[str, tuple]) -> None:
+        """Overwrite rows already held and merge new ones in id order"""
+        ids = np.array(chunk["id"], dtype=np.int64)
+        columns = {
+            "created_at": np.array(chunk["created_at"], dtype=np.int64).view("datetime64[s]"),
+            "status": np.array([STATUS_CODES[status] for status in chunk["status"]], np.int8),
+            "source": np.array([SOURCE_CODES[source] for source in chunk["source"]], np.int8),
+            "campaign": np.array(
+                [self._campaign_code(campaign) for campaign in chunk["campaign"]], np.int32
+            ),
+            "lead_score": np.array(
+                [score or 0 for score in chunk["lead_score"]], dtype=np.int32
+            ),
+            "is_qualified": np.array(
+                [bool(qualified) for qualified in chunk["is_qualified"]], dtype=bool
+            ),
+            "company_id": np.array(
+                [company_id or 0 for company_id in chunk["company_id"]], dtype=np.int32
+            ),
+        }
+        latest = max((at for at in chunk["updated_at"] if at is not None), default=None)
+        if latest is not None and (self.watermark is None or latest > self.watermark):
+            self.watermark = latest
+
+        positions = np.searchsorted(self.ids, ids)
+        held = positions < len(self.ids)
+        held[held] = self.ids[positions[held]] == ids[held]
+        for name, values in columns.items():
+            getattr(self, name)[positions[held]] = values[held]
+
+        new = ~held
+        if not new.any():
+            return
+        appended = len(self.ids) == 0 or ids[new][0] > self.ids[-1]
+        self.ids = np.concatenate([self.ids, ids[new]])
+        for name, values in columns.items():
+            setattr(self, name, np.concatenate([getattr(self, name), values[new]]))
+        if not appended:
+            order = np.argsort(self.ids, kind="stable")
+            self._take(order)
+
+    async def _drop_deleted(self, db: AsyncSession) -> None:
+        """Drop rows of leads deleted since the deletions watermark"""
+        result = await db.execute(
+            select(LeadDeletion.lead_id).where(
+                LeadDeletion.deleted_at >= self.deletions_watermark - WATERMARK_OVERLAP
+            )
+        )
+        deleted = np.fromiter(result.scalars(), dtype=np.int64)
+        if len(deleted):
+            self._take(np.flatnonzero(~np.isin(self.ids, deleted)))
+
+    def _take(self, index: np.ndarray) -> None:
+        """Keep the rows at ``index``, in that order"""
+        for name in (
+            "ids",
+            "created_at",
+            "status",
+            "source",
+            "campaign",
+            "lead_score",
+            "is_qualified",
+            "company_id",
+        ):
+            setattr(self, name, getattr(self, name)[index])
+
+    def _campaign_code(self, campaign: Optional[str]) -> int:
+        """Dictionary code of a campaign, assigning the next code to new values"""
+        if not campaign:
+            return 0
+        code = self._campaign_codes.get(campaign)
+        if code is None:
+            code = self._campaign_codes[campaign] = len(self.campaigns)
+            self.campaigns.append(campaign)
+        return code
+
+    def _group_keys(self, group_by: Optional[str]):
+        """Integer group key per row and a function labelling a key"""
+        if group_by is None:
+            return None, None
+        if group_by == "status":
+            return self.status, lambda code: STATUSES[code].value
+        if group_by == "source":
+            return self.source, lambda code: SOURCES[code].value
+        if group_by == "campaign":
+            return self.campaign, lambda code: self.campaigns[code]
+        if group_by == "qualified":
+            return self.is_qualified, bool
+        days = self.created_at.astype("datetime64[D]")
+        if group_by == "day":
+            keys = days
+        elif group_by == "week":
+            # Weeks start on Monday; 1970-01-01 was a Thursday
+            keys = days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+        elif group_by == "month":
+            keys = self.created_at.astype("datetime64[M]").astype("datetime64[D]")
+        else:
+            raise ValueError(f"Unknown snapshot grouping: {group_by}")
+        return keys, lambda day: str(day)
+
+
+# Shared snapshot for this API process
+lead_snapshot = LeadSnapshot()
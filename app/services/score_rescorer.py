@@ -0,0 +1,242 @@
+"""Background rescoring of leads scored under outdated rules"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from sqlalchemy import exists, func, or_, select, text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.lead import Lead
+from app.models.scoring_job import ScoringJob, ScoringJobStatus
+from app.services.lead_buffer import LeadWriteBuffer, lead_write_buffer
+from app.services.lead_cache import lead_cache
+from app.services.lead_service import LeadService
+from app.services.scoring_service import ScoringService, shared_scoring_service
+
+# Advisory lock serializing job transactions across app processes
+RESCORE_LOCK_ID = 4_807_001
+
+# Chunk pauses to spend waiting for the write buffer to drain before going ahead
+MAX_DEFERRALS = 10
+
+
+class StaleScoreRescorer:
+    """Rescores leads whose score was computed with outdated scoring rules.
+
+    Each rule set gets a ``scoring_jobs`` row. A chunk locks the next
+    ``chunk_size`` stale leads after the job's keyset cursor, skipping rows held
+    by live writes, rescores them with the batch scorer, stamps the current
+    rule version and advances the cursor in one transaction, so an interrupted
+    job resumes where it stopped. Chunks are spaced by ``throttle_ms`` and
+    deferred while the webhook write buffer has leads waiting.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        scoring_service: ScoringService = shared_scoring_service,
+        write_buffer: LeadWriteBuffer = lead_write_buffer,
+        chunk_size: Optional[int] = None,
+        throttle_ms: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.scoring_service = scoring_service
+        self.write_buffer = write_buffer
+        self.chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+        if throttle_ms is None:
+            throttle_ms = settings.RESCORE_THROTTLE_MS
+        self.throttle = throttle_ms / 1000
+        self._job_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background job is in progress in this process"""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> bool:
+        """Run the job in the background, returning False if it already runs"""
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self.run())
+        return True
+
+    async def stop(self) -> None:
+        """Cancel the background job; the next start resumes from its cursor"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run(self) -> None:
+        """Rescore stale leads chunk by chunk until none are left"""
+        try:
+            await self.prepare_job()
+            while await self.rescore_next_chunk():
+                await self._throttle()
+        except Exception as e:
+            await self._fail(e)
+            raise
+
+    async def prepare_job(self) -> ScoringJob:
+        """Return the job for the current rules, creating it when the rules changed"""
+        plan = self.scoring_service.plan
+        async with self.session_factory() as session:
+            await self._lock(session)
+            job = await self._latest_job(session)
+            if job is not None and job.rules_hash == plan.fingerprint:
+                if job.status == ScoringJobStatus.FAILED:
+                    job.status = ScoringJobStatus.RUNNING
+                    job.error = None
+            else:
+                if job is not None and job.status == ScoringJobStatus.RUNNING:
+                    job.status = ScoringJobStatus.SUPERSEDED
+                job = ScoringJob(
+                    rules_version=plan.version,
+                    rules_hash=plan.fingerprint,
+                    status=ScoringJobStatus.RUNNING,
+                    total_leads=await session.scalar(
+                        select(func.count(Lead.id)).where(self._is_stale())
+                    ),
+                )
+                session.add(job)
+            await session.commit()
+
+        self._job_id = job.id
+        return job
+
+    async def rescore_next_chunk(self) -> bool:
+        """Rescore one chunk of stale leads, returning whether work remains"""
+        if self._job_id is None:
+            await self.prepare_job()
+
+        async with self.session_factory() as session:
+            await self._lock(session)
+            job = await session.get(ScoringJob, self._job_id)
+            if job.status != ScoringJobStatus.RUNNING:
+                return False
+            started = time.perf_counter()
+
+            result = await session.execute(
+                select(
+                    Lead.id,
+                    Lead.job_title,
+                    func.split_part(Lead.email, "@", 2).label("email_domain"),
+                    Lead.source,
+                    Lead.company_id,
+                    Lead.phone,
+                    Lead.linkedin_url,
+                    Lead.engagement_score,
+                    Lead.engagement_updated_at,
+                    Lead.lead_score,
+                )
+                .where(Lead.id > job.last_lead_id, self._is_stale())
+                .order_by(Lead.id)
+                .limit(self.chunk_size)
+                .with_for_update(skip_locked=True)
+            )
+            chunk = pd.DataFrame(result.all(), columns=list(result.keys()))
+
+            if len(chunk):
+                scores = self.scoring_service.score_batch(chunk)
+                await LeadService(session).write_scores(
+                    chunk["id"].to_numpy(), scores, scores >= settings.LEAD_SCORE_THRESHOLD
+                )
+                job.processed += len(chunk)
+                job.changed += int((scores != chunk["lead_score"].fillna(-1).to_numpy()).sum())
+                job.last_lead_id = int(chunk["id"].iloc[-1])
+            elif job.last_lead_id and await session.scalar(
+                select(exists().where(self._is_stale()))
+            ):
+                # Leads skipped while locked by live writes: sweep again from the start
+                job.last_lead_id = 0
+            else:
+                job.status = ScoringJobStatus.COMPLETED
+                job.finished_at = datetime.utcnow()
+
+            job.active_seconds += time.perf_counter() - started
+            await session.commit()
+            await lead_cache.invalidate(chunk["id"].tolist())
+            return job.status == ScoringJobStatus.RUNNING
+
+    async def status(self) -> Dict[str, Any]:
+        """Progress of the latest job: done, remaining and rate"""
+        plan = self.scoring_service.plan
+        async with self.session_factory() as session:
+            job = await self._latest_job(session)
+
+        progress: Dict[str, Any] = {
+            "rules_version": plan.version,
+            "rules_hash": plan.fingerprint,
+            "running": self.running,
+        }
+        if job is None:
+            return {**progress, "job": None}
+
+        remaining = (
+            max(job.total_leads - job.processed, 0)
+            if job.status == ScoringJobStatus.RUNNING
+            else 0
+        )
+        rate = job.processed / job.active_seconds if job.active_seconds else 0
+        progress["job"] = {
+            "id": job.id,
+            "rules_version": job.rules_version,
+            "rules_hash": job.rules_hash,
+            "status": job.status,
+            "total": job.total_leads,
+            "processed": job.processed,
+            "changed": job.changed,
+            "remaining": remaining,
+            "rate_per_second": round(rate, 1),
+            "eta_seconds": round(remaining / rate, 1) if rate else None,
+            "error": job.error,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+            "finished_at": job.finished_at,
+        }
+        return progress
+
+    def _is_stale(self):
+        """Filter for leads not scored under the current rules"""
+        fingerprint = self.scoring_service.plan.fingerprint
+        return or_(Lead.score_rules_hash.is_(None), Lead.score_rules_hash != fingerprint)
+
+    async def _throttle(self) -> None:
+        """Pause between chunks, yielding to pending webhook ingest"""
+        await asyncio.sleep(self.throttle)
+        for _ in range(MAX_DEFERRALS):
+            if not self.write_buffer.pending:
+                break
+            await asyncio.sleep(self.throttle)
+
+    async def _fail(self, error: Exception) -> None:
+        """Record a failed run; the next start resumes the job"""
+        if self._job_id is None:
+            return
+        async with self.session_factory() as session:
+            job = await session.get(ScoringJob, self._job_id)
+            job.status = ScoringJobStatus.FAILED
+            job.error = repr(error)
+            await session.commit()
+
+    @staticmethod
+    async def _lock(session) -> None:
+        """Serialize job transactions with other app processes"""
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": RESCORE_LOCK_ID}
+        )
+
+    @staticmethod
+    async def _latest_job(session) -> Optional[ScoringJob]:
+        """Most recently created job"""
+        result = await session.execute(select(ScoringJob).order_by(ScoringJob.id.desc()).limit(1))
+        return result.scalar_one_or_none()
+
+
+# Shared rescorer started on application startup
+stale_score_rescorer = StaleScoreRescorer()
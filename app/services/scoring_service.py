@@ -1,117 +1,458 @@
 """Lead scoring service"""
 
-from typing import Dict, Any
+import hashlib
+import json
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import Integer, String, and_, case, cast, func
+from sqlalchemy.sql.elements import ColumnElement
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
+# Columns read by score_batch
+SCORING_COLUMNS = ("job_title", "email", "source", "company_id", "phone", "linkedin_url")
 
-class ScoringService:
-    """Service for calculating lead scores"""
+# Optional columns adding engagement points to a score
+ENGAGEMENT_COLUMNS = ("engagement_score", "engagement_updated_at")
 
-    def __init__(self):
-        # Define scoring rules
-        self.scoring_rules = {
-            "job_title": {
-                "keywords": {
-                    "ceo": 15,
-                    "cto": 15,
-                    "founder": 15,
-                    "director": 12,
-                    "manager": 10,
-                    "vp": 12,
-                    "head": 10,
-                    "lead": 8,
-                },
-                "max_score": 15,
-            },
-            "email_domain": {
-                "business": 10,  # Non-free email
-                "free": 0,  # Gmail, Yahoo, etc.
-            },
-            "source": {
-                "referral": 20,
-                "webinar": 15,
-                "landing_page": 12,
-                "website": 10,
-                "social_media": 8,
-                "cold_outreach": 5,
-            },
-            "company_size": {
-                "enterprise": 20,
-                "medium": 15,
-                "small": 10,
-                "startup": 5,
-            },
-        }
+# Email domains that do not indicate a business address
+FREE_EMAIL_DOMAINS = ("gmail.com", "yahoo.com", "hotmail.com", "outlook.com")
 
-    async def calculate_score(self, lead_data: Dict[str, Any]) -> int:
-        """Calculate lead score based on various factors"""
-        score = 0
+# Define scoring rules
+DEFAULT_SCORING_RULES: Dict[str, Any] = {
+    # Bump when the weights change; leads scored under other rules are rescored
+    "version": 2,
+    "job_title": {
+        # Checked in order; the first keyword found in the title wins
+        "keywords": {
+            "ceo": 15,
+            "cto": 15,
+            "founder": 15,
+            "director": 12,
+            "manager": 10,
+            "vp": 12,
+            "head": 10,
+            "lead": 8,
+        },
+        "max_score": 15,
+    },
+    "email_domain": {
+        "business": 10,  # Non-free email
+        "free": 0,  # Gmail, Yahoo, etc.
+        "free_domains": list(FREE_EMAIL_DOMAINS),
+    },
+    "source": {
+        "referral": 20,
+        "webinar": 15,
+        "landing_page": 12,
+        "website": 10,
+        "social_media": 8,
+        "cold_outreach": 5,
+    },
+    "source_default": 5,  # Any other source
+    "company_size": {
+        "enterprise": 20,
+        "medium": 15,
+        "small": 10,
+        "startup": 5,
+    },
+    "profile": {
+        "company": 15,  # Has associated company
+        "phone": 5,  # Provided phone number
+        "linkedin": 8,  # Has LinkedIn profile
+    },
+    "engagement": {
+        # Points per activity, decayed exponentially with the half-life below
+        "weights": {
+            "email_opened": 1,
+            "email_clicked": 3,
+            "page_view": 1,
+            "form_submission": 5,
+            "document_download": 5,
+            "call": 5,
+            "meeting": 10,
+        },
+        "half_life_days": 14,
+        "max_points": 20,
+    },
+    "max_score": 100,
+}
 
-        # Score based on job title
-        job_title = lead_data.get("job_title", "").lower()
-        for keyword, points in self.scoring_rules["job_title"]["keywords"].items():
-            if keyword in job_title:
-                score += points
-                break  # Only count the highest matching keyword
 
-        # Score based on email domain
-        email = lead_data.get("email", "")
-        if email:
-            domain = email.split("@")[1] if "@" in email else ""
-            free_domains = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
-            if domain not in free_domains and domain:
-                score += self.scoring_rules["email_domain"]["business"]
+@dataclass(frozen=True)
+class ScoringPlan:
+    """A rule set compiled once into lookup structures for repeated scoring.
 
-        # Score based on source
-        source = lead_data.get("source", "")
-        if source:
-            score += self.scoring_rules["source"].get(source, 5)
+    Plans are immutable and hold no per-call state, so a single instance is
+    safely shared across requests and threads.
+    """
 
-        # Score based on company
-        if lead_data.get("company_id"):
-            score += 15  # Has associated company
+    fingerprint: str
+    version: int
+    title_keywords: Tuple[Tuple[str, int], ...]
+    business_email_points: int
+    free_email_points: int
+    free_domains: frozenset
+    source_points: Mapping[str, int]
+    default_source_points: int
+    company_points: int
+    phone_points: int
+    linkedin_points: int
+    engagement_weights: Mapping[str, float]
+    engagement_decay_rate: float  # Per second
+    max_engagement_points: int
+    max_score: int
 
-        # Additional engagement factors
-        if lead_data.get("phone"):
-            score += 5  # Provided phone number
+    def title_points(self, job_title: Optional[str]) -> Optional[int]:
+        """Points for the first rule keyword found in a job title, if any"""
+        if job_title:
+            job_title = job_title.lower()
+            for keyword, points in self.title_keywords:
+                if keyword in job_title:
+                    return points
+        return None
 
-        if lead_data.get("linkedin_url"):
-            score += 8  # Has LinkedIn profile
+    def domain_points(self, domain: Optional[str]) -> int:
+        """Points for an email domain"""
+        if not domain:
+            return 0
+        if domain in self.free_domains:
+            return self.free_email_points
+        return self.business_email_points
 
-        # Cap score at 100
-        return min(score, 100)
+    def source_score(self, source: Any) -> int:
+        """Points for a lead source"""
+        return self.source_points.get(source, self.default_source_points)
 
-    def get_score_breakdown(self, lead_data: Dict[str, Any]) -> Dict[str, int]:
-        """Get detailed breakdown of score calculation"""
+    def activity_weight(self, activity_type: Any) -> float:
+        """Engagement added by one activity of a type"""
+        return self.engagement_weights.get(_enum_value(activity_type), 0)
+
+    def decayed_engagement(
+        self, engagement: Optional[float], updated_at: Optional[datetime], at: datetime
+    ) -> float:
+        """Engagement stored at ``updated_at``, decayed to ``at``"""
+        if not engagement or updated_at is None:
+            return engagement or 0.0
+        elapsed = max((at - updated_at).total_seconds(), 0)
+        return engagement * math.exp(-self.engagement_decay_rate * elapsed)
+
+    def add_engagement(
+        self,
+        engagement: Optional[float],
+        updated_at: Optional[datetime],
+        weight: float,
+        at: datetime,
+    ) -> Tuple[float, datetime]:
+        """Fold an activity at ``at`` into a running engagement score in O(1).
+
+        Returns the new score and its timestamp; activities older than the
+        stored timestamp are decayed into it instead of moving it back.
+        """
+        as_of = max(updated_at or at, at)
+        return (
+            self.decayed_engagement(engagement, updated_at, as_of)
+            + self.decayed_engagement(weight, at, as_of),
+            as_of,
+        )
+
+    def engagement_points(self, engagement: Optional[float]) -> int:
+        """Score points for a (decayed) engagement score, rounded half up"""
+        if not engagement or engagement < 0:
+            return 0
+        return min(math.floor(engagement + 0.5), self.max_engagement_points)
+
+    def breakdown(self, lead_data: Mapping[str, Any]) -> Dict[str, int]:
+        """Points awarded per scoring factor"""
         breakdown = {}
 
-        # Job title score
-        job_title = lead_data.get("job_title", "").lower()
-        for keyword, points in self.scoring_rules["job_title"]["keywords"].items():
-            if keyword in job_title:
-                breakdown["job_title"] = points
-                break
+        title_points = self.title_points(lead_data.get("job_title"))
+        if title_points is not None:
+            breakdown["job_title"] = title_points
 
-        # Email domain score
-        email = lead_data.get("email", "")
+        email = lead_data.get("email")
         if email:
-            domain = email.split("@")[1] if "@" in email else ""
-            free_domains = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
-            if domain not in free_domains and domain:
-                breakdown["email_domain"] = self.scoring_rules["email_domain"]["business"]
+            parts = email.split("@", 2)
+            domain_points = self.domain_points(parts[1] if len(parts) > 1 else None)
+            if domain_points:
+                breakdown["email_domain"] = domain_points
 
-        # Source score
-        source = lead_data.get("source", "")
+        source = lead_data.get("source")
         if source:
-            breakdown["source"] = self.scoring_rules["source"].get(source, 5)
+            breakdown["source"] = self.source_score(source)
 
-        # Company score
         if lead_data.get("company_id"):
-            breakdown["company"] = 15
-
-        # Additional fields
+            breakdown["company"] = self.company_points
         if lead_data.get("phone"):
-            breakdown["phone"] = 5
+            breakdown["phone"] = self.phone_points
         if lead_data.get("linkedin_url"):
-            breakdown["linkedin"] = 8
+            breakdown["linkedin"] = self.linkedin_points
+
+        engagement = lead_data.get("engagement_score")
+        if engagement:
+            engagement = self.decayed_engagement(
+                engagement, lead_data.get("engagement_updated_at"), datetime.utcnow()
+            )
+            engagement_points = self.engagement_points(engagement)
+            if engagement_points:
+                breakdown["engagement"] = engagement_points
 
         return breakdown
+
+    def score(self, lead_data: Mapping[str, Any]) -> int:
+        """Total score, capped at the plan's maximum"""
+        return min(sum(self.breakdown(lead_data).values()), self.max_score)
+
+    def score_frame(self, frame: pd.DataFrame) -> np.ndarray:
+        """Scores for every row of a DataFrame, computed column-wise.
+
+        Low-cardinality text columns are dictionary-encoded, each distinct value
+        is scored once with the same factor helpers as ``breakdown``, and the
+        points are gathered back by code. An ``email_domain`` column, when
+        present, is used instead of splitting ``email``.
+        """
+        rows = len(frame)
+        total = np.zeros(rows, dtype=np.int64)
+
+        if "job_title" in frame:
+            total += _points_by_value(
+                frame["job_title"], lambda title: self.title_points(title) or 0
+            )
+
+        if "email_domain" in frame:
+            total += _points_by_value(frame["email_domain"], self.domain_points)
+        elif "email" in frame:
+            codes, domains = _email_domains(frame["email"])
+            total += _gather([self.domain_points(domain) for domain in domains], codes)
+
+        if "source" in frame:
+            total += _points_by_value(
+                frame["source"], lambda source: self.source_score(_enum_value(source))
+            )
+
+        if "company_id" in frame:
+            total += pd.to_numeric(frame["company_id"]).fillna(0).ne(0).to_numpy() * (
+                self.company_points
+            )
+        for column_name, points in (
+            ("phone", self.phone_points),
+            ("linkedin_url", self.linkedin_points),
+        ):
+            if column_name in frame:
+                total += frame[column_name].fillna("").astype(bool).to_numpy() * points
+
+        if "engagement_score" in frame:
+            engagement = pd.to_numeric(frame["engagement_score"]).fillna(0).to_numpy(dtype=float)
+            if "engagement_updated_at" in frame:
+                elapsed = (
+                    (datetime.utcnow() - pd.to_datetime(frame["engagement_updated_at"]))
+                    .dt.total_seconds()
+                    .fillna(0)
+                    .clip(lower=0)
+                    .to_numpy()
+                )
+                engagement = engagement * np.exp(-self.engagement_decay_rate * elapsed)
+            total += np.clip(
+                np.floor(engagement + 0.5), 0, self.max_engagement_points
+            ).astype(np.int64)
+
+        return np.minimum(total, self.max_score)
+
+    def sql_decayed_engagement(self, engagement: Any, updated_at: Any, at: Any) -> ColumnElement:
+        """SQL for ``decayed_engagement``"""
+        elapsed = func.greatest(func.coalesce(func.extract("epoch", at - updated_at), 0), 0)
+        # Postgres raises on exp() underflow, so cap the exponent
+        exponent = func.least(self.engagement_decay_rate * elapsed, 700)
+        return func.coalesce(engagement, 0.0) * func.exp(-exponent)
+
+    def sql_expression(self, columns: Mapping[str, Any]) -> ColumnElement:
+        """The same score as a SQL expression over ``columns``.
+
+        Engagement counts when ``columns`` has ``engagement_score``, decayed to
+        now when it also has ``engagement_updated_at``.
+        """
+        job_title = func.lower(func.coalesce(columns["job_title"], ""))
+        title_points = case(
+            *[
+                (job_title.contains(keyword, autoescape=True), points)
+                for keyword, points in self.title_keywords
+            ],
+            else_=0,
+        )
+
+        domain = func.split_part(func.coalesce(columns["email"], ""), "@", 2)
+        email_points = case(
+            (
+                and_(domain != "", domain.not_in(sorted(self.free_domains))),
+                self.business_email_points,
+            ),
+            (domain != "", self.free_email_points),
+            else_=0,
+        )
+
+        # Text values or Postgres enum labels, which are upper-case member names
+        source = func.lower(cast(columns["source"], String))
+        source_points = case(
+            dict(self.source_points), value=source, else_=self.default_source_points
+        )
+        company_points = case((columns["company_id"].is_not(None), self.company_points), else_=0)
+        phone_points = case(
+            (func.coalesce(columns["phone"], "") != "", self.phone_points), else_=0
+        )
+        linkedin_points = case(
+            (func.coalesce(columns["linkedin_url"], "") != "", self.linkedin_points), else_=0
+        )
+
+        score = (
+            title_points
+            + email_points
+            + source_points
+            + company_points
+            + phone_points
+            + linkedin_points
+        )
+        if "engagement_score" in columns:
+            engagement = columns["engagement_score"]
+            if "engagement_updated_at" in columns:
+                engagement = self.sql_decayed_engagement(
+                    engagement, columns["engagement_updated_at"], func.timezone("utc", func.now())
+                )
+            score = score + func.least(
+                cast(func.floor(func.greatest(func.coalesce(engagement, 0), 0) + 0.5), Integer),
+                self.max_engagement_points,
+            )
+
+        return func.least(score, self.max_score)
+
+
+def _gather(points: List[int], codes: np.ndarray) -> np.ndarray:
+    """Expand per-value points to rows; code -1 (missing) scores 0"""
+    return np.append(np.asarray(points, dtype=np.int64), 0)[codes]
+
+
+def _points_by_value(values: pd.Series, points_for: Callable[[Any], int]) -> np.ndarray:
+    """Score each distinct value once and gather the points per row"""
+    codes, uniques = pd.factorize(values)
+    return _gather([points_for(value) for value in uniques], codes)
+
+
+def _email_domains(emails: pd.Series) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """Dictionary-encoded domains (text after the first "@") of an email column"""
+    emails = pa.array(emails.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    parts = pc.split_pattern(emails, "@", max_splits=2)
+    has_domain = pc.greater(pc.list_value_length(parts), 1)
+    parts = pc.if_else(has_domain, parts, pa.scalar([None, None], type=parts.type))
+    encoded = pc.dictionary_encode(pc.list_element(parts, 1))
+    return encoded.indices.fill_null(-1).to_numpy(), encoded.dictionary.to_pylist()
+
+
+def _enum_value(member: Any) -> str:
+    """Normalise an enum member, enum value or Postgres enum label to the value"""
+    return member.value if isinstance(member, Enum) else str(member).lower()
+
+
+_plans: Dict[str, ScoringPlan] = {}
+_plans_lock = threading.Lock()
+
+
+def rules_fingerprint(scoring_rules: Mapping[str, Any]) -> str:
+    """Stable hash identifying a rule set"""
+    canonical = json.dumps(scoring_rules, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def compile_scoring_rules(scoring_rules: Mapping[str, Any]) -> ScoringPlan:
+    """Compile a rule set, reusing the plan already built for identical rules"""
+    fingerprint = rules_fingerprint(scoring_rules)
+    plan = _plans.get(fingerprint)
+    if plan is not None:
+        return plan
+
+    email_rules = scoring_rules["email_domain"]
+    profile_rules = scoring_rules["profile"]
+    engagement_rules = scoring_rules.get("engagement", {})
+    half_life = engagement_rules.get("half_life_days", 0) * 24 * 60 * 60
+    plan = ScoringPlan(
+        fingerprint=fingerprint,
+        version=scoring_rules.get("version", 0),
+        title_keywords=tuple(
+            (keyword.lower(), points)
+            for keyword, points in scoring_rules["job_title"]["keywords"].items()
+        ),
+        business_email_points=email_rules["business"],
+        free_email_points=email_rules["free"],
+        free_domains=frozenset(email_rules["free_domains"]),
+        source_points=MappingProxyType(dict(scoring_rules["source"])),
+        default_source_points=scoring_rules["source_default"],
+        company_points=profile_rules["company"],
+        phone_points=profile_rules["phone"],
+        linkedin_points=profile_rules["linkedin"],
+        engagement_weights=MappingProxyType(dict(engagement_rules.get("weights", {}))),
+        engagement_decay_rate=math.log(2) / half_life if half_life else 0.0,
+        max_engagement_points=engagement_rules.get("max_points", 0),
+        max_score=scoring_rules["max_score"],
+    )
+    with _plans_lock:
+        return _plans.setdefault(fingerprint, plan)
+
+
+DEFAULT_SCORING_PLAN = compile_scoring_rules(DEFAULT_SCORING_RULES)
+
+
+class ScoringService:
+    """Service for calculating lead scores"""
+
+    def __init__(self, scoring_rules: Optional[Mapping[str, Any]] = None):
+        if scoring_rules is None:
+            self.scoring_rules = DEFAULT_SCORING_RULES
+            self.plan = DEFAULT_SCORING_PLAN
+        else:
+            self.scoring_rules = scoring_rules
+            self.plan = compile_scoring_rules(scoring_rules)
+
+    def score(self, lead_data: Dict[str, Any]) -> int:
+        """Calculate lead score synchronously"""
+        return self.plan.score(lead_data)
+
+    async def calculate_score(self, lead_data: Dict[str, Any]) -> int:
+        """Calculate lead score based on various factors"""
+        return self.plan.score(lead_data)
+
+    def get_score_breakdown(self, lead_data: Dict[str, Any]) -> Dict[str, int]:
+        """Get detailed breakdown of score calculation"""
+        return self.plan.breakdown(lead_data)
+
+    def version_values(self) -> Dict[str, Any]:
+        """Lead columns recording which rule set produced a score"""
+        return {"score_version": self.plan.version, "score_rules_hash": self.plan.fingerprint}
+
+    def score_batch(
+        self, leads: Union[pd.DataFrame, Mapping[str, Any]]
+    ) -> np.ndarray:
+        """Score many leads at once from columnar input.
+
+        ``leads`` is a DataFrame, or a mapping of column name to array, with any
+        of the ``SCORING_COLUMNS`` and ``ENGAGEMENT_COLUMNS``; missing columns
+        score as empty.
+        """
+        frame = leads if isinstance(leads, pd.DataFrame) else pd.DataFrame(dict(leads))
+        return self.plan.score_frame(frame)
+
+    def score_expression(self, columns: Mapping[str, Any]) -> ColumnElement:
+        """Build a SQL expression that scores rows set-based, like calculate_score.
+
+        ``columns`` maps ``job_title``, ``email``, ``source``, ``company_id``,
+        ``phone`` and ``linkedin_url`` to column expressions of the scored rows.
+        """
+        return self.plan.sql_expression(columns)
+
+
+# Shared instance for the default rules
+shared_scoring_service = ScoringService()
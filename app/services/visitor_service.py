@@ -0,0 +1,173 @@
+"""Unique visitor counting service"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.sketches import HyperLogLog
+from app.models.lead import LeadSource
+from app.models.visitor_daily_sketch import VisitorDailySketch
+
+
+class VisitorService:
+    """Service for approximate unique-visitor and unique-device counts.
+
+    Activities that carry an IP address are folded, as they are inserted, into
+    HyperLogLog sketches per (day, lead source, campaign): one of IP addresses
+    (visitors) and one of IP and user agent pairs (devices). Windows and groups
+    are answered by merging the daily sketches, never by scanning activities.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.precision = settings.VISITOR_SKETCH_PRECISION
+
+    async def record_visits(self, visits: Iterable[Dict[str, Any]]) -> int:
+        """Fold activities into the daily sketches, returning how many counted.
+
+        Each visit has the activity's ``ip_address``, ``user_agent`` and
+        ``created_at`` and its lead's ``source`` and ``campaign``; visits
+        without an IP address are skipped. Sketch rows are locked in key order
+        and merged in the caller's transaction; the caller commits.
+        """
+        sketches: Dict[Tuple, List] = {}
+        for visit in visits:
+            ip_address = visit.get("ip_address")
+            if not ip_address:
+                continue
+            day = (visit.get("created_at") or datetime.utcnow()).date()
+            key = (day, LeadSource(visit["source"]), visit.get("campaign") or "")
+            if key not in sketches:
+                sketches[key] = [HyperLogLog(self.precision), HyperLogLog(self.precision), 0]
+            entry = sketches[key]
+            entry[0].add(ip_address)
+            entry[1].add(f"{ip_address}|{visit.get('user_agent') or ''}")
+            entry[2] += 1
+        if not sketches:
+            return 0
+
+        keys = sorted(sketches)
+        sketch = VisitorDailySketch
+        result = await self.db.execute(
+            pg_insert(sketch)
+            .values([self._row(key, *sketches[key]) for key in keys])
+            .on_conflict_do_nothing()
+            .returning(sketch.day, sketch.source, sketch.campaign)
+        )
+        inserted = {tuple(row) for row in result.all()}
+
+        existing = [key for key in keys if key not in inserted]
+        if existing:
+            result = await self.db.execute(
+                select(sketch)
+                .where(tuple_(sketch.day, sketch.source, sketch.campaign).in_(existing))
+                .order_by(sketch.day, sketch.source, sketch.campaign)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+            merged = []
+            for row in result.scalars():
+                visitors, devices, activities = sketches[(row.day, row.source, row.campaign)]
+                merged.append(
+                    self._row(
+                        (row.day, row.source, row.campaign),
+                        visitors.merge(HyperLogLog.from_bytes(row.visitors)),
+                        devices.merge(HyperLogLog.from_bytes(row.devices)),
+                        activities + row.activities,
+                    )
+                )
+            await self.db.execute(update(sketch), merged)
+
+        return sum(entry[2] for entry in sketches.values())
+
+    async def get_unique_visitors(
+        self,
+        days: int = 30,
+        group_by: Optional[str] = None,
+        source: Optional[LeadSource] = None,
+        campaign: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Estimated unique visitors and devices over the last ``days`` days.
+
+        ``group_by`` is ``source``, ``campaign`` or ``day``. Counts are merged
+        sketch estimates; the response documents their error bounds.
+        """
+        sketch = VisitorDailySketch
+        query = select(sketch).where(
+            sketch.day >= (datetime.utcnow() - timedelta(days=days)).date()
+        )
+        if source is not None:
+            query = query.where(sketch.source == source)
+        if campaign is not None:
+            query = query.where(sketch.campaign == campaign)
+
+        groups: Dict[Any, List] = {}
+        for row in (await self.db.execute(query)).scalars():
+            key = getattr(row, group_by) if group_by else None
+            if key not in groups:
+                groups[key] = [HyperLogLog(self.precision), HyperLogLog(self.precision), 0]
+            entry = groups[key]
+            entry[0].merge(HyperLogLog.from_bytes(row.visitors))
+            entry[1].merge(HyperLogLog.from_bytes(row.devices))
+            entry[2] += row.activities
+        if not group_by and not groups:
+            groups[None] = [HyperLogLog(self.precision), HyperLogLog(self.precision), 0]
+
+        counts = []
+        for key, (visitors, devices, activities) in groups.items():
+            count = {group_by: self._label(key)} if group_by else {}
+            count.update(
+                {
+                    "unique_visitors": visitors.count(),
+                    "unique_devices": devices.count(),
+                    "activities": activities,
+                }
+            )
+            counts.append(count)
+        if group_by == "day":
+            counts.sort(key=lambda count: count["day"])
+        else:
+            counts.sort(key=lambda count: -count["unique_visitors"])
+
+        relative_error = HyperLogLog(self.precision).relative_error
+        return {
+            "days": days,
+            "group_by": group_by,
+            "counts": counts,
+            "error": {
+                "method": "HyperLogLog",
+                "precision": self.precision,
+                "relative_standard_error": round(relative_error, 4),
+                "relative_error_95": round(2 * relative_error, 4),
+                "note": "Unique counts are estimates: about 95% fall within "
+                f"±{2 * relative_error:.1%} of the true count. Counts below "
+                f"{int(2.5 * (1 << self.precision)):,} are near exact.",
+            },
+        }
+
+    @staticmethod
+    def _row(
+        key: Tuple, visitors: HyperLogLog, devices: HyperLogLog, activities: int
+    ) -> Dict[str, Any]:
+        """Column values of a sketch row"""
+        day, source, campaign = key
+        return {
+            "day": day,
+            "source": source,
+            "campaign": campaign,
+            "visitors": visitors.to_bytes(),
+            "devices": devices.to_bytes(),
+            "activities": activities,
+        }
+
+    @staticmethod
+    def _label(key: Any) -> Any:
+        """JSON-friendly group label"""
+        if isinstance(key, LeadSource):
+            return key.value
+        if hasattr(key, "isoformat"):
+            return key.isoformat()
+        return key
@@ -1,20 +1,24 @@
 """Webhook processing service"""
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from app.models.lead import Lead, LeadSource
 from app.models.activity import Activity, ActivityType
+from app.services.lead_buffer import LeadWriteBuffer
 from app.services.lead_service import LeadService
+from app.services.visitor_service import VisitorService
 from app.schemas.lead import LeadCreate
 
 
 class WebhookService:
     """Service for processing incoming webhooks"""
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, write_buffer: Optional[LeadWriteBuffer] = None):
         self.db = db
         self.lead_service = LeadService(db)
+        # When set, leads are written behind through the buffer instead of committed inline
+        self.write_buffer = write_buffer
 
     async def process_form_submission(self, data: Dict[str, Any]) -> Lead:
         """Process form submission webhook"""
@@ -33,22 +37,17 @@ class WebhookService:
             notes=data.get("message"),
         )
 
-        # Create lead
-        lead = await self.lead_service.create_lead(lead_data)
-
-        # Track activity
-        activity = Activity(
-            lead_id=lead.id,
-            activity_type=ActivityType.FORM_SUBMISSION,
-            title="Form Submitted",
-            description=f"Form submission from {data.get('form_name', 'unknown form')}",
-            ip_address=data.get("ip_address"),
-            user_agent=data.get("user_agent"),
+        # Create lead and track activity
+        return await self._capture_lead(
+            lead_data,
+            {
+                "activity_type": ActivityType.FORM_SUBMISSION,
+                "title": "Form Submitted",
+                "description": f"Form submission from {data.get('form_name', 'unknown form')}",
+                "ip_address": data.get("ip_address"),
+                "user_agent": data.get("user_agent"),
+            },
         )
-        self.db.add(activity)
-        await self.db.commit()
-
-        return lead
 
     async def process_landing_page_conversion(self, data: Dict[str, Any]) -> Lead:
         """Process landing page conversion"""
@@ -63,20 +62,16 @@ class WebhookService:
             utm_campaign=data.get("utm_campaign"),
         )
 
-        lead = await self.lead_service.create_lead(lead_data)
-
         # Track page view activity
-        activity = Activity(
-            lead_id=lead.id,
-            activity_type=ActivityType.PAGE_VIEW,
-            title="Landing Page Conversion",
-            description=f"Converted on {data.get('page_name', 'landing page')}",
-            ip_address=data.get("ip_address"),
+        return await self._capture_lead(
+            lead_data,
+            {
+                "activity_type": ActivityType.PAGE_VIEW,
+                "title": "Landing Page Conversion",
+                "description": f"Converted on {data.get('page_name', 'landing page')}",
+                "ip_address": data.get("ip_address"),
+            },
         )
-        self.db.add(activity)
-        await self.db.commit()
-
-        return lead
 
     async def process_chat_conversation(self, data: Dict[str, Any]) -> Lead:
         """Process chat widget lead capture"""
@@ -87,16 +82,32 @@ class WebhookService:
             notes=data.get("message"),
         )
 
-        lead = await self.lead_service.create_lead(lead_data)
-
         # Track chat activity
-        activity = Activity(
-            lead_id=lead.id,
-            activity_type=ActivityType.NOTE,
-            title="Chat Conversation",
-            description=f"Chat conversation: {data.get('message', '')[:100]}",
+        return await self._capture_lead(
+            lead_data,
+            {
+                "activity_type": ActivityType.NOTE,
+                "title": "Chat Conversation",
+                "description": f"Chat conversation: {data.get('message', '')[:100]}",
+            },
+        )
+
+    async def _capture_lead(
+        self, lead_data: LeadCreate, activity_values: Dict[str, Any]
+    ) -> Lead:
+        """Persist a captured lead with its activity, inline or through the write buffer"""
+        if self.write_buffer is not None:
+            lead_values = await self.lead_service.build_lead_values(
+                lead_data, activity_values["activity_type"]
+            )
+            lead_id = await self.write_buffer.submit(lead_values, activity_values)
+            return Lead(id=lead_id, **lead_values)
+
+        lead = await self.lead_service.create_lead(lead_data, activity_values["activity_type"])
+        self.db.add(Activity(lead_id=lead.id, **activity_values))
+        await VisitorService(self.db).record_visits(
+            [{**activity_values, "source": lead.source, "campaign": lead.campaign}]
         )
-        self.db.add(activity)
         await self.db.commit()
 
         return lead
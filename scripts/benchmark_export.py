@@ -0,0 +1,94 @@
+"""Benchmark for the streaming lead export
+
+Streams every lead in the configured database through the exporter and
+reports throughput and memory: how far the export raised the process's peak
+resident size and, with --trace-allocations, the peak of Python allocations
+while streaming (tracing slows the export several times over, so throughput
+is only meaningful without it). With --legacy-rows that many rows are also
+read through OFFSET pages of 100, the way the warehouse sync used to, for
+comparison.
+
+Usage:
+    python scripts/benchmark_export.py [--format ndjson|csv] [--chunk-size 5000]
+    python scripts/benchmark_export.py --trace-allocations
+    python scripts/benchmark_export.py --legacy-rows 20000
+"""
+
+import argparse
+import asyncio
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal, engine
+from app.services.lead_export import EXPORT_FORMATS, LeadExporter
+from app.services.lead_service import LeadService
+
+
+def peak_rss_mb() -> float:
+    """Peak resident size of this process so far (ru_maxrss is KiB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run(format: str, chunk_size: int, trace_allocations: bool, legacy_rows: int):
+    """Stream the export, then optionally page through OFFSET"""
+    engine.echo = False
+    exporter = LeadExporter(chunk_size=chunk_size)
+
+    rss_before = peak_rss_mb()
+    if trace_allocations:
+        tracemalloc.start()
+    started = time.perf_counter()
+    exported_bytes = 0
+    async for chunk in exporter.stream(format=format):
+        exported_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+    if trace_allocations:
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    rows = exporter.rows_exported
+    print(f"⏱  Lead export ({format}, {chunk_size:,} rows per chunk)")
+    print(f"   Rows:              {rows:,}")
+    print(f"   Output:            {exported_bytes / 1e6:,.1f} MB")
+    print(f"   Duration:          {elapsed:,.2f}s")
+    print(f"   Throughput:        {rows / elapsed if elapsed else 0:,.0f} rows/s")
+    print(f"   Peak RSS:          {peak_rss_mb():,.1f} MB (+{peak_rss_mb() - rss_before:,.1f} MB)")
+    if trace_allocations:
+        print(f"   Peak allocations:  {peak_traced / 1e6:,.1f} MB")
+
+    if legacy_rows:
+        started = time.perf_counter()
+        read = 0
+        async with AsyncSessionLocal() as db:
+            service = LeadService(db)
+            while read < legacy_rows:
+                page = await service.get_leads(skip=read, limit=100)
+                if not page:
+                    break
+                read += len(page)
+                db.expunge_all()
+        elapsed = time.perf_counter() - started
+        print(f"   OFFSET pages of 100: {read:,} rows at {read / elapsed:,.0f} rows/s")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming lead export")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--trace-allocations", action="store_true")
+    parser.add_argument("--legacy-rows", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.format, args.chunk_size, args.trace_allocations, args.legacy_rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark for the lead cache
+
+Re-reads a hot set of --hot leads from the configured database --reads times,
+picking leads with a skewed (Zipf-like) distribution the way widgets and the
+CRM reconciler do, once straight from the database and once through the lead
+cache, and reports latency percentiles and the cache's hit ratio, evictions
+and memory.
+
+Usage:
+    python scripts/benchmark_lead_cache.py [--reads 20000] [--hot 500] [--cache-size 10000]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.lead import Lead
+from app.services.lead_cache import LeadCache
+from app.services.lead_service import LeadService
+
+
+async def measure(read, lead_ids):
+    """Time one read per lead id, returning p50 and p99 latency in ms"""
+    latencies = []
+    for lead_id in lead_ids:
+        started = time.perf_counter()
+        await read(lead_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return percentiles[49], percentiles[98]
+
+
+async def run(reads: int, hot: int, cache_size: int):
+    """Read the hot leads with and without the cache"""
+    engine.echo = False
+    cache = LeadCache(maxsize=cache_size)
+    async with AsyncSessionLocal() as db:
+        hot_ids = (
+            await db.execute(select(Lead.id).order_by(func.random()).limit(hot))
+        ).scalars().all()
+        weights = [1 / rank for rank in range(1, len(hot_ids) + 1)]
+        lead_ids = random.choices(hot_ids, weights=weights, k=reads)
+
+        service = LeadService(db)
+        uncached = await measure(service._load_lead, lead_ids)
+        cached = await measure(
+            lambda lead_id: cache.get(lead_id, lambda: service._load_lead(lead_id)), lead_ids
+        )
+    await engine.dispose()
+
+    stats = cache.stats()
+    print(f"⏱  Lead reads, {reads:,} over {len(hot_ids):,} hot leads")
+    print(f"   Database:     p50 {uncached[0]:6.3f} ms   p99 {uncached[1]:6.3f} ms")
+    print(f"   Lead cache:   p50 {cached[0]:6.3f} ms   p99 {cached[1]:6.3f} ms")
+    print(f"   Hit ratio:    {stats['hit_ratio']:.2%}")
+    print(f"   Evictions:    {stats['local']['evictions']:,}")
+    print(f"   Memory:       {stats['memory_bytes'] / 1024:,.1f} KiB in {stats['local']['size']:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lead cache")
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--hot", type=int, default=500)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.reads, args.hot, args.cache_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Micro-benchmark for lead scoring
+
+Reports the per-lead cost of the compiled scoring plan for a mix of
+representative leads, plus the cost of building a ScoringService.
+
+Usage:
+    python scripts/benchmark_scoring.py [--iterations 200000]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.lead import LeadSource
+from app.services.scoring_service import ScoringService, shared_scoring_service
+
+SAMPLE_LEADS = [
+    {
+        "email": "john.smith@techcorp.com",
+        "job_title": "CEO",
+        "source": LeadSource.REFERRAL,
+        "company_id": 1,
+        "phone": "+1-555-0101",
+        "linkedin_url": "https://linkedin.com/in/johnsmith",
+    },
+    {
+        "email": "emily.davis@startup.io",
+        "job_title": "VP of Marketing",
+        "source": LeadSource.SOCIAL_MEDIA,
+    },
+    {
+        "email": "jess.martinez@gmail.com",
+        "job_title": "Marketing Coordinator",
+        "source": LeadSource.COLD_OUTREACH,
+    },
+    {"email": "visitor@hotmail.com", "source": LeadSource.CHAT_WIDGET},
+]
+
+
+def per_call_ns(func, iterations: int) -> float:
+    """Best-of-five cost of one call in nanoseconds"""
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=5, number=iterations)) / iterations * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lead scoring")
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    service = shared_scoring_service
+    leads = SAMPLE_LEADS
+    rounds = max(args.iterations // len(leads), 1)
+
+    def score_all():
+        for lead in leads:
+            service.score(lead)
+
+    def breakdown_all():
+        for lead in leads:
+            service.get_score_breakdown(lead)
+
+    print(f"⏱  Scoring benchmark (rule set {service.plan.fingerprint})")
+    print(f"   score():               {per_call_ns(score_all, rounds) / len(leads):8.0f} ns/lead")
+    print(
+        f"   get_score_breakdown(): {per_call_ns(breakdown_all, rounds) / len(leads):8.0f} ns/lead"
+    )
+    print(f"   ScoringService():      {per_call_ns(ScoringService, rounds):8.0f} ns/instance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Micro-benchmark for lead list serialization
+
+Compares the cost of turning one page of leads into a JSON body the way the
+list endpoints used to (ORM objects validated into LeadResponse, dumped and
+encoded with json) with the projected path (selected column tuples zipped into
+dicts and encoded with orjson), for every field and for a 5-field projection.
+
+Usage:
+    python scripts/benchmark_serialization.py [--rows 1000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.models.lead import Lead, LeadSource, LeadStatus
+from app.schemas.lead import LEAD_RESPONSE_FIELDS, LeadResponse
+
+PROJECTED_FIELDS = ("id", "email", "status", "lead_score", "created_at")
+
+
+def sample_leads(rows: int) -> List[Lead]:
+    """Transient leads with every response field set"""
+    now = datetime(2024, 6, 1, 12, 30, 15, 123456)
+    return [
+        Lead(
+            id=i,
+            first_name="Jordan",
+            last_name=f"Lee{i}",
+            email=f"jordan.lee{i}@example.com",
+            phone="+1-555-0100",
+            job_title="VP of Marketing",
+            company_id=i % 500 or None,
+            source=list(LeadSource)[i % len(LeadSource)],
+            campaign="spring-launch",
+            linkedin_url=f"https://linkedin.com/in/jordanlee{i}",
+            location="Austin, TX",
+            utm_source="google",
+            utm_medium="cpc",
+            utm_campaign="spring",
+            notes=None,
+            tags="enterprise,renewal",
+            status=list(LeadStatus)[i % len(LeadStatus)],
+            lead_score=i % 101,
+            is_qualified=i % 101 >= 70,
+            hubspot_id=None,
+            salesforce_id=None,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+            last_contacted_at=None,
+        )
+        for i in range(rows)
+    ]
+
+
+def per_page_ms(func) -> float:
+    """Best-of-five cost of one call in milliseconds"""
+    timer = timeit.Timer(func)
+    number = 20
+    return min(timer.repeat(repeat=5, number=number)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lead list serialization")
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    leads = sample_leads(args.rows)
+    adapter = TypeAdapter(List[LeadResponse])
+    full_rows = [tuple(getattr(lead, field) for field in LEAD_RESPONSE_FIELDS) for lead in leads]
+    projected_rows = [tuple(getattr(lead, field) for field in PROJECTED_FIELDS) for lead in leads]
+
+    def pydantic_page():
+        validated = adapter.validate_python(leads, from_attributes=True)
+        return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+    def orjson_page(rows, fields):
+        return orjson.dumps([dict(zip(fields, row)) for row in rows])
+
+    assert json.loads(pydantic_page()) == json.loads(orjson_page(full_rows, LEAD_RESPONSE_FIELDS))
+
+    print(f"⏱  Lead list serialization, {args.rows:,}-row page")
+    print(f"   LeadResponse + json (before):    {per_page_ms(pydantic_page):7.2f} ms")
+    print(
+        "   dict rows + orjson, all fields:  "
+        f"{per_page_ms(lambda: orjson_page(full_rows, LEAD_RESPONSE_FIELDS)):7.2f} ms"
+    )
+    print(
+        f"   dict rows + orjson, {len(PROJECTED_FIELDS)} fields:    "
+        f"{per_page_ms(lambda: orjson_page(projected_rows, PROJECTED_FIELDS)):7.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark for single-lead updates
+
+Runs --requests updates of random leads in the configured database, each in
+its own session the way the PUT endpoint does (service call, then the commit
+from get_db), and reports latency percentiles and database round trips per
+request: statements, BEGIN, COMMIT and ROLLBACK sent over the connection. The
+returning path (one UPDATE ... RETURNING, optionally with an If-Match version
+precondition) is compared with the previous load, mutate, commit and refresh.
+
+Usage:
+    python scripts/benchmark_updates.py [--requests 2000] [--conditional]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, func, select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.lead import Lead
+from app.schemas.lead import LeadResponse, LeadUpdate
+from app.services.lead_service import LeadService
+
+round_trips = 0
+
+
+def count_round_trip(*args, **kwargs):
+    """Count a message the connection waits on the server for"""
+    global round_trips
+    round_trips += 1
+
+
+for event_name in ("before_cursor_execute", "begin", "commit", "rollback"):
+    event.listen(engine.sync_engine, event_name, count_round_trip)
+
+
+async def legacy_update(db, lead_id: int, changes: LeadUpdate, versions) -> LeadResponse:
+    """Update the way LeadService.update_lead used to"""
+    lead = (await db.execute(select(Lead).where(Lead.id == lead_id))).scalar_one()
+    for field, value in changes.model_dump(exclude_unset=True).items():
+        setattr(lead, field, value)
+    await db.commit()
+    await db.refresh(lead)
+    return LeadResponse.model_validate(lead)
+
+
+async def returning_update(db, lead_id: int, changes: LeadUpdate, versions) -> LeadResponse:
+    """Update with one UPDATE ... RETURNING"""
+    return LeadResponse.model_validate(await LeadService(db).update_lead(lead_id, changes))
+
+
+async def conditional_update(db, lead_id: int, changes: LeadUpdate, versions) -> LeadResponse:
+    """Update with a version precondition, as a PUT with If-Match does"""
+    lead = await LeadService(db).update_lead(lead_id, changes, [versions[lead_id]])
+    versions[lead_id] = lead["updated_at"]
+    return LeadResponse.model_validate(lead)
+
+
+async def lead_versions(lead_ids: List[int]) -> Dict[int, datetime]:
+    """Current updated_at of each lead"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Lead.id, Lead.updated_at).where(Lead.id.in_(lead_ids))
+        )
+        return dict(result.tuples().all())
+
+
+async def measure(update: Callable[..., Awaitable[LeadResponse]], lead_ids: List[int]):
+    """Run one update per lead id, returning p50 and p99 latency and round trips"""
+    global round_trips
+    versions = await lead_versions(lead_ids)
+    latencies = []
+    round_trips = 0
+    for i, lead_id in enumerate(lead_ids):
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await update(db, lead_id, LeadUpdate(notes=f"reconciled {i}"), versions)
+            await db.commit()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return percentiles[49], percentiles[98], round_trips / len(lead_ids)
+
+
+async def run(requests: int, conditional: bool):
+    """Time the update paths over the same random leads"""
+    engine.echo = False
+    async with AsyncSessionLocal() as db:
+        lead_ids = (
+            await db.execute(select(Lead.id).order_by(func.random()).limit(requests))
+        ).scalars().all()
+
+    paths = [("load + commit + refresh", legacy_update), ("UPDATE ... RETURNING", returning_update)]
+    if conditional:
+        paths.append(("UPDATE ... RETURNING, If-Match", conditional_update))
+
+    # Warm the pool and statement caches
+    for _, update in paths:
+        await measure(update, lead_ids[:50])
+
+    print(f"⏱  Single-lead updates, {len(lead_ids):,} requests")
+    for label, update in paths:
+        p50, p99, trips = await measure(update, lead_ids)
+        print(f"   {label:<32} p50 {p50:6.2f} ms   p99 {p99:6.2f} ms   {trips:.1f} round trips")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-lead updates")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--conditional", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests, args.conditional))
+
+
+if __name__ == "__main__":
+    main()
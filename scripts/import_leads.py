@@ -0,0 +1,334 @@
+"""Bulk-import leads from CSV or Parquet files using COPY
+
+Rows are streamed from the file in chunks and copied into a temporary staging
+table with asyncpg's binary COPY protocol. A single set-based statement then
+creates missing companies (resolved by domain), scores every lead and inserts
+the leads, skipping emails that already exist. Rows with an invalid email or
+source, or a value longer than its column allows, are rejected before staging
+and counted per reason; repeated emails within the file keep their first row.
+
+Usage:
+    python scripts/import_leads.py leads.csv
+    python scripts/import_leads.py leads.parquet --chunk-size 100000
+"""
+
+import argparse
+import asyncio
+import csv
+import resource
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncpg
+from sqlalchemy import column
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.company import Company
+from app.models.lead import Lead, LeadSource
+from app.services.scoring_service import ScoringService
+
+STAGING_TABLE = "leads_import_staging"
+
+# Lead columns copied verbatim from the file
+LEAD_COLUMNS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "job_title",
+    "campaign",
+    "linkedin_url",
+    "location",
+    "utm_source",
+    "utm_medium",
+    "utm_campaign",
+    "notes",
+    "tags",
+)
+STAGING_COLUMNS = ("row_number", *LEAD_COLUMNS, "source", "company_name", "company_domain")
+
+VALID_SOURCES = {source.value for source in LeadSource}
+
+# Column length limits staged values must fit; a new company is named after its
+# domain when the row has no company name
+MAX_LENGTHS = {
+    **{name: Lead.__table__.c[name].type.length for name in LEAD_COLUMNS},
+    "company_name": Company.__table__.c.name.type.length,
+    "company_domain": min(
+        Company.__table__.c.domain.type.length, Company.__table__.c.name.type.length
+    ),
+}
+
+
+def read_csv(path: Path, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield CSV rows as dicts, ``chunk_size`` at a time"""
+    with path.open(newline="", encoding="utf-8") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def read_parquet(path: Path, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield Parquet rows as dicts, one record batch at a time"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("❌ Parquet import requires pyarrow (pip install pyarrow)")
+
+    parquet_file = pq.ParquetFile(path)
+    wanted = set(STAGING_COLUMNS) | {"source"}
+    columns = [name for name in parquet_file.schema_arrow.names if name in wanted]
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield batch.to_pylist()
+
+
+def _clean(value: Any) -> Optional[str]:
+    """Normalise a cell to a stripped string or None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def to_staging_records(
+    rows: List[Dict[str, Any]], first_row: int, default_source: str
+) -> Tuple[List[tuple], Counter]:
+    """Convert file rows to staging tuples, returning them with rejections per reason"""
+    records = []
+    rejected: Counter = Counter()
+    for offset, row in enumerate(rows):
+        values = {name: _clean(row.get(name)) for name in (*LEAD_COLUMNS, "company_name")}
+        company_domain = _clean(row.get("company_domain"))
+        values["company_domain"] = company_domain.lower() if company_domain else None
+        source = (_clean(row.get("source")) or default_source).lower()
+
+        email = values["email"]
+        if not email or "@" not in email:
+            rejected["invalid email"] += 1
+            continue
+        if source not in VALID_SOURCES:
+            rejected["invalid source"] += 1
+            continue
+        too_long = next(
+            (
+                name
+                for name, limit in MAX_LENGTHS.items()
+                if limit and values[name] and len(values[name]) > limit
+            ),
+            None,
+        )
+        if too_long:
+            rejected[f"{too_long} over {MAX_LENGTHS[too_long]} characters"] += 1
+            continue
+
+        records.append(
+            (
+                first_row + offset,
+                *(values[name] for name in LEAD_COLUMNS),
+                source,
+                values["company_name"],
+                values["company_domain"],
+            )
+        )
+    return records, rejected
+
+
+def build_merge_sql() -> str:
+    """Build the set-based statement that merges staged rows into companies and leads"""
+    scoring_service = ScoringService()
+    score = scoring_service.score_expression(
+        {
+            name: column(name)
+            for name in ("job_title", "email", "source", "company_id", "phone", "linkedin_url")
+        }
+    )
+    score_sql = score.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    lead_columns = ", ".join(LEAD_COLUMNS)
+
+    return f"""
+        WITH staged AS (
+            SELECT DISTINCT ON (email) *
+            FROM {STAGING_TABLE}
+            ORDER BY email, row_number
+        ),
+        new_companies AS (
+            INSERT INTO companies (name, domain, created_at, updated_at)
+            SELECT DISTINCT ON (company_domain)
+                coalesce(company_name, company_domain), company_domain,
+                timezone('utc', now()), timezone('utc', now())
+            FROM staged
+            WHERE company_domain IS NOT NULL
+            ORDER BY company_domain, row_number
+            ON CONFLICT (domain) DO NOTHING
+            RETURNING id, domain
+        ),
+        resolved AS (
+            SELECT staged.*, coalesce(new_companies.id, companies.id) AS company_id
+            FROM staged
+            LEFT JOIN new_companies ON new_companies.domain = staged.company_domain
+            LEFT JOIN companies ON companies.domain = staged.company_domain
+        ),
+        scored AS (
+            SELECT resolved.*, {score_sql} AS lead_score
+            FROM resolved
+        ),
+        inserted AS (
+            INSERT INTO leads (
+                {lead_columns}, source, company_id, status,
+                lead_score, is_qualified, score_version, score_rules_hash,
+                created_at, updated_at
+            )
+            SELECT
+                {lead_columns}, upper(source)::leadsource, company_id, 'NEW',
+                lead_score, lead_score >= {int(settings.LEAD_SCORE_THRESHOLD)},
+                {int(scoring_service.plan.version)}, '{scoring_service.plan.fingerprint}',
+                timezone('utc', now()), timezone('utc', now())
+            FROM scored
+            ON CONFLICT (email) DO NOTHING
+            RETURNING id
+        )
+        SELECT
+            (SELECT count(*) FROM staged) AS staged,
+            (SELECT count(*) FROM new_companies) AS companies_created,
+            (SELECT count(*) FROM inserted) AS leads_inserted
+    """
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def load_leads(
+    conn: asyncpg.Connection,
+    chunks: Iterable[List[Dict[str, Any]]],
+    default_source: str,
+    on_chunk: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """COPY file rows into a staging table and merge them, returning the import counts.
+
+    ``chunks`` yields lists of row dicts, as ``read_csv`` and ``read_parquet``
+    do; ``on_chunk`` is called with the rows read so far after each is staged.
+    """
+    started = time.perf_counter()
+    rows_read = 0
+    rows_staged = 0
+    rejected: Counter = Counter()
+    await conn.execute(
+        f"""
+        CREATE TEMP TABLE {STAGING_TABLE} (
+            row_number bigint,
+            {", ".join(f"{name} text" for name in STAGING_COLUMNS[1:])}
+        )
+        """
+    )
+    try:
+        for rows in chunks:
+            records, chunk_rejected = to_staging_records(rows, rows_read + 1, default_source)
+            rows_read += len(rows)
+            rows_staged += len(records)
+            rejected += chunk_rejected
+            await conn.copy_records_to_table(
+                STAGING_TABLE, records=records, columns=STAGING_COLUMNS
+            )
+            if on_chunk is not None:
+                on_chunk(rows_read)
+
+        copied = time.perf_counter()
+        async with conn.transaction():
+            result = await conn.fetchrow(build_merge_sql())
+        finished = time.perf_counter()
+    finally:
+        await conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+    return {
+        "rows_read": rows_read,
+        "rejected": rejected,
+        "duplicates": rows_staged - result["staged"],
+        "unique_emails": result["staged"],
+        "leads_inserted": result["leads_inserted"],
+        "existing_skipped": result["staged"] - result["leads_inserted"],
+        "companies_created": result["companies_created"],
+        "copy_seconds": copied - started,
+        "merge_seconds": finished - copied,
+    }
+
+
+async def import_leads(path: Path, file_format: str, chunk_size: int, default_source: str):
+    """Stream a lead file into the database"""
+    reader = read_parquet if file_format == "parquet" else read_csv
+    dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    conn = await asyncpg.connect(dsn)
+    started = time.perf_counter()
+
+    def report_progress(rows_read: int) -> None:
+        elapsed = time.perf_counter() - started
+        print(
+            f"   📥 {rows_read:,} rows staged "
+            f"({rows_read / elapsed:,.0f} rows/s, peak RSS {peak_rss_mb():,.0f} MB)"
+        )
+
+    try:
+        result = await load_leads(
+            conn, reader(path, chunk_size), default_source, on_chunk=report_progress
+        )
+    finally:
+        await conn.close()
+
+    total = time.perf_counter() - started
+    print(f"✅ Imported {path.name}")
+    print(f"   Rows read:          {result['rows_read']:,}")
+    print(f"   Rows rejected:      {sum(result['rejected'].values()):,}")
+    for reason, count in result["rejected"].most_common():
+        print(f"      {reason}: {count:,}")
+    print(f"   Duplicate emails:   {result['duplicates']:,} (first row kept)")
+    print(f"   Unique emails:      {result['unique_emails']:,}")
+    print(f"   Leads inserted:     {result['leads_inserted']:,}")
+    print(f"   Existing skipped:   {result['existing_skipped']:,}")
+    print(f"   Companies created:  {result['companies_created']:,}")
+    print(f"   COPY phase:         {result['copy_seconds']:,.1f}s")
+    print(f"   Merge phase:        {result['merge_seconds']:,.1f}s")
+    print(f"   Throughput:         {result['rows_read'] / total:,.0f} rows/s")
+    print(f"   Peak RSS:           {peak_rss_mb():,.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import leads from CSV or Parquet")
+    parser.add_argument("path", type=Path, help="CSV or Parquet file to import")
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet"],
+        help="File format (default: inferred from the file extension)",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=50_000, help="Rows per COPY chunk (default: 50000)"
+    )
+    parser.add_argument(
+        "--source",
+        default=LeadSource.API.value,
+        choices=sorted(VALID_SOURCES),
+        help="Lead source for rows without a source column (default: api)",
+    )
+    args = parser.parse_args()
+
+    file_format = args.format or ("parquet" if args.path.suffix == ".parquet" else "csv")
+    print(f"🚀 Importing {args.path} ({file_format})...")
+    asyncio.run(import_leads(args.path, file_format, args.chunk_size, args.source))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Retention purge of old leads
+
+Deletes leads created more than --older-than-days ago, in batches of
+--batch-size with a pause between batches so the leads table is never locked
+for long. Their activities, status history and search documents are deleted
+with them by the database. Schedule it once a day, e.g. from cron:
+
+    30 3 * * * cd /app && python scripts/purge_leads.py --older-than-days 730
+
+Usage:
+    python scripts/purge_leads.py --older-than-days 730 [--batch-size 1000] [--pause-ms 200]
+    python scripts/purge_leads.py --older-than-days 730 --dry-run
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import engine
+from app.schemas.lead import LeadPurgeRequest
+from app.services.lead_purger import LeadPurger
+
+
+async def purge(older_than_days: int, batch_size: int, pause_ms: int, dry_run: bool):
+    """Run the purge, or only count the leads it would delete"""
+    purger = LeadPurger(batch_size=batch_size, pause_ms=pause_ms)
+    request = LeadPurgeRequest(older_than_days=older_than_days)
+    if dry_run:
+        matched = await purger.count(request)
+        await engine.dispose()
+        print(f"🔎 {matched:,} leads would be purged")
+        return
+
+    result = await purger.purge(request)
+    await engine.dispose()
+
+    print("✅ Leads purged")
+    print(f"   Leads deleted:  {result['deleted']:,}")
+    print(f"   Batches:        {result['batches']:,}")
+    print(f"   Duration:       {result['duration_ms'] / 1000:,.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge leads past their retention period")
+    parser.add_argument(
+        "--older-than-days", type=int, required=True, help="Purge leads created before this age"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Leads per DELETE (default: 1000)"
+    )
+    parser.add_argument(
+        "--pause-ms", type=int, default=200, help="Pause between batches (default: 200)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only count matching leads")
+    args = parser.parse_args()
+
+    print(f"🧹 Purging leads older than {args.older_than_days} days...")
+    asyncio.run(purge(args.older_than_days, args.batch_size, args.pause_ms, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Rebuild the daily analytics rollups from the leads table
+
+Backfills lead_daily_stats, campaign_daily_stats and lead_score_daily_stats
+after upgrading, or repairs them after manual data fixes. The rollup triggers
+on leads are (re)installed, then every day, or the days from --since on, is
+recomputed.
+Leads without status history get their current status logged, so funnel
+and velocity reports cover them. Lead writes wait while the rebuild runs.
+
+Usage:
+    python scripts/rebuild_rollups.py
+    python scripts/rebuild_rollups.py --since 2024-01-01
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.services.analytics_service import AnalyticsService
+
+
+async def rebuild(since):
+    """Create missing tables and rebuild the rollup"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        service = AnalyticsService(db)
+        result = await service.rebuild_daily_stats(since=since)
+        seeded = await service.backfill_status_changes()
+    await engine.dispose()
+
+    print("✅ Rollups rebuilt")
+    print(f"   Days from:     {result['since'] or 'the beginning'}")
+    for table, rows in result["rows"].items():
+        print(f"   {table}: {rows:,} rows")
+    print(f"   Duration:      {result['duration_ms'] / 1000:,.1f}s")
+    print(f"   Status history seeded for {seeded:,} leads")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild lead analytics rollups")
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        help="Only rebuild days on or after this date (YYYY-MM-DD)",
+    )
+    args = parser.parse_args()
+
+    print("🔄 Rebuilding lead rollups...")
+    asyncio.run(rebuild(args.since))
+
+
+if __name__ == "__main__":
+    main()
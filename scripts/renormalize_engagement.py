@@ -0,0 +1,49 @@
+"""Nightly engagement renormalization
+
+Decays every engaged lead's stored engagement score to now, clears scores
+that have decayed away, and refreshes lead scores and qualification to match.
+Schedule it once a day, e.g. from cron:
+
+    0 3 * * * cd /app && python scripts/renormalize_engagement.py
+
+Usage:
+    python scripts/renormalize_engagement.py [--chunk-size 5000]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal, engine
+from app.services.activity_service import ActivityService
+
+
+async def renormalize(chunk_size: int):
+    """Run the renormalization pass"""
+    async with AsyncSessionLocal() as db:
+        result = await ActivityService(db).renormalize_engagement(chunk_size=chunk_size)
+    await engine.dispose()
+
+    print("✅ Engagement renormalized")
+    print(f"   Leads updated:  {result['processed']:,}")
+    print(f"   Leads cleared:  {result['cleared']:,}")
+    print(f"   Duration:       {result['duration_ms'] / 1000:,.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renormalize lead engagement scores")
+    parser.add_argument(
+        "--chunk-size", type=int, default=5000, help="Leads per UPDATE (default: 5000)"
+    )
+    args = parser.parse_args()
+
+    print("🌙 Renormalizing engagement scores...")
+    asyncio.run(renormalize(args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Upgrade an existing database to the current schema
+
+The application only creates missing tables on startup, so a database created
+by an earlier release lacks newer columns, indexes and triggers on existing
+tables. This script adds them with short locks:
+
+- new tables are created, with their indexes and triggers;
+- missing columns are added as nullable columns, a catalog-only change;
+- the rollup, status log and deletion log triggers on leads are (re)installed;
+- missing indexes are built with CREATE INDEX CONCURRENTLY, so writes keep
+  flowing while they build, and the GIN trigram index on search documents is
+  replaced by the GiST one ranked fuzzy search scans;
+- activities get their cascading foreign key to leads. The new constraint is
+  added NOT VALID and committed at once, then validated in its own
+  transaction, which only takes a SHARE UPDATE EXCLUSIVE lock while it scans.
+
+DDL that needs a strong lock gives up after --lock-timeout rather than queue
+behind long transactions and stall traffic; rerun it later, every step is
+idempotent. Afterwards run scripts/rebuild_rollups.py to backfill the
+rollups and status history, and POST /api/v1/leads/search/refresh to index
+existing leads for search.
+
+Usage:
+    python scripts/upgrade_schema.py [--lock-timeout 5s]
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import Enum, Index, inspect, text
+from sqlalchemy.schema import CreateIndex
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.database import Base, engine
+from app.models.lead_daily_stats import ROLLUP_TRIGGER_DDL
+from app.models.lead_deletion import LEAD_DELETION_TRIGGER_DDL
+from app.models.lead_search_document import SEARCH_INDEX_NAME
+from app.models.lead_status_change import STATUS_LOG_TRIGGER_DDL
+
+ACTIVITY_FK_SWAP_DDL = [
+    "ALTER TABLE activities DROP CONSTRAINT activities_lead_id_fkey",
+    """
+    ALTER TABLE activities ADD CONSTRAINT activities_lead_id_fkey
+        FOREIGN KEY (lead_id) REFERENCES leads (id) ON DELETE CASCADE NOT VALID
+    """,
+]
+
+SEARCH_INDEX_SWAP_DDL = [
+    f"""
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS {SEARCH_INDEX_NAME}
+        ON lead_search_documents USING gist (document gist_trgm_ops)
+    """,
+    "DROP INDEX CONCURRENTLY IF EXISTS ix_lead_search_documents_trgm",
+]
+
+
+def add_missing_columns(conn) -> List[str]:
+    """Add model columns missing from existing tables, as nullable columns"""
+    inspector = inspect(conn)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if isinstance(column.type, Enum):
+                column.type.create(conn, checkfirst=True)
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(
+                f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS "{column.name}" {column_type}'
+            ))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def missing_indexes(conn) -> List[Index]:
+    """Model indexes that do not exist in the database"""
+    inspector = inspect(conn)
+    existing = {
+        index["name"]
+        for table in Base.metadata.sorted_tables
+        for index in inspector.get_indexes(table.name)
+    }
+    return [
+        index
+        for table in Base.metadata.sorted_tables
+        for index in sorted(table.indexes, key=lambda index: index.name)
+        if index.name not in existing
+    ]
+
+
+def create_concurrently(index: Index) -> str:
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS statement for an index"""
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+    return re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl)
+
+
+async def upgrade(lock_timeout: str):
+    """Bring the database up to the current schema"""
+    engine.echo = False
+    lock_timeout_sql = text(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+
+    async with engine.begin() as conn:
+        await conn.execute(lock_timeout_sql)
+        await conn.run_sync(Base.metadata.create_all)
+        columns = await conn.run_sync(add_missing_columns)
+        for statements in (ROLLUP_TRIGGER_DDL, STATUS_LOG_TRIGGER_DDL, LEAD_DELETION_TRIGGER_DDL):
+            for statement in statements:
+                await conn.execute(text(statement))
+        indexes = await conn.run_sync(missing_indexes)
+
+    # CONCURRENTLY cannot run inside a transaction block
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for index in indexes:
+            print(f"   Building {index.name}...")
+            await conn.execute(text(create_concurrently(index)))
+        search_index_missing = await conn.scalar(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') "
+            f"AND to_regclass('{SEARCH_INDEX_NAME}') IS NULL"
+        ))
+        if search_index_missing:
+            print(f"   Building {SEARCH_INDEX_NAME}...")
+            for statement in SEARCH_INDEX_SWAP_DDL:
+                await conn.execute(text(statement))
+
+    async with engine.begin() as conn:
+        cascades = await conn.scalar(text(
+            "SELECT confdeltype = 'c' FROM pg_constraint "
+            "WHERE conname = 'activities_lead_id_fkey'"
+        ))
+        if cascades is False:
+            await conn.execute(lock_timeout_sql)
+            for statement in ACTIVITY_FK_SWAP_DDL:
+                await conn.execute(text(statement))
+
+    async with engine.begin() as conn:
+        validated = await conn.scalar(text(
+            "SELECT convalidated FROM pg_constraint WHERE conname = 'activities_lead_id_fkey'"
+        ))
+        if validated is False:
+            print("   Validating activities_lead_id_fkey...")
+            await conn.execute(
+                text("ALTER TABLE activities VALIDATE CONSTRAINT activities_lead_id_fkey")
+            )
+    await engine.dispose()
+
+    print("✅ Schema upgraded")
+    print(f"   Columns added:  {', '.join(columns) or 'none'}")
+    print(f"   Indexes built:  {', '.join(index.name for index in indexes) or 'none'}")
+    print(f"   Activity cascade: {'added' if cascades is False else 'already in place'}")
+    print("   Next: make rebuild-rollups, then POST /api/v1/leads/search/refresh")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade an existing database schema")
+    parser.add_argument(
+        "--lock-timeout",
+        default="5s",
+        help="Give up on DDL that waits longer than this for a lock (PostgreSQL interval)",
+    )
+    args = parser.parse_args()
+
+    print("🔄 Upgrading schema...")
+    asyncio.run(upgrade(args.lock_timeout))
+
+
+if __name__ == "__main__":
+    main()
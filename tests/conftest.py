@@ -8,6 +8,7 @@ from httpx import AsyncClient
 
 from app.main import app
 from app.core.database import Base, get_db
+from app.services.lead_cache import lead_cache
 
 
 # Test database URL
@@ -34,6 +35,7 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+    await lead_cache.clear()
 
     async with TestSessionLocal() as session:
         yield session
@@ -0,0 +1,523 @@
+"""Tests for analytics endpoints"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.lead import Lead, LeadSource, LeadStatus
+from app.models.lead_daily_stats import LeadDailyStats
+from app.models.lead_status_change import LeadStatusChange
+from app.services.analytics_service import AnalyticsService, dashboard_cache, leaderboard_cache
+from app.services.lead_snapshot import lead_snapshot
+
+
+async def create_leads(client: AsyncClient, *leads):
+    """Create leads through the API"""
+    for lead in leads:
+        response = await client.post("/api/v1/leads/", json=lead)
+        assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_dashboard_stats_cached_until_lead_write(client: AsyncClient):
+    """Test dashboard stats are served from cache and invalidated by lead writes"""
+    dashboard_cache.clear()
+    await create_leads(
+        client,
+        {"email": "dash1@company.com", "source": "referral", "job_title": "CEO"},
+        {"email": "dash2@gmail.com", "source": "api"},
+    )
+
+    response = await client.get("/api/v1/analytics/dashboard?days=7")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["total_leads"] == 2
+    assert stats["qualified_leads"] == 0
+    assert stats["average_score"] == 25.0
+
+    hits = (await client.get("/api/v1/analytics/cache/stats")).json()["cache"]["hits"]
+    assert (await client.get("/api/v1/analytics/dashboard?days=7")).json() == stats
+    cache_stats = (await client.get("/api/v1/analytics/cache/stats")).json()
+    assert cache_stats["cache"]["hits"] == hits + 1
+    assert cache_stats["query"]["queries"] >= 1
+
+    await create_leads(client, {"email": "dash3@company.com", "source": "website"})
+    response = await client.get("/api/v1/analytics/dashboard?days=7")
+    assert response.json()["total_leads"] == 3
+
+    response = await client.get("/api/v1/analytics/dashboard?days=7&fresh=true")
+    assert response.json()["total_leads"] == 3
+    cache_stats = (await client.get("/api/v1/analytics/cache/stats")).json()
+    assert cache_stats["cache"]["hits"] == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_conversion_rate_series(client: AsyncClient, db_session: AsyncSession):
+    """Test conversion rates are aggregated in SQL, overall and per bucket and source"""
+    day = datetime(2024, 3, 4, 12)
+    leads = [
+        ("c1@company.com", LeadSource.REFERRAL, day, LeadStatus.CONVERTED),
+        ("c2@company.com", LeadSource.REFERRAL, day, LeadStatus.NEW),
+        ("c3@company.com", LeadSource.WEBSITE, day, LeadStatus.NEW),
+        ("c4@company.com", LeadSource.WEBSITE, day + timedelta(days=1), LeadStatus.CONVERTED),
+    ]
+    db_session.add_all(
+        [
+            Lead(email=email, source=source, created_at=created_at, status=status)
+            for email, source, created_at, status in leads
+        ]
+    )
+    await db_session.commit()
+
+    response = await client.get("/api/v1/analytics/conversion-rate")
+    data = response.json()
+    assert (data["total_leads"], data["converted_leads"], data["conversion_rate"]) == (4, 2, 50.0)
+
+    response = await client.get("/api/v1/analytics/conversion-rate?bucket=day&group_by=source")
+    assert response.status_code == 200
+    series = [
+        (point["bucket"], point["source"], point["total_leads"], point["conversion_rate"])
+        for point in response.json()["series"]
+    ]
+    assert series == [
+        ("2024-03-04T00:00:00", "website", 1, 0.0),
+        ("2024-03-04T00:00:00", "referral", 2, 50.0),
+        ("2024-03-05T00:00:00", "website", 1, 100.0),
+    ]
+
+    response = await client.get("/api/v1/analytics/conversion-rate?bucket=month")
+    assert response.json()["series"] == [
+        {
+            "bucket": "2024-03-01T00:00:00",
+            "total_leads": 4,
+            "converted_leads": 2,
+            "conversion_rate": 50.0,
+        }
+    ]
+
+    response = await client.get("/api/v1/analytics/conversion-rate?bucket=year")
+    assert response.status_code == 422
+
+
+async def rollup_snapshot(db_session: AsyncSession):
+    """Non-empty lead_daily_stats rows as comparable tuples"""
+    result = await db_session.execute(
+        select(
+            LeadDailyStats.day,
+            LeadDailyStats.source,
+            LeadDailyStats.campaign,
+            LeadDailyStats.status,
+            LeadDailyStats.leads,
+            LeadDailyStats.qualified_leads,
+            LeadDailyStats.score_sum,
+        )
+        .where(LeadDailyStats.leads != 0)
+        .order_by(LeadDailyStats.campaign, LeadDailyStats.status)
+    )
+    return [tuple(row) for row in result]
+
+
+@pytest.mark.asyncio
+async def test_daily_rollup_tracks_lead_writes(client: AsyncClient, db_session: AsyncSession):
+    """Test lead_daily_stats follows creates, updates and deletes, and rebuilds identically"""
+    leaderboard_cache.clear()
+    await create_leads(
+        client,
+        {"email": "r1@company.com", "source": "webinar", "campaign": "spring"},
+        {"email": "r2@company.com", "source": "webinar", "campaign": "spring"},
+        {"email": "r3@gmail.com", "source": "webinar"},
+    )
+    await client.post(
+        "/api/v1/leads/bulk",
+        json=[{"email": "r4@company.com", "source": "webinar", "campaign": "spring"}],
+    )
+    leads = {
+        lead.email: lead.id
+        for lead in (await db_session.execute(select(Lead))).scalars().all()
+    }
+    await client.put(
+        f"/api/v1/leads/{leads['r1@company.com']}",
+        json={"status": "converted", "lead_score": 80, "is_qualified": True},
+    )
+    await client.delete(f"/api/v1/leads/{leads['r2@company.com']}")
+
+    today = datetime.utcnow().date()
+    expected = [
+        (today, LeadSource.WEBINAR, "", LeadStatus.NEW, 1, 0, 15),
+        (today, LeadSource.WEBINAR, "spring", LeadStatus.NEW, 1, 0, 25),
+        (today, LeadSource.WEBINAR, "spring", LeadStatus.CONVERTED, 1, 1, 80),
+    ]
+    assert await rollup_snapshot(db_session) == expected
+
+    response = await client.get("/api/v1/analytics/top-performing-campaigns")
+    assert response.json() == [
+        {
+            "campaign": "spring",
+            "total_leads": 2,
+            "qualified_leads": 1,
+            "converted_leads": 1,
+            "conversion_rate": 50.0,
+            "avg_score": 52.5,
+        }
+    ]
+
+    await db_session.execute(delete(LeadDailyStats))
+    await db_session.commit()
+    result = await AnalyticsService(db_session).rebuild_daily_stats()
+    assert result["rows"]["lead_daily_stats"] == 3
+    assert await rollup_snapshot(db_session) == expected
+
+
+@pytest.mark.asyncio
+async def test_campaign_leaderboard(client: AsyncClient, db_session: AsyncSession):
+    """Test leaderboards rank campaigns and UTM values per window and sort"""
+    leaderboard_cache.clear()
+    await create_leads(
+        client,
+        {
+            "email": "b1@company.com",
+            "source": "website",
+            "campaign": "big",
+            "utm_source": "google",
+        },
+        {
+            "email": "b2@company.com",
+            "source": "website",
+            "campaign": "big",
+            "utm_source": "google",
+        },
+        {
+            "email": "b3@gmail.com",
+            "source": "website",
+            "campaign": "big",
+            "utm_source": "bing",
+        },
+        {
+            "email": "s1@company.com",
+            "source": "website",
+            "campaign": "small",
+            "utm_source": "bing",
+        },
+    )
+    leads = {
+        lead.email: lead.id
+        for lead in (await db_session.execute(select(Lead))).scalars().all()
+    }
+    await client.put(f"/api/v1/leads/{leads['s1@company.com']}", json={"status": "converted"})
+
+    url = "/api/v1/analytics/top-performing-campaigns"
+    board = (await client.get(url)).json()
+    assert [(entry["campaign"], entry["total_leads"]) for entry in board] == [
+        ("big", 3),
+        ("small", 1),
+    ]
+
+    board = (await client.get(f"{url}?sort=conversion_rate&days=7&limit=1")).json()
+    assert board == [
+        {
+            "campaign": "small",
+            "total_leads": 1,
+            "qualified_leads": 0,
+            "converted_leads": 1,
+            "conversion_rate": 100.0,
+            "avg_score": 20.0,
+        }
+    ]
+
+    board = (await client.get(f"{url}?dimension=utm_source")).json()
+    assert [(entry["utm_source"], entry["total_leads"]) for entry in board] == [
+        ("bing", 2),
+        ("google", 2),
+    ]
+
+    # Leads older than the window drop off its board
+    await db_session.execute(
+        update(Lead)
+        .where(Lead.campaign == "big")
+        .values(created_at=datetime.utcnow() - timedelta(days=45))
+    )
+    await db_session.commit()
+    board = (await client.get(f"{url}?days=30")).json()
+    assert [entry["campaign"] for entry in board] == ["small"]
+    board = (await client.get(f"{url}?days=90")).json()
+    assert [entry["campaign"] for entry in board] == ["big", "small"]
+
+    # Boards are cached for a short TTL regardless of lead writes, unless fresh
+    await create_leads(
+        client,
+        *({"email": f"s{i}@company.com", "source": "website", "campaign": "small"} for i in (2, 3)),
+    )
+    board = (await client.get(f"{url}?days=90")).json()
+    assert [(entry["campaign"], entry["total_leads"]) for entry in board] == [
+        ("big", 3),
+        ("small", 1),
+    ]
+    board = (await client.get(f"{url}?days=90&fresh=true")).json()
+    assert [(entry["campaign"], entry["total_leads"]) for entry in board] == [
+        ("big", 3),
+        ("small", 3),
+    ]
+
+    response = await client.get(f"{url}?days=14")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_status_history_funnel_and_velocity(client: AsyncClient, db_session: AsyncSession):
+    """Test status changes are logged and drive funnel and velocity reports"""
+    await create_leads(
+        client,
+        *(
+            {"email": f"f{i}@company.com", "source": source}
+            for i, source in enumerate(["referral", "referral", "referral", "api"])
+        ),
+    )
+    leads = {
+        lead.email: lead.id
+        for lead in (await db_session.execute(select(Lead))).scalars().all()
+    }
+    for email, statuses in {
+        "f0@company.com": ["contacted", "qualified", "converted"],
+        "f1@company.com": ["contacted", "lost"],
+        "f2@company.com": ["converted"],
+    }.items():
+        for lead_status in statuses:
+            await client.put(f"/api/v1/leads/{leads[email]}", json={"status": lead_status})
+    await client.put(f"/api/v1/leads/{leads['f3@company.com']}", json={"notes": "no change"})
+
+    response = await client.get(f"/api/v1/leads/{leads['f1@company.com']}/status-history")
+    assert [(change["from_status"], change["to_status"]) for change in response.json()] == [
+        (None, "new"),
+        ("new", "contacted"),
+        ("contacted", "lost"),
+    ]
+    assert (await client.get("/api/v1/leads/999999/status-history")).status_code == 404
+
+    # Space f0's transitions 2, 4 and 6 hours after creation
+    history = (
+        await db_session.execute(
+            select(LeadStatusChange)
+            .where(LeadStatusChange.lead_id == leads["f0@company.com"])
+            .order_by(LeadStatusChange.id)
+        )
+    ).scalars().all()
+    created = history[0].changed_at
+    for hours, change in zip((2, 4, 6), history[1:]):
+        change.changed_at = created + timedelta(hours=hours)
+    await db_session.commit()
+
+    response = await client.get("/api/v1/analytics/funnel?group_by=source&fresh=true")
+    assert response.status_code == 200
+    funnel = {entry["source"]: entry["stages"] for entry in response.json()["funnel"]}
+    assert [(stage["stage"], stage["leads"]) for stage in funnel["referral"]] == [
+        ("new", 3),
+        ("contacted", 3),
+        ("qualified", 2),
+        ("converted", 2),
+    ]
+    assert [stage["conversion_rate"] for stage in funnel["referral"]] == [
+        None,
+        100.0,
+        66.67,
+        100.0,
+    ]
+    assert [stage["leads"] for stage in funnel["api"]] == [1, 0, 0, 0]
+
+    response = await client.get("/api/v1/analytics/velocity?fresh=true")
+    velocity = {entry["stage"]: entry for entry in response.json()["velocity"]}
+    assert velocity["contacted"]["completed"] == 2
+    assert velocity["qualified"]["median_hours"] == 2.0
+    assert velocity["converted"]["completed"] == 0
+    assert velocity["converted"]["in_stage"] == 2
+    assert velocity["converted"]["median_hours"] is None
+
+    # Reports are cached for the day unless refreshed
+    await client.put(f"/api/v1/leads/{leads['f3@company.com']}", json={"status": "contacted"})
+    response = await client.get("/api/v1/analytics/funnel?group_by=source")
+    assert response.json()["funnel"][-1]["source"] == "api"
+    assert response.json()["funnel"][-1]["stages"][1]["leads"] == 0
+    response = await client.get("/api/v1/analytics/funnel?group_by=source&fresh=true")
+    assert response.json()["funnel"][-1]["stages"][1]["leads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_slices_follow_lead_writes(client: AsyncClient, db_session: AsyncSession):
+    """Test ad-hoc slices are answered from the snapshot and catch up with writes"""
+    lead_snapshot.clear()
+    lead_snapshot.max_lag_seconds = 0
+    try:
+        await create_leads(
+            client,
+            {"email": "s1@company.com", "source": "referral", "campaign": "spring"},
+            {"email": "s2@company.com", "source": "referral", "campaign": "fall"},
+            {"email": "s3@gmail.com", "source": "api", "campaign": "spring"},
+        )
+        response = await client.get("/api/v1/analytics/slice?group_by=source")
+        assert response.status_code == 200
+        assert response.json()["rows"] == [
+            {
+                "source": "referral",
+                "leads": 2,
+                "qualified_leads": 0,
+                "converted_leads": 0,
+                "avg_score": 30.0,
+            },
+            {
+                "source": "api",
+                "leads": 1,
+                "qualified_leads": 0,
+                "converted_leads": 0,
+                "avg_score": 5.0,
+            },
+        ]
+
+        leads = {
+            lead.email: lead.id
+            for lead in (await db_session.execute(select(Lead))).scalars().all()
+        }
+        await client.put(f"/api/v1/leads/{leads['s1@company.com']}", json={"status": "converted"})
+        await client.delete(f"/api/v1/leads/{leads['s2@company.com']}")
+        await client.post(
+            "/api/v1/leads/bulk", json=[{"email": "s4@company.com", "source": "webinar"}]
+        )
+
+        response = await client.get(
+            "/api/v1/analytics/slice?group_by=campaign&status=new&status=converted"
+        )
+        rows = {row["campaign"]: row for row in response.json()["rows"]}
+        assert {campaign: row["leads"] for campaign, row in rows.items()} == {
+            None: 1,
+            "spring": 2,
+        }
+        assert rows["spring"]["converted_leads"] == 1
+
+        response = await client.get(
+            "/api/v1/analytics/slice?campaign=spring&min_score=20&source=referral"
+        )
+        assert response.json()["rows"][0]["leads"] == 1
+
+        response = await client.get("/api/v1/analytics/slice/score-histogram?bins=4")
+        assert [bin["leads"] for bin in response.json()["bins"]] == [1, 2, 0, 0]
+
+        stats = (await client.get("/api/v1/analytics/snapshot/stats")).json()
+        assert stats["rows"] == 3
+        assert stats["campaigns"] == 2
+        assert stats["memory_bytes"] > 0
+        assert stats["lag_seconds"] is not None
+    finally:
+        lead_snapshot.clear()
+        lead_snapshot.max_lag_seconds = settings.SNAPSHOT_MAX_LAG_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_snapshot_drops_deletes_balanced_by_inserts(
+    client: AsyncClient, db_session: AsyncSession
+):
+    """Test the snapshot drops logged deletes even when inserts keep the count level"""
+    lead_snapshot.clear()
+    lead_snapshot.max_lag_seconds = 0
+    try:
+        await create_leads(
+            client,
+            {"email": "d1@company.com", "source": "website", "campaign": "spring"},
+            {"email": "d2@company.com", "source": "website", "campaign": "fall"},
+        )
+        response = await client.get("/api/v1/analytics/slice?group_by=campaign")
+        assert {row["campaign"] for row in response.json()["rows"]} == {"spring", "fall"}
+
+        lead_id = await db_session.scalar(select(Lead.id).where(Lead.email == "d2@company.com"))
+        await client.delete(f"/api/v1/leads/{lead_id}")
+        await create_leads(
+            client, {"email": "d3@company.com", "source": "website", "campaign": "winter"}
+        )
+
+        response = await client.get("/api/v1/analytics/slice?group_by=campaign")
+        assert {row["campaign"] for row in response.json()["rows"]} == {"spring", "winter"}
+        assert len(lead_snapshot) == 2
+
+        # A snapshot behind the deletion log's retention reloads every lead
+        lead_snapshot.deletions_watermark -= timedelta(days=2)
+        response = await client.get("/api/v1/analytics/slice?group_by=campaign")
+        assert {row["campaign"] for row in response.json()["rows"]} == {"spring", "winter"}
+        assert lead_snapshot.deletions_watermark > datetime.utcnow() - timedelta(hours=1)
+    finally:
+        lead_snapshot.clear()
+        lead_snapshot.max_lag_seconds = settings.SNAPSHOT_MAX_LAG_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_score_distribution(client: AsyncClient, db_session: AsyncSession):
+    """Test score distributions merge daily histograms and evaluate thresholds"""
+    await create_leads(
+        client,
+        {"email": "d1@company.com", "source": "referral", "job_title": "CEO"},
+        {"email": "d2@company.com", "source": "referral"},
+        {"email": "d3@gmail.com", "source": "api"},
+    )
+    leads = {
+        lead.email: lead.id
+        for lead in (await db_session.execute(select(Lead))).scalars().all()
+    }
+    await client.put(f"/api/v1/leads/{leads['d2@company.com']}", json={"lead_score": 90})
+
+    response = await client.get("/api/v1/analytics/score-distribution?threshold=70&bin_width=50")
+    assert response.status_code == 200
+    [distribution] = response.json()["distributions"]
+    assert distribution["leads"] == 3
+    assert (distribution["p50"], distribution["p90"], distribution["p99"]) == (45, 90, 90)
+    assert [bin["leads"] for bin in distribution["histogram"]] == [2, 1, 0]
+    assert distribution["qualification"] == [{"threshold": 70, "leads": 1, "fraction": 0.3333}]
+
+    response = await client.get("/api/v1/analytics/score-distribution?group_by=source")
+    distributions = {entry["source"]: entry for entry in response.json()["distributions"]}
+    assert distributions["referral"]["leads"] == 2
+    assert distributions["api"]["p50"] == 5
+
+    response = await client.get("/api/v1/analytics/score-distribution?source=api")
+    assert response.json()["distributions"][0]["leads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unique_visitors(client: AsyncClient, db_session: AsyncSession):
+    """Test unique visitors and devices merge per campaign across activity writes"""
+    for i, (ip_address, user_agent) in enumerate(
+        [("10.0.0.1", "firefox"), ("10.0.0.2", "firefox"), ("10.0.0.1", "safari")]
+    ):
+        response = await client.post(
+            "/api/v1/webhooks/form-submission",
+            json={
+                "email": f"v{i}@company.com",
+                "campaign": "spring",
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+            },
+        )
+        assert response.status_code == 200
+    spring_lead_id = response.json()["lead_id"]
+    await client.post(
+        "/api/v1/webhooks/landing-page",
+        json={"email": "v3@company.com", "page_name": "pricing", "ip_address": "10.0.0.3"},
+    )
+    response = await client.post(
+        f"/api/v1/leads/{spring_lead_id}/activities",
+        json={"activity_type": "page_view", "ip_address": "10.0.0.4", "user_agent": "firefox"},
+    )
+    assert response.status_code == 201
+
+    response = await client.get("/api/v1/analytics/unique-visitors?group_by=campaign")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["counts"] == [
+        {"campaign": "spring", "unique_visitors": 3, "unique_devices": 4, "activities": 4},
+        {"campaign": "pricing", "unique_visitors": 1, "unique_devices": 1, "activities": 1},
+    ]
+    assert body["error"]["relative_standard_error"] == 0.0163
+
+    response = await client.get("/api/v1/analytics/unique-visitors?source=landing_page")
+    assert response.json()["counts"] == [
+        {"unique_visitors": 1, "unique_devices": 1, "activities": 1}
+    ]
@@ -0,0 +1,186 @@
+"""Tests for in-process caching primitives and the lead cache"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.cache import TTLCache
+from app.schemas.lead import LeadResponse
+from app.services.lead_cache import LeadCache
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_hit_and_miss():
+    """Test hits and misses are counted"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_ttl_cache_expires_entries():
+    """Test entries expire after their TTL"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=120)
+    clock.now = 61
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test the least recently used entry is evicted when full"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_tracks_value_bytes():
+    """Test value bytes follow sets, overwrites, evictions and deletes"""
+    cache = TTLCache(maxsize=2, ttl=60, sizeof=len)
+    cache.set("a", b"xx")
+    cache.set("b", b"yyy")
+    cache.set("a", b"z")
+    assert cache.stats()["value_bytes"] == 4
+    cache.set("c", b"wwww")
+    assert cache.stats()["value_bytes"] == 5
+    cache.delete("a")
+    assert cache.stats()["value_bytes"] == 4
+    assert "value_bytes" not in TTLCache(maxsize=2, ttl=60).stats()
+
+
+class SharedTierStandIn:
+    """In-memory stand-in for the Redis shared tier"""
+
+    def __init__(self):
+        self.store = {}
+        self.subscribers = []
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers:
+            queue.put_nowait({"type": "message", "data": message.encode()})
+
+    async def scan_iter(self, match):
+        for key in list(self.store):
+            yield key
+
+    def pubsub(self):
+        return PubSubStandIn(self)
+
+
+class PubSubStandIn:
+    """Subscription to a SharedTierStandIn"""
+
+    def __init__(self, tier):
+        self.tier = tier
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.tier.subscribers.append(self.queue)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self):
+        self.tier.subscribers.remove(self.queue)
+
+
+def make_lead(lead_id: int, notes: str) -> LeadResponse:
+    """A lead response with the given notes"""
+    now = datetime(2024, 6, 1, 12, 0)
+    return LeadResponse(
+        id=lead_id,
+        email=f"lead{lead_id}@example.com",
+        source="api",
+        notes=notes,
+        status="new",
+        lead_score=10,
+        is_qualified=False,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+@pytest.mark.asyncio
+async def test_lead_cache_reads_through_and_invalidates_across_workers():
+    """Test fills are shared, and invalidations reach every worker's local tier"""
+    shared = SharedTierStandIn()
+    first, second = LeadCache(shared=shared), LeadCache(shared=shared)
+    second.start()
+    await asyncio.sleep(0)
+    loads = []
+
+    async def load(notes):
+        loads.append(notes)
+        return make_lead(1, notes)
+
+    assert (await first.get(1, lambda: load("v1"))).notes == "v1"
+    assert (await first.get(1, lambda: load("v1"))).notes == "v1"
+    assert (await second.get(1, lambda: load("v1"))).notes == "v1"
+    assert loads == ["v1"]
+    assert second.stats()["shared"]["hits"] == 1
+
+    await first.invalidate([1])
+    await asyncio.sleep(0)
+    assert (await second.get(1, lambda: load("v2"))).notes == "v2"
+    assert (await first.get(1, lambda: load("v3"))).notes == "v2"
+    assert loads == ["v1", "v2"]
+    await second.stop()
+
+    stats = first.stats()
+    assert stats["hit_ratio"] == 0.6667
+    assert stats["invalidations"] == 1
+    assert stats["memory_bytes"] == len(make_lead(1, "v2").model_dump_json())
+
+
+@pytest.mark.asyncio
+async def test_lead_cache_skips_fills_overlapping_an_invalidation():
+    """Test a load that raced a write is served but not cached"""
+    cache = LeadCache(maxsize=2)
+
+    async def load_then_write():
+        lead = make_lead(1, "before the write")
+        await cache.invalidate([1])
+        return lead
+
+    assert (await cache.get(1, load_then_write)).notes == "before the write"
+    assert (await cache.get(1, lambda: asyncio.sleep(0, make_lead(1, "after")))).notes == "after"
+
+    for lead_id in (2, 3):
+        await cache.get(lead_id, lambda: asyncio.sleep(0, make_lead(lead_id, "")))
+    assert cache.stats()["local"]["evictions"] == 1
+    assert await cache.get(4, lambda: asyncio.sleep(0, None)) is None
+    assert len(cache.local) == 2
@@ -0,0 +1,121 @@
+"""Tests for engagement scoring"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import ActivityType
+from app.models.lead import Lead, LeadSource
+from app.services.activity_service import ActivityService
+from app.services.scoring_service import shared_scoring_service
+
+HALF_LIFE = timedelta(days=14)
+
+
+def test_engagement_decays_incrementally():
+    """Test running engagement halves per half-life and folds in late activities"""
+    plan = shared_scoring_service.plan
+    start = datetime(2024, 1, 1)
+
+    engagement, as_of = plan.add_engagement(None, None, 10, start)
+    assert (engagement, as_of) == (10, start)
+    assert plan.decayed_engagement(engagement, as_of, start + HALF_LIFE) == pytest.approx(5)
+
+    engagement, as_of = plan.add_engagement(engagement, as_of, 4, start + HALF_LIFE)
+    assert engagement == pytest.approx(9)
+    assert as_of == start + HALF_LIFE
+
+    # An activity arriving late is decayed into the score without moving its timestamp
+    late, late_as_of = plan.add_engagement(engagement, as_of, 8, start)
+    assert late == pytest.approx(13)
+    assert late_as_of == as_of
+
+    assert plan.engagement_points(late) == 13
+    assert plan.engagement_points(12.5) == 13
+    assert plan.engagement_points(1000) == plan.max_engagement_points
+
+
+@pytest.mark.asyncio
+async def test_record_activity_updates_score(client: AsyncClient, db_session: AsyncSession):
+    """Test an activity raises the lead's engagement and score in place"""
+    response = await client.post(
+        "/api/v1/leads/",
+        json={"email": "engaged@company.com", "job_title": "CEO", "source": "referral"},
+    )
+    lead = response.json()
+    assert lead["lead_score"] == 45
+
+    response = await client.post(
+        f"/api/v1/leads/{lead['id']}/activities", json={"activity_type": "meeting"}
+    )
+    assert response.status_code == 201
+    assert response.json()["activity_type"] == "meeting"
+
+    response = await client.get(f"/api/v1/leads/{lead['id']}/engagement")
+    engagement = response.json()
+    assert engagement["engagement_score"] == pytest.approx(10, abs=0.01)
+    assert engagement["engagement_points"] == 10
+
+    db_session.expire_all()
+    stored = await db_session.get(Lead, lead["id"])
+    assert stored.lead_score == 45 + 10
+    assert stored.score_rules_hash == shared_scoring_service.plan.fingerprint
+
+    response = await client.post(
+        "/api/v1/leads/999999/activities", json={"activity_type": "email_opened"}
+    )
+    assert response.status_code == 404
+
+    # Timezone-aware timestamps are stored as naive UTC
+    response = await client.post(
+        f"/api/v1/leads/{lead['id']}/activities",
+        json={"activity_type": "email_opened", "created_at": "2026-10-17T12:00:00+02:00"},
+    )
+    assert response.status_code == 201
+    assert response.json()["created_at"] == "2026-10-17T10:00:00"
+    response = await client.post(
+        f"/api/v1/leads/{lead['id']}/activities",
+        json={"activity_type": "email_opened", "created_at": "2026-10-17T10:00:00Z"},
+    )
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_renormalize_engagement(db_session: AsyncSession):
+    """Test the nightly pass decays stored engagement and clears idle leads"""
+    two_weeks_ago = datetime.utcnow() - HALF_LIFE
+    db_session.add_all(
+        [
+            Lead(
+                email="active@company.com",
+                source=LeadSource.API,
+                engagement_score=16,
+                engagement_updated_at=two_weeks_ago,
+                lead_score=31,
+            ),
+            Lead(
+                email="idle@company.com",
+                source=LeadSource.API,
+                engagement_score=0.001,
+                engagement_updated_at=two_weeks_ago,
+            ),
+        ]
+    )
+    await db_session.commit()
+
+    result = await ActivityService(db_session).renormalize_engagement(chunk_size=1)
+    assert result["processed"] == 2
+    assert result["cleared"] == 1
+
+    db_session.expire_all()
+    leads = {
+        lead.email: lead for lead in (await db_session.execute(select(Lead))).scalars().all()
+    }
+    assert leads["active@company.com"].engagement_score == pytest.approx(8, abs=0.01)
+    assert leads["active@company.com"].engagement_updated_at > two_weeks_ago
+    assert leads["active@company.com"].lead_score == 10 + 5 + 8
+    assert leads["idle@company.com"].engagement_score == 0
+    assert leads["idle@company.com"].engagement_updated_at is None
@@ -0,0 +1,78 @@
+"""Tests for the COPY-based lead import script"""
+
+import csv
+
+import asyncpg
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+from app.models.lead import Lead, LeadSource, LeadStatus
+from scripts.import_leads import load_leads, read_csv
+from tests.conftest import TEST_DATABASE_URL
+
+FIELDS = ("email", "first_name", "source", "company_name", "company_domain")
+
+
+@pytest.mark.asyncio
+async def test_import_merges_companies_and_rejects_bad_rows(db_session: AsyncSession, tmp_path):
+    """Test an import resolves companies by domain, skips known emails and counts rejects"""
+    acme = Company(name="Acme", domain="acme.io")
+    db_session.add_all(
+        [acme, Lead(email="known@example.com", first_name="Kim", source=LeadSource.WEBSITE)]
+    )
+    await db_session.commit()
+    acme_id = acme.id
+
+    path = tmp_path / "leads.csv"
+    with path.open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        writer.writerows(
+            [
+                ("a@acme.io", "Ann", "", "", "ACME.io"),
+                ("a@acme.io", "Duplicate", "", "", ""),
+                ("b@new.io", "Bo", "referral", "New Co", "new.io"),
+                ("c@new.io", "Cy", "", "", "new.io"),
+                ("known@example.com", "Replaced", "", "", ""),
+                ("d@example.com", "D" * 101, "", "", ""),
+                ("e@example.com", "Ed", "", "C" * 201, "c.io"),
+                ("not-an-email", "Nope", "", "", ""),
+                ("f@example.com", "Fay", "carrier-pigeon", "", ""),
+            ]
+        )
+
+    dsn = TEST_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    conn = await asyncpg.connect(dsn)
+    try:
+        result = await load_leads(conn, read_csv(path, chunk_size=4), LeadSource.API.value)
+    finally:
+        await conn.close()
+
+    assert result["rows_read"] == 9
+    assert dict(result["rejected"]) == {
+        "first_name over 100 characters": 1,
+        "company_name over 200 characters": 1,
+        "invalid email": 1,
+        "invalid source": 1,
+    }
+    assert result["duplicates"] == 1
+    assert result["unique_emails"] == 4
+    assert result["leads_inserted"] == 3
+    assert result["existing_skipped"] == 1
+    assert result["companies_created"] == 1
+
+    db_session.expire_all()
+    leads = {lead.email: lead for lead in (await db_session.execute(select(Lead))).scalars()}
+    assert sorted(leads) == ["a@acme.io", "b@new.io", "c@new.io", "known@example.com"]
+    assert leads["a@acme.io"].first_name == "Ann"
+    assert leads["a@acme.io"].company_id == acme_id
+    assert leads["a@acme.io"].source == LeadSource.API
+    assert leads["b@new.io"].source == LeadSource.REFERRAL
+    assert leads["b@new.io"].status == LeadStatus.NEW
+    assert leads["b@new.io"].company_id == leads["c@new.io"].company_id
+    assert leads["known@example.com"].first_name == "Kim"
+
+    new_co = await db_session.get(Company, leads["b@new.io"].company_id)
+    assert (new_co.name, new_co.domain) == ("New Co", "new.io")
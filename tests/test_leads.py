@@ -1,9 +1,26 @@
 """Tests for lead management endpoints"""
 
+import csv
+import io
+import json
+from datetime import timedelta
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import delete, func, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cursors import encode_cursor
+from app.models.activity import Activity, ActivityType
+from app.models.company import Company
+from app.models.lead import Lead
+from app.models.lead_search_document import LeadSearchDocument
+from app.schemas.lead import LeadPurgeRequest, LeadResponse
+from app.services.lead_purger import LeadPurger
+from app.services.lead_service import LeadService
+from app.services.scoring_service import shared_scoring_service
+from tests.conftest import TestSessionLocal
+
 
 @pytest.mark.asyncio
 async def test_create_lead(client: AsyncClient, sample_lead_data):
@@ -113,3 +130,527 @@ async def test_lead_scoring(client: AsyncClient, sample_lead_data):
 
     # CEO + referral should score high
     assert data["lead_score"] > 30
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_leads_ndjson(client: AsyncClient, sample_lead_data):
+    """Test bulk ingestion of NDJSON with duplicate and invalid rows"""
+    await client.post("/api/v1/leads/", json=sample_lead_data)
+
+    lines = [
+        '{"email": "bulk1@example.com", "source": "api"}',
+        '{"email": "bulk2@example.com", "source": "referral", "job_title": "CTO"}',
+        '{"email": "bulk1@example.com", "source": "api"}',
+        f'{{"email": "{sample_lead_data["email"]}", "source": "api"}}',
+        '{"email": "not-an-email", "source": "api"}',
+        "{broken",
+    ]
+    response = await client.post(
+        "/api/v1/leads/bulk",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["received"] == 6
+    assert data["accepted"] == 2
+    assert data["duplicates"] == 2
+    assert data["invalid"] == 2
+    assert sorted(error["row"] for error in data["errors"]) == [3, 4, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_leads_json_array(client: AsyncClient):
+    """Test bulk ingestion of a JSON array body"""
+    leads = [{"email": f"array{i}@example.com", "source": "website"} for i in range(5)]
+    response = await client.post("/api/v1/leads/bulk", json=leads)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 5
+    assert data["errors"] == []
+
+    lead_id = (await client.get("/api/v1/leads/")).json()[0]["id"]
+    response = await client.get(f"/api/v1/leads/{lead_id}")
+    assert response.json()["status"] == "new"
+
+
+@pytest.mark.asyncio
+async def test_rescore_leads(client: AsyncClient, db_session: AsyncSession):
+    """Test bulk rescoring rewrites stale scores"""
+    leads = [
+        {"email": "rescore-ceo@company.com", "source": "referral", "job_title": "CEO"},
+        {"email": "rescore-student@gmail.com", "source": "api"},
+    ]
+    await client.post("/api/v1/leads/bulk", json=leads)
+    await db_session.execute(update(Lead).values(lead_score=0, is_qualified=True))
+    await db_session.commit()
+
+    response = await client.post("/api/v1/leads/rescore?chunk_size=100")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["processed"] == 2
+    assert data["updated"] == 2
+
+    db_session.expire_all()
+    scores = dict((await db_session.execute(select(Lead.email, Lead.lead_score))).all())
+    assert scores["rescore-ceo@company.com"] == 45
+    assert scores["rescore-student@gmail.com"] == 5
+
+    # One lead per chunk, each committed on its own
+    await db_session.execute(update(Lead).values(lead_score=0))
+    await db_session.commit()
+    data = await LeadService(db_session).rescore_leads(chunk_size=1)
+    assert (data["processed"], data["updated"]) == (2, 2)
+    db_session.expire_all()
+    scores = dict((await db_session.execute(select(Lead.email, Lead.lead_score))).all())
+    assert scores["rescore-ceo@company.com"] == 45
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_walks_every_lead_once(
+    client: AsyncClient, db_session: AsyncSession
+):
+    """Test cursor pages cover every lead once, also while leads are inserted"""
+    for i in range(5):
+        await client.post("/api/v1/leads/", json={"email": f"page{i}@example.com", "source": "api"})
+    # Give two leads the same created_at so the id tiebreak is exercised
+    leads = (await db_session.execute(select(Lead).order_by(Lead.id))).scalars().all()
+    await db_session.execute(
+        update(Lead).where(Lead.id == leads[2].id).values(created_at=leads[1].created_at)
+    )
+    await db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/v1/leads/?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        response = await client.get(url)
+        assert response.status_code == 200
+        seen += [lead["id"] for lead in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == [lead.id for lead in reversed(leads)]
+
+    # An oldest-first snapshot walk ignores leads inserted while it runs
+    await db_session.execute(
+        update(Lead).values(created_at=Lead.created_at - timedelta(minutes=1))
+    )
+    await db_session.commit()
+    response = await client.get("/api/v1/leads/?limit=2&order=asc&snapshot=true")
+    seen, cursor = [lead["id"] for lead in response.json()], response.headers["X-Next-Cursor"]
+    while cursor:
+        await client.post(
+            "/api/v1/leads/", json={"email": f"late{len(seen)}@example.com", "source": "api"}
+        )
+        response = await client.get(f"/api/v1/leads/?limit=2&cursor={cursor}")
+        seen += [lead["id"] for lead in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+    assert seen == [lead.id for lead in leads]
+
+    response = await client.get("/api/v1/leads/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+    # Cursors of other endpoints, or missing walk keys, are rejected rather than crash
+    for position in (
+        {"endpoint": "fuzzy", "q": "acme", "filters": None, "distance": 0.2, "id": 1},
+        {"q": "acme", "distance": 0.2, "id": 1},
+        {"endpoint": "leads", "order": "sideways", "snapshot_at": None},
+        {"endpoint": "leads", "order": "asc", "snapshot_at": None, "id": 1},
+        {"endpoint": "leads", "order": "asc", "snapshot_at": None, "created_at": 5, "id": 1},
+    ):
+        response = await client.get(f"/api/v1/leads/?cursor={encode_cursor(position)}")
+        assert response.status_code == 400
+    next_page = (await client.get("/api/v1/leads/?limit=2")).headers["X-Next-Cursor"]
+    response = await client.get(f"/api/v1/leads/search?cursor={next_page}")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_leads_combines_filters(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    """Test lead search filters, paging and debug-mode plan diagnostics"""
+    for i, (source, tags) in enumerate(
+        [("api", "Enterprise, renewal"), ("api", "enterprise"), ("webinar", "enterprise,renewal")]
+    ):
+        await client.post(
+            "/api/v1/leads/",
+            json={"email": f"search{i}@example.com", "source": source, "tags": tags},
+        )
+    await db_session.execute(update(Lead).values(lead_score=80, is_qualified=True))
+    await db_session.commit()
+
+    response = await client.get(
+        "/api/v1/leads/search?source=api&source=webinar&tag=enterprise&tag=RENEWAL"
+        "&qualified=true&min_score=70&limit=1"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [lead["email"] for lead in data["leads"]] == ["search2@example.com"]
+    assert data["query_plan"] is None
+
+    # Cursors only continue the search they came from
+    response = await client.get(
+        f"/api/v1/leads/search?tag=enterprise&limit=1&cursor={data['next_cursor']}"
+    )
+    assert response.status_code == 400
+
+    response = await client.get(
+        "/api/v1/leads/search?source=api&source=webinar&tag=enterprise&tag=RENEWAL"
+        f"&qualified=true&min_score=70&limit=1&cursor={data['next_cursor']}"
+    )
+    data = response.json()
+    assert [lead["email"] for lead in data["leads"]] == ["search0@example.com"]
+    assert data["next_cursor"] is None
+
+    response = await client.get("/api/v1/leads/search?source=api&max_score=50")
+    assert response.json()["leads"] == []
+
+    monkeypatch.setattr("app.api.leads.settings.DEBUG", True)
+    response = await client.get("/api/v1/leads/search?status=new&qualified=true")
+    plan = response.json()["query_plan"]
+    assert plan["total_cost"] > 0
+    assert plan["nodes"]
+
+    response = await client.get("/api/v1/leads/search?min_score=90&max_score=10")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_documents_follow_lead_and_company_writes(
+    client: AsyncClient, db_session: AsyncSession
+):
+    """Test search documents track writes and fuzzy search ranks typo matches"""
+    company = Company(name="Acme Analytics", domain="acme.io")
+    db_session.add(company)
+    await db_session.commit()
+    response = await client.post(
+        "/api/v1/leads/",
+        json={
+            "email": "jsmith@acme.io",
+            "first_name": "John",
+            "last_name": "Smith",
+            "job_title": "Head of Growth",
+            "company_id": company.id,
+            "source": "api",
+        },
+    )
+    lead_id = response.json()["id"]
+    await client.post("/api/v1/leads/", json={"email": "other@example.com", "source": "api"})
+
+    async def document():
+        return await db_session.scalar(
+            select(LeadSearchDocument.document).where(LeadSearchDocument.lead_id == lead_id)
+        )
+
+    assert await document() == "John Smith jsmith@acme.io Head of Growth Acme Analytics acme.io"
+    await client.put(f"/api/v1/leads/{lead_id}", json={"first_name": "Jonathan"})
+    await db_session.execute(update(Company).values(name="Acme Labs"))
+    await db_session.commit()
+    assert await document() == "Jonathan Smith jsmith@acme.io Head of Growth Acme Labs acme.io"
+
+    await db_session.execute(delete(LeadSearchDocument))
+    await db_session.commit()
+    response = await client.post("/api/v1/leads/search/refresh")
+    assert response.json()["written"] == 2
+    response = await client.post("/api/v1/leads/search/refresh")
+    assert response.json()["written"] == 0
+
+    trigram = await db_session.scalar(
+        text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")
+    )
+    response = await client.get("/api/v1/leads/search/fuzzy?q=jonathn smiht")
+    if not trigram:
+        assert response.status_code == 503
+        return
+    data = response.json()
+    assert [lead["id"] for lead in data["leads"]] == [lead_id]
+    assert 0 < data["leads"][0]["rank"] <= 1
+
+    response = await client.get("/api/v1/leads/search/fuzzy?q=acme lab&status=new&limit=1")
+    assert response.json()["leads"][0]["id"] == lead_id
+
+    # Pages walk matches nearest first, ties included, each lead once
+    for i in range(3):
+        await client.post(
+            "/api/v1/leads/",
+            json={"email": f"smyth{i}@example.com", "first_name": "Jon", "source": "api"},
+        )
+    seen, ranks, cursor = [], [], None
+    while True:
+        url = "/api/v1/leads/search/fuzzy?q=jon smith&limit=2"
+        page = (await client.get(url + (f"&cursor={cursor}" if cursor else ""))).json()
+        seen += [lead["id"] for lead in page["leads"]]
+        ranks += [lead["rank"] for lead in page["leads"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen[0] == lead_id
+    assert len(seen) == len(set(seen)) == 4
+    assert ranks == sorted(ranks, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_lead_list_fields_projection(client: AsyncClient, db_session: AsyncSession):
+    """Test sparse fieldsets and that fast-encoded rows match LeadResponse"""
+    for i in range(3):
+        await client.post(
+            "/api/v1/leads/",
+            json={"email": f"fields{i}@example.com", "source": "webinar", "tags": "vip"},
+        )
+    leads = (
+        await db_session.execute(select(Lead).order_by(Lead.created_at.desc(), Lead.id.desc()))
+    ).scalars().all()
+
+    response = await client.get("/api/v1/leads/")
+    assert response.json() == [
+        LeadResponse.model_validate(lead).model_dump(mode="json") for lead in leads
+    ]
+
+    response = await client.get("/api/v1/leads/?fields=email,status,lead_score,email&limit=2")
+    assert response.json() == [
+        {"email": lead.email, "status": "new", "lead_score": lead.lead_score}
+        for lead in leads[:2]
+    ]
+    cursor = response.headers["X-Next-Cursor"]
+    response = await client.get(f"/api/v1/leads/?fields=id&limit=2&cursor={cursor}")
+    assert response.json() == [{"id": leads[2].id}]
+
+    response = await client.get("/api/v1/leads/search?tag=vip&fields=id,source")
+    assert response.json()["leads"][0] == {"id": leads[0].id, "source": "webinar"}
+
+    response = await client.get("/api/v1/leads/?fields=id,password")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_export_streams_filtered_leads(client: AsyncClient, monkeypatch):
+    """Test NDJSON and CSV exports stream every matching lead in id order"""
+    monkeypatch.setattr("app.api.leads.lead_exporter.session_factory", TestSessionLocal)
+    monkeypatch.setattr("app.api.leads.lead_exporter.chunk_size", 2)
+    ids = []
+    for i in range(5):
+        response = await client.post(
+            "/api/v1/leads/",
+            json={
+                "email": f"export{i}@example.com",
+                "source": "webinar" if i % 2 else "api",
+                "notes": "line one\nline two, quoted \"text\"",
+            },
+        )
+        ids.append(response.json()["id"])
+
+    response = await client.get("/api/v1/leads/export?source=api&fields=id,email,status")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == [
+        {"id": ids[i], "email": f"export{i}@example.com", "status": "new"} for i in (0, 2, 4)
+    ]
+
+    response = await client.get("/api/v1/leads/export?format=csv&fields=id,source,notes,created_at")
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "source", "notes", "created_at"]
+    assert [int(row[0]) for row in rows[1:]] == ids
+    assert rows[1][1:3] == ["api", "line one\nline two, quoted \"text\""]
+    assert "T" in rows[1][3]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_leads(client: AsyncClient, db_session: AsyncSession):
+    """Test bulk updates by ids and filters, with dry runs and status activities"""
+    ids = []
+    for i in range(4):
+        response = await client.post(
+            "/api/v1/leads/",
+            json={"email": f"bulk{i}@example.com", "source": "api", "campaign": "spring"},
+        )
+        ids.append(response.json()["id"])
+    await client.put(f"/api/v1/leads/{ids[0]}", json={"status": "contacted"})
+
+    body = {"filters": {"campaign": "spring"}, "changes": {"status": "contacted"}}
+    response = await client.patch("/api/v1/leads/bulk", json={**body, "dry_run": True})
+    assert response.json() == {"matched": 4, "updated": 3, "status_changes": 3, "dry_run": True}
+    status = await db_session.scalar(select(Lead.status).where(Lead.id == ids[1]))
+    assert status == "new"
+
+    response = await client.patch("/api/v1/leads/bulk", json=body)
+    assert response.json() == {"matched": 4, "updated": 3, "status_changes": 3, "dry_run": False}
+    activities = (
+        await db_session.execute(select(Activity).order_by(Activity.lead_id))
+    ).scalars().all()
+    assert [activity.lead_id for activity in activities] == ids[1:]
+    assert activities[0].activity_type == ActivityType.STATUS_CHANGE
+    assert activities[0].description == "Status changed from new to contacted"
+
+    response = await client.patch(
+        "/api/v1/leads/bulk",
+        json={"lead_ids": ids[:2], "changes": {"tags": "vip", "campaign": None}},
+    )
+    assert response.json() == {"matched": 2, "updated": 2, "status_changes": 0, "dry_run": False}
+    response = await client.patch("/api/v1/leads/bulk", json=body)
+    assert response.json()["matched"] == 2 and response.json()["updated"] == 0
+    db_session.expire_all()
+    lead = (await db_session.execute(select(Lead).where(Lead.id == ids[1]))).scalar_one()
+    assert (lead.status, lead.tags, lead.campaign) == ("contacted", "vip", None)
+
+    response = await client.patch("/api/v1/leads/bulk", json={"changes": {"tags": "x"}})
+    assert response.status_code == 422
+    response = await client.patch(
+        "/api/v1/leads/bulk", json={"lead_ids": ids, "changes": {"status": None}}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_delete_cascades_and_purge_deletes_in_batches(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    """Test database-side cascade on delete and batched purges by email and age"""
+    monkeypatch.setattr("app.api.leads.lead_purger.session_factory", TestSessionLocal)
+    ids = []
+    for i in range(5):
+        response = await client.post(
+            "/api/v1/leads/", json={"email": f"purge{i}@example.com", "source": "api"}
+        )
+        ids.append(response.json()["id"])
+    db_session.add_all(
+        Activity(lead_id=lead_id, activity_type=ActivityType.PAGE_VIEW, title="Visited")
+        for lead_id in ids
+        for _ in range(3)
+    )
+    await db_session.execute(
+        update(Lead)
+        .where(Lead.id.in_(ids[3:]))
+        .values(created_at=Lead.created_at - timedelta(days=400))
+    )
+    await db_session.commit()
+
+    response = await client.delete(f"/api/v1/leads/{ids[0]}")
+    assert response.status_code == 204
+    remaining = await db_session.scalar(
+        select(func.count()).select_from(Activity).where(Activity.lead_id == ids[0])
+    )
+    assert remaining == 0
+
+    response = await client.post(
+        "/api/v1/leads/purge", json={"older_than_days": 365, "dry_run": True}
+    )
+    assert response.json() == {"matched": 2, "dry_run": True}
+    response = await client.post("/api/v1/leads/purge", json={"dry_run": True})
+    assert response.status_code == 422
+
+    purger = LeadPurger(session_factory=TestSessionLocal, batch_size=2, pause_ms=0)
+    result = await purger.purge(
+        LeadPurgeRequest(emails=["purge1@example.com", "purge3@example.com", "nobody@x.io"])
+    )
+    assert (result["status"], result["deleted"], result["batches"]) == ("completed", 2, 1)
+    result = await purger.purge(LeadPurgeRequest(older_than_days=365))
+    assert (result["matched"], result["deleted"]) == (1, 1)
+
+    lead_ids = (await db_session.execute(select(Lead.id).order_by(Lead.id))).scalars().all()
+    assert lead_ids == [ids[2]]
+    activity_leads = (await db_session.execute(select(Activity.lead_id))).scalars().all()
+    assert activity_leads == [ids[2]] * 3
+
+
+@pytest.mark.asyncio
+async def test_conditional_update_and_score_use_returning(
+    client: AsyncClient, db_session: AsyncSession
+):
+    """Test If-Match updates against the lead's ETag and scoring in SQL"""
+    response = await client.post(
+        "/api/v1/leads/",
+        json={"email": "cas@acme.io", "source": "referral", "job_title": "VP Sales"},
+    )
+    lead_id = response.json()["id"]
+    response = await client.get(f"/api/v1/leads/{lead_id}")
+    etag = response.headers["etag"]
+
+    response = await client.put(
+        f"/api/v1/leads/{lead_id}", json={"status": "contacted"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "contacted"
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+    assert response.json() == LeadResponse.model_validate(
+        (await client.get(f"/api/v1/leads/{lead_id}")).json()
+    ).model_dump(mode="json")
+
+    response = await client.put(
+        f"/api/v1/leads/{lead_id}", json={"status": "lost"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 412
+    response = await client.put(
+        f"/api/v1/leads/{lead_id}", json={"notes": "x"}, headers={"If-Match": f'W/{new_etag}'}
+    )
+    assert response.status_code == 412
+    response = await client.get(f"/api/v1/leads/{lead_id}")
+    assert response.json()["status"] == "contacted" and response.headers["etag"] == new_etag
+
+    response = await client.put(
+        f"/api/v1/leads/{lead_id}", json={"notes": "ok"}, headers={"If-Match": f'"x", {new_etag}'}
+    )
+    assert response.status_code == 200
+    response = await client.put(
+        f"/api/v1/leads/{lead_id}", json={"tags": "vip"}, headers={"If-Match": "*"}
+    )
+    assert response.json()["tags"] == "vip"
+    response = await client.put("/api/v1/leads/999999", json={}, headers={"If-Match": etag})
+    assert response.status_code == 404
+
+    await db_session.execute(update(Lead).where(Lead.id == lead_id).values(lead_score=0))
+    await db_session.commit()
+    response = await client.post(f"/api/v1/leads/{lead_id}/score")
+    lead = (await db_session.execute(select(Lead).where(Lead.id == lead_id))).scalar_one()
+    await db_session.refresh(lead)
+    expected = await shared_scoring_service.calculate_score(
+        {
+            "email": lead.email,
+            "job_title": lead.job_title,
+            "source": lead.source,
+            "company_id": lead.company_id,
+            "phone": lead.phone,
+            "linkedin_url": lead.linkedin_url,
+        }
+    )
+    assert response.json() == {"lead_id": lead_id, "score": expected}
+    assert lead.lead_score == expected and expected > 0
+
+
+@pytest.mark.asyncio
+async def test_lead_reads_are_cached_until_a_write(client: AsyncClient):
+    """Test repeated reads hit the lead cache and writes invalidate it"""
+    response = await client.post(
+        "/api/v1/leads/", json={"email": "hot@acme.io", "source": "api", "job_title": "CTO"}
+    )
+    lead_id = response.json()["id"]
+    before = (await client.get("/api/v1/leads/cache/stats")).json()
+
+    for _ in range(3):
+        response = await client.get(f"/api/v1/leads/{lead_id}")
+    stats = (await client.get("/api/v1/leads/cache/stats")).json()
+    assert stats["loads"] - before["loads"] == 1
+    assert stats["local"]["hits"] - before["local"]["hits"] == 2
+    assert stats["memory_bytes"] > 0
+
+    await client.put(f"/api/v1/leads/{lead_id}", json={"notes": "updated"})
+    response = await client.get(f"/api/v1/leads/{lead_id}")
+    assert response.json()["notes"] == "updated"
+    stale_score = response.json()["lead_score"]
+
+    response = await client.post(
+        f"/api/v1/leads/{lead_id}/activities", json={"activity_type": "meeting"}
+    )
+    assert response.status_code == 201
+    engaged = (await client.get(f"/api/v1/leads/{lead_id}")).json()["lead_score"]
+    assert engaged > stale_score
+
+    await client.patch(
+        "/api/v1/leads/bulk", json={"lead_ids": [lead_id], "changes": {"tags": "x"}}
+    )
+    assert (await client.get(f"/api/v1/leads/{lead_id}")).json()["tags"] == "x"
+
+    await client.delete(f"/api/v1/leads/{lead_id}")
+    assert (await client.get(f"/api/v1/leads/{lead_id}")).status_code == 404
@@ -1,7 +1,19 @@
 """Tests for lead scoring service"""
 
+import pandas as pd
 import pytest
-from app.services.scoring_service import ScoringService
+from sqlalchemy import Integer, String, column, select, values
+
+from tests.conftest import TestSessionLocal
+
+from app.models.lead import Lead, LeadSource
+from app.models.scoring_job import ScoringJobStatus
+from app.services.score_rescorer import StaleScoreRescorer
+from app.services.scoring_service import (
+    DEFAULT_SCORING_RULES,
+    ScoringService,
+    shared_scoring_service,
+)
 
 
 @pytest.fixture
@@ -70,3 +82,164 @@ async def test_free_email_penalty(scoring_service):
     free_score = await scoring_service.calculate_score(free_email_lead)
 
     assert business_score > free_score
+
+
+@pytest.mark.asyncio
+async def test_score_matches_breakdown(scoring_service):
+    """Test calculate_score and get_score_breakdown always agree"""
+    leads = [
+        {
+            "email": "ceo@company.com",
+            "job_title": "CEO",
+            "source": "referral",
+            "company_id": 1,
+            "phone": "+1234567890",
+            "linkedin_url": "https://linkedin.com/in/user",
+        },
+        {"email": "user@gmail.com", "job_title": None, "source": "chat_widget"},
+        {"email": "invalid", "job_title": "Head of Growth", "source": "webinar"},
+    ]
+    for lead in leads:
+        breakdown = scoring_service.get_score_breakdown(lead)
+        assert await scoring_service.calculate_score(lead) == min(sum(breakdown.values()), 100)
+        assert scoring_service.score(lead) == await scoring_service.calculate_score(lead)
+
+
+def test_rules_compile_once():
+    """Test identical rule sets share one compiled plan"""
+    assert ScoringService().plan is shared_scoring_service.plan
+    assert ScoringService(dict(DEFAULT_SCORING_RULES)).plan is shared_scoring_service.plan
+
+    custom_rules = {**DEFAULT_SCORING_RULES, "source_default": 0}
+    custom = ScoringService(custom_rules)
+    assert custom.plan.fingerprint != shared_scoring_service.plan.fingerprint
+    assert custom.score({"email": "x@gmail.com", "source": "api"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_score_expression_matches_calculate_score(scoring_service, db_session):
+    """Test the set-based SQL score agrees with calculate_score"""
+    leads = [
+        ("ceo@company.com", "CEO", "referral", 1, "+1234567890", None),
+        (
+            "director@gmail.com",
+            "Sales Director",
+            "website",
+            None,
+            None,
+            "https://linkedin.com/in/x",
+        ),
+        ("student@yahoo.com", None, "api", None, "", None),
+        ("no-domain", "Team Lead", "webinar", 2, None, None),
+    ]
+    rows = values(
+        column("email", String),
+        column("job_title", String),
+        column("source", String),
+        column("company_id", Integer),
+        column("phone", String),
+        column("linkedin_url", String),
+        name="leads_to_score",
+    ).data(leads)
+    result = await db_session.execute(select(scoring_service.score_expression(rows.c)))
+    sql_scores = result.scalars().all()
+
+    expected = [
+        await scoring_service.calculate_score(
+            dict(zip(("email", "job_title", "source", "company_id", "phone", "linkedin_url"), lead))
+        )
+        for lead in leads
+    ]
+    assert sql_scores == expected
+
+
+def test_score_batch_matches_calculate_score(scoring_service):
+    """Test vectorized batch scoring agrees with per-lead scoring"""
+    leads = [
+        {
+            "job_title": "CEO",
+            "email": "ceo@company.com",
+            "source": LeadSource.REFERRAL,
+            "company_id": 1,
+            "phone": "+1234567890",
+            "linkedin_url": None,
+        },
+        {
+            "job_title": "Sales Director",
+            "email": "dir@gmail.com",
+            "source": LeadSource.WEBINAR,
+            "company_id": None,
+            "phone": None,
+            "linkedin_url": "https://linkedin.com/in/user",
+        },
+        {
+            "job_title": None,
+            "email": "no-domain",
+            "source": LeadSource.API,
+            "company_id": 2,
+            "phone": "",
+            "linkedin_url": None,
+        },
+    ]
+    expected = [scoring_service.score(lead) for lead in leads]
+
+    assert scoring_service.score_batch(pd.DataFrame(leads)).tolist() == expected
+
+    # Postgres enum labels score the same as enum members
+    columns = {key: [lead[key] for lead in leads] for key in leads[0]}
+    columns["source"] = ["REFERRAL", "WEBINAR", "API"]
+    assert scoring_service.score_batch(columns).tolist() == expected
+
+
+@pytest.mark.asyncio
+async def test_stale_rescorer_resumes_and_completes(db_session):
+    """Test the stale-score job rescores only stale leads and resumes from its cursor"""
+    current = shared_scoring_service.plan
+    db_session.add_all(
+        [
+            Lead(email=f"stale{i}@company.com", job_title="CEO", source=LeadSource.REFERRAL)
+            for i in range(5)
+        ]
+        + [
+            Lead(
+                email="current@company.com",
+                source=LeadSource.API,
+                lead_score=99,
+                score_version=current.version,
+                score_rules_hash=current.fingerprint,
+            )
+        ]
+    )
+    await db_session.commit()
+
+    rescorer = StaleScoreRescorer(session_factory=TestSessionLocal, chunk_size=2, throttle_ms=0)
+    job = await rescorer.prepare_job()
+    assert job.total_leads == 5
+    assert await rescorer.rescore_next_chunk()
+
+    # A fresh rescorer, as after a restart, picks up the same job at its cursor
+    resumed = StaleScoreRescorer(session_factory=TestSessionLocal, chunk_size=2, throttle_ms=0)
+    await resumed.run()
+    progress = (await resumed.status())["job"]
+    assert progress["id"] == job.id
+    assert progress["status"] == ScoringJobStatus.COMPLETED
+    assert progress["processed"] == 5
+    assert progress["remaining"] == 0
+
+    db_session.expire_all()
+    leads = dict(
+        (await db_session.execute(select(Lead.email, Lead.lead_score))).all()
+    )
+    assert leads["current@company.com"] == 99
+    assert leads["stale0@company.com"] == 45
+    hashes = (await db_session.execute(select(Lead.score_rules_hash).distinct())).scalars().all()
+    assert hashes == [current.fingerprint]
+
+    # Changing the rules starts a new job covering every lead
+    changed = ScoringService({**DEFAULT_SCORING_RULES, "version": 2, "source_default": 0})
+    new_job = await StaleScoreRescorer(
+        session_factory=TestSessionLocal, scoring_service=changed
+    ).prepare_job()
+    assert new_job.id != job.id
+    assert new_job.rules_version == 2
+    assert new_job.total_leads == 6
@@ -0,0 +1,47 @@
+"""Tests for mergeable sketches"""
+
+from app.core.sketches import HyperLogLog, ScoreHistogram
+
+
+def test_score_histogram_merges_and_answers_quantiles():
+    """Test merged histograms answer quantiles, bins and thresholds exactly"""
+    monday, tuesday = ScoreHistogram(), ScoreHistogram()
+    for score in range(0, 50):
+        monday.add(score)
+    for score in range(50, 100):
+        tuesday.add(score)
+    tuesday.add(250)  # Clamped to the top score
+
+    week = ScoreHistogram().merge(monday).merge(tuesday)
+    assert week.total == 101
+    assert week.quantile(0.5) == 50
+    assert week.quantile(0.9) == 90
+    assert week.quantile(0.99) == 99
+    assert week.quantile(1.0) == 100
+    assert week.count_at_least(70) == 31
+    assert week.bins(25)[0] == {"min_score": 0, "max_score": 24, "leads": 25}
+    assert week.bins(25)[-1] == {"min_score": 100, "max_score": 100, "leads": 1}
+
+    assert ScoreHistogram().quantile(0.5) is None
+
+
+def test_hyperloglog_estimates_and_merges_within_error():
+    """Test HyperLogLog counts distinct values and merges across days"""
+    monday, tuesday = HyperLogLog(), HyperLogLog()
+    for i in range(30_000):
+        monday.add(f"10.0.{i}")
+    for i in range(20_000, 50_000):
+        tuesday.add(f"10.0.{i}")
+    for i in range(100):
+        tuesday.add("10.0.1")  # Repeats do not count
+
+    tolerance = 3 * monday.relative_error
+    assert abs(monday.count() - 30_000) <= 30_000 * tolerance
+    week = HyperLogLog.from_bytes(monday.to_bytes()).merge(tuesday)
+    assert abs(week.count() - 50_000) <= 50_000 * tolerance
+    assert len(week.to_bytes()) < len(week.registers)
+
+    small = HyperLogLog()
+    for i in range(25):
+        small.add(str(i))
+    assert small.count() == 25
@@ -0,0 +1,130 @@
+"""Tests for webhook lead capture"""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import Activity, ActivityType
+from app.models.lead import Lead
+from app.services.lead_buffer import DuplicateLeadError, LeadWriteBuffer
+from tests.conftest import TestSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_form_submission(client: AsyncClient, db_session: AsyncSession):
+    """Test form submission creates a lead and its activity"""
+    response = await client.post(
+        "/api/v1/webhooks/form-submission",
+        json={"email": "form@example.com", "first_name": "Form", "form_name": "contact"},
+    )
+    assert response.status_code == 200
+    lead_id = response.json()["lead_id"]
+
+    activities = (
+        await db_session.execute(select(Activity).where(Activity.lead_id == lead_id))
+    ).scalars().all()
+    assert [a.activity_type for a in activities] == [ActivityType.FORM_SUBMISSION]
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_batches_leads(db_session: AsyncSession):
+    """Test write-behind buffer flushes by size and hands back lead ids"""
+    buffer = LeadWriteBuffer(
+        session_factory=TestSessionLocal, max_batch_size=2, flush_interval_ms=10
+    )
+    activity = {"activity_type": ActivityType.PAGE_VIEW, "title": "Landing Page Conversion"}
+
+    lead_ids = await asyncio.gather(
+        *[
+            buffer.submit({"email": f"buffered{i}@example.com", "source": "landing_page"}, activity)
+            for i in range(3)
+        ]
+    )
+    await buffer.close()
+
+    assert len(set(lead_ids)) == 3
+    lead_count = await db_session.scalar(select(func.count(Lead.id)).where(Lead.id.in_(lead_ids)))
+    activity_count = await db_session.scalar(
+        select(func.count(Activity.id)).where(Activity.lead_id.in_(lead_ids))
+    )
+    assert lead_count == 3
+    assert activity_count == 3
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_flushes_mixed_webhook_activities(db_session: AsyncSession):
+    """Test one batch mixes form, landing-page and chat activities with different columns"""
+    buffer = LeadWriteBuffer(
+        session_factory=TestSessionLocal, max_batch_size=3, flush_interval_ms=10
+    )
+    activities = [
+        {
+            "activity_type": ActivityType.FORM_SUBMISSION,
+            "title": "Form Submitted",
+            "ip_address": "203.0.113.7",
+            "user_agent": "Mozilla/5.0",
+        },
+        {
+            "activity_type": ActivityType.PAGE_VIEW,
+            "title": "Landing Page Conversion",
+            "ip_address": "203.0.113.8",
+        },
+        {"activity_type": ActivityType.NOTE, "title": "Chat Conversation"},
+    ]
+
+    lead_ids = await asyncio.gather(
+        *[
+            buffer.submit({"email": f"mixed{i}@example.com", "source": "website"}, activity)
+            for i, activity in enumerate(activities)
+        ]
+    )
+    await buffer.close()
+
+    rows = (
+        await db_session.execute(
+            select(Activity.lead_id, Activity.ip_address, Activity.user_agent)
+            .where(Activity.lead_id.in_(lead_ids))
+            .order_by(Activity.lead_id)
+        )
+    ).all()
+    assert [tuple(row) for row in rows] == [
+        (lead_ids[0], "203.0.113.7", "Mozilla/5.0"),
+        (lead_ids[1], "203.0.113.8", None),
+        (lead_ids[2], None, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_rejects_duplicates(db_session: AsyncSession):
+    """Test write-behind buffer reports duplicate emails per request"""
+    buffer = LeadWriteBuffer(session_factory=TestSessionLocal, flush_interval_ms=10)
+    activity = {"activity_type": ActivityType.NOTE, "title": "Chat Conversation"}
+    lead = {"email": "dup@example.com", "source": "chat_widget"}
+
+    results = await asyncio.gather(
+        buffer.submit(lead, activity), buffer.submit(lead, activity), return_exceptions=True
+    )
+    await buffer.close()
+
+    assert isinstance(results[0], int)
+    assert isinstance(results[1], DuplicateLeadError)
+
+
+@pytest.mark.asyncio
+async def test_replayed_delivery_returns_original_lead(client: AsyncClient):
+    """Test retried deliveries are answered from the idempotency cache"""
+    payload = {"email": "retry@example.com", "page_name": "pricing"}
+    headers = {"Idempotency-Key": "delivery-123"}
+
+    first = await client.post("/api/v1/webhooks/landing-page", json=payload, headers=headers)
+    stats_before = (await client.get("/api/v1/webhooks/idempotency/stats")).json()
+    replay = await client.post("/api/v1/webhooks/landing-page", json=payload, headers=headers)
+    stats_after = (await client.get("/api/v1/webhooks/idempotency/stats")).json()
+
+    assert first.status_code == 200
+    assert replay.status_code == 200
+    assert replay.json()["lead_id"] == first.json()["lead_id"]
+    assert stats_after["hits"] == stats_before["hits"] + 1